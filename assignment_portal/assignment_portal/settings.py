@@ -15,25 +15,58 @@ from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
 import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 
-cloudinary.config(
-    cloud_name="dlzn0moho",
-    api_key="563396395915366",
-    api_secret="pCSSrLNvxfFSEzY4ZnaOiF5u93o"
-)
+# Cloudinary credentials come from the environment: either CLOUDINARY_URL
+# (cloudinary://<api_key>:<api_secret>@<cloud_name>, read by the SDK itself)
+# or the three CLOUDINARY_* variables below.
+_CLOUDINARY_CREDENTIALS = {
+    'cloud_name': os.environ.get('CLOUDINARY_CLOUD_NAME'),
+    'api_key': os.environ.get('CLOUDINARY_API_KEY'),
+    'api_secret': os.environ.get('CLOUDINARY_API_SECRET'),
+}
+cloudinary.config(**{key: value for key, value in _CLOUDINARY_CREDENTIALS.items() if value})
 
 CLOUDINARY_STORAGE = {
-    'CLOUD_NAME': 'dlzn0moho',
-    'API_KEY': '563396395915366',
-    'API_SECRET': 'pCSSrLNvxfFSEzY4ZnaOiF5u93o',
+    'CLOUD_NAME': _CLOUDINARY_CREDENTIALS['cloud_name'],
+    'API_KEY': _CLOUDINARY_CREDENTIALS['api_key'],
+    'API_SECRET': _CLOUDINARY_CREDENTIALS['api_secret'],
 }
 
 
 MEDIA_URL = '/media/'  # or any prefix you choose
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# Where submission files live. SUBMISSION_STORE_BACKEND selects:
+#   local: content-addressed blobs under SUBMISSION_BLOB_ROOT, one copy per
+#          distinct file. Rows still naming Cloudinary files are read from
+#          Cloudinary until `manage.py migrate_submission_files` copies them.
+#   cloudinary: everything on Cloudinary (needs the credentials above).
+SUBMISSION_BLOB_ROOT = os.environ.get('SUBMISSION_BLOB_ROOT', Path(__file__).resolve().parent.parent / 'blobs')
+SUBMISSION_STORES = {
+    'local': {
+        'BACKEND': 'submissions.storage.ContentAddressedBlobStore',
+        'OPTIONS': {'fallback': 'submissions.storage.CloudinaryBlobStore'},
+    },
+    'cloudinary': {
+        'BACKEND': 'submissions.storage.CloudinaryBlobStore',
+        'OPTIONS': {},
+    },
+}
+SUBMISSION_STORE = SUBMISSION_STORES[os.environ.get('SUBMISSION_STORE_BACKEND', 'local')]
+SUBMISSION_DOWNLOAD_WORKERS = 4
+
+# Who sends a submission file once the portal has checked access to it.
+# SUBMISSION_FILE_SERVER selects:
+#   django: a FileResponse, sent with sendfile by servers that provide
+#           wsgi.file_wrapper (gunicorn, uWSGI).
+#   nginx: X-Accel-Redirect to SUBMISSION_ACCEL_REDIRECT_PREFIX, which must
+#          be an `internal` location aliased to SUBMISSION_BLOB_ROOT.
+#   apache: X-Sendfile with the absolute path (mod_xsendfile, with
+#           XSendFilePath covering SUBMISSION_BLOB_ROOT).
+# Files still on Cloudinary are redirected to their delivery URL.
+SUBMISSION_FILE_SERVER = os.environ.get('SUBMISSION_FILE_SERVER', 'django')
+SUBMISSION_ACCEL_REDIRECT_PREFIX = '/protected/blobs/'
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,6 +88,9 @@ ALLOWED_HOSTS = ["*", ".githubpreview.dev"]
 
 AUTH_USER_MODEL = 'submissions.UserProfile'
 
+# Loads student/lecturer profiles with the user so role checks cost no queries
+AUTHENTICATION_BACKENDS = ['submissions.backends.ProfileModelBackend']
+
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -64,14 +100,17 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "submissions",
     "django.contrib.staticfiles",
+    "rest_framework",
 ]
 
 MIDDLEWARE = [
+    "submissions.middleware.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "submissions.middleware.UserRoleMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -80,7 +119,8 @@ ROOT_URLCONF = "assignment_portal.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates that reports render time to RequestProfilingMiddleware.
+        "BACKEND": "submissions.profiling.ProfiledDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -108,6 +148,142 @@ DATABASES = {
 
 
 
+# Caching
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND selects a backend that needs no external service:
+#   locmem (per process), file (shared by processes on one host) or
+#   db (shared by every host; run `manage.py createcachetable` once).
+# Cached course lists, dashboard statistics and dashboard fragments are
+# invalidated through the cache, so they need a shared backend: under the
+# locmem default none of them is cached and every request reads the
+# database. Set CACHE_BACKEND to file or db in production.
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'edusubmit',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / 'cache'),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'edusubmit_cache',
+    },
+}
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'TIMEOUT': 300,
+        'KEY_PREFIX': 'edusubmit',
+    },
+}
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+# SESSION_BACKEND selects where sessions live:
+#   db (a database read on every request; the default), cached_db (reads
+#   served from CACHES, writes go through to the database; needs a
+#   CACHE_BACKEND shared by every worker, or logged-out sessions stay valid
+#   in the other workers' caches, see submissions.checks), signed_cookies
+#   (no server-side storage; sessions must stay under 4 KB and cannot be
+#   revoked) or file (SESSION_FILE_PATH on local disk). Expired rows and files
+#   are removed by `manage.py purge_sessions`; compare modes with
+#   `manage.py benchmark_sessions`.
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'db': 'django.contrib.sessions.backends.db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'file': 'django.contrib.sessions.backends.file',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'db')]
+SESSION_FILE_PATH = os.environ.get('SESSION_FILE_PATH', BASE_DIR / 'sessions')
+
+COURSE_CACHE_TIMEOUT = 60 * 60  # course lists change a few times per semester
+STATS_CACHE_TIMEOUT = 5 * 60
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+
+# Password hashing. PASSWORD_HASHER picks the algorithm for new hashes:
+# 'scrypt' (default), 'argon2' (needs argon2-cffi) or 'pbkdf2'. The others
+# stay listed so existing hashes keep verifying; they are upgraded to the
+# chosen algorithm and costs on the next login. Compare settings with
+# `manage.py benchmark_hashers`.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')
+PASSWORD_HASHER_COST = {
+    'argon2': {
+        'time_cost': int(os.environ.get('ARGON2_TIME_COST', 2)),
+        'memory_cost': int(os.environ.get('ARGON2_MEMORY_COST', 64 * 1024)),  # KiB
+        'parallelism': int(os.environ.get('ARGON2_PARALLELISM', 1)),
+    },
+    'scrypt': {
+        'work_factor': int(os.environ.get('SCRYPT_WORK_FACTOR', 2 ** 14)),
+        'block_size': int(os.environ.get('SCRYPT_BLOCK_SIZE', 8)),
+        'parallelism': int(os.environ.get('SCRYPT_PARALLELISM', 1)),
+    },
+    'pbkdf2': {
+        'iterations': int(os.environ.get('PBKDF2_ITERATIONS', 1_000_000)),
+    },
+}
+_PASSWORD_HASHERS = {
+    'scrypt': 'submissions.hashers.TunedScryptPasswordHasher',
+    'argon2': 'submissions.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'submissions.hashers.TunedPBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Processes used to hash passwords for bulk account creation; None uses every core.
+PASSWORD_HASH_WORKERS = None
+
+# Addresses or networks of the reverse proxies in front of the portal (for
+# example the nginx server SUBMISSION_FILE_SERVER hands files to). Requests
+# arriving through them are attributed to the client named in
+# X-Forwarded-For; without them every request appears to come from the proxy.
+TRUSTED_PROXIES = [proxy.strip() for proxy in os.environ.get('TRUSTED_PROXIES', '').split(',') if proxy.strip()]
+
+# Failed logins allowed per username and per client IP within WINDOW seconds
+# before further attempts are refused without checking the password. Counted
+# in the LoginCounter table; run purge_login_counters periodically to drop
+# expired rows. Raise LOGIN_THROTTLE_IP_LIMIT where many students share one
+# NAT address. Refused attempts are logged, and counted for the
+# /staff/logins/ report in a THROTTLED_SAMPLE_RATE share.
+LOGIN_THROTTLE = {
+    'USERNAME_LIMIT': 5,
+    'IP_LIMIT': int(os.environ.get('LOGIN_THROTTLE_IP_LIMIT', 50)),
+    'WINDOW': 15 * 60,
+    'THROTTLED_SAMPLE_RATE': 0.01,
+}
+
+# Rows per transaction in `manage.py import_roster` and the admin roster import.
+ROSTER_IMPORT_CHUNK_SIZE = 1000
+
+# Latency and query-count baseline that `manage.py benchmark_views` compares
+# against; refresh it with --save-baseline on the reference machine.
+BENCHMARK_BASELINE = os.environ.get('BENCHMARK_BASELINE', BASE_DIR / 'benchmarks' / 'baseline.json')
+
+# REST API (/api/v1/)
+# Session authentication only: HTTP Basic would run the password hasher on
+# every request. The browsable renderer is for development.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    ],
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -146,6 +322,33 @@ STATIC_URL = "static/"
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are staged here and pushed to SUBMISSION_STORE by `manage.py run_upload_worker`.
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR', BASE_DIR / 'spool')
+UPLOAD_MAX_ATTEMPTS = 5
+UPLOAD_RETRY_BACKOFF = 10  # seconds, doubled after every failed attempt
+UPLOAD_STALE_AFTER = 15 * 60  # seconds before a running job is assumed lost
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # bytes per resumable-upload chunk
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # seconds an unfinished resumable upload is kept
+
+# Near-duplicate detection (submissions.similarity). Submission text is cut
+# into SHINGLE_SIZE-word shingles and summarised by NUM_PERM MinHash values
+# in BANDS LSH bands; only pairs sharing a band are compared, which finds
+# most pairs above about (1 / BANDS) ** (BANDS / NUM_PERM) similarity.
+# Pairs at or above THRESHOLD are reported to lecturers. Fingerprints are
+# computed by `manage.py run_similarity_indexer` on WORKERS processes (None
+# uses every core); files over MAX_FILE_BYTES are skipped. Changing
+# SHINGLE_SIZE, NUM_PERM or BANDS needs `run_similarity_indexer --rebuild`.
+SIMILARITY = {
+    'SHINGLE_SIZE': 5,
+    'NUM_PERM': 128,
+    'BANDS': 32,
+    'THRESHOLD': 0.5,
+    'MAX_FILE_BYTES': 20 * 1024 * 1024,
+    'WORKERS': None,
+    'MAX_ATTEMPTS': 5,  # reads of a file that keeps failing before it is reported unreadable
+    'RETRY_BACKOFF': 60,  # seconds, doubled after every failed read
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -168,6 +371,40 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For developm
 DEFAULT_FROM_EMAIL = 'noreply@edumanage.edu'
 SERVER_EMAIL = 'server@edumanage.edu'
 
+# Deadline reminders (`manage.py send_deadline_reminders`, run from cron or with --loop)
+DEADLINE_REMINDER_WINDOWS = [72, 24, 2]  # hours before a course deadline
+REMINDER_BATCH_SIZE = 500  # messages per send_mass_mail call
+REMINDER_RATE_LIMIT = 10  # messages per second; 0 disables throttling
+
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+    },
+    'loggers': {
+        'submissions': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Request profiling (submissions.middleware.RequestProfilingMiddleware).
+# SAMPLE_RATE is the share of requests measured; 0 unloads the middleware,
+# 0.01 is cheap enough for production. Per-view averages are served at
+# /staff/profiling/ and every sampled request is logged by
+# 'submissions.profiling'. A statement run DUPLICATE_QUERY_THRESHOLD times in
+# one request is reported as a likely N+1. Samples are kept in the database;
+# run purge_profile_samples periodically to drop those older than RETENTION
+# seconds.
+REQUEST_PROFILING = {
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', 0)),
+    'DUPLICATE_QUERY_THRESHOLD': 3,
+    'RETENTION': 7 * 24 * 60 * 60,
+}
+
 # Site information (for password reset emails)
 SITE_NAME = "EduManage Pro"
 DOMAIN = "localhost:8000"  # Change this to your domain in production
\ No newline at end of file
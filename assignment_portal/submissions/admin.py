@@ -1,11 +1,88 @@
-from django.contrib import admin
+import io
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import AdminFileWidget
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.template.response import TemplateResponse
+from django.urls import path
 from .models import (
     UserProfile, StudentProfile, LecturerProfile, 
-    Faculty, Department, Level, Course, Assignment
+    Faculty, Department, Level, Course, Assignment, UploadJob
 )
 from django.utils.translation import gettext_lazy as _
 
+from .roles import is_lecturer
+from .storage import SubmissionFileField
+from .uploads import enqueue_upload, spool_file
+from . import rosters
+
+
+class RosterImportForm(forms.Form):
+    roster = forms.FileField(label='CSV file')
+
+
+class RosterImportMixin:
+    """Adds an "Import CSV" page to the changelist, backed by submissions.rosters."""
+    change_list_template = 'admin/submissions/roster_change_list.html'
+    roster_importer = None
+    roster_columns = ()
+    roster_optional_columns = ()
+    
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_roster_view),
+                name=f'{opts.app_label}_{opts.model_name}_import',
+            ),
+        ] + super().get_urls()
+    
+    def changelist_view(self, request, extra_context=None):
+        opts = self.model._meta
+        extra_context = {
+            'roster_import_url': f'admin:{opts.app_label}_{opts.model_name}_import',
+            **(extra_context or {}),
+        }
+        return super().changelist_view(request, extra_context)
+    
+    def import_roster_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        
+        opts = self.model._meta
+        result = None
+        form = RosterImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            csv_file = io.TextIOWrapper(form.cleaned_data['roster'].file, encoding='utf-8-sig', newline='')
+            try:
+                result = self.roster_importer(csv_file)
+            except ValidationError as exc:
+                form.add_error('roster', exc.messages[0])
+            except UnicodeDecodeError:
+                form.add_error('roster', 'The file is not UTF-8 encoded.')
+            else:
+                level = messages.WARNING if result.errors else messages.SUCCESS
+                self.message_user(
+                    request,
+                    f'Imported {result.created} {opts.verbose_name_plural}; {len(result.errors)} row(s) rejected.',
+                    level,
+                )
+        
+        return TemplateResponse(request, 'admin/submissions/roster_import.html', {
+            **self.admin_site.each_context(request),
+            'opts': opts,
+            'title': f'Import {opts.verbose_name_plural}',
+            'changelist_url': f'admin:{opts.app_label}_{opts.model_name}_changelist',
+            'form': form,
+            'result': result,
+            'required_columns': self.roster_columns,
+            'optional_columns': self.roster_optional_columns,
+        })
+
 
 class StudentProfileInline(admin.StackedInline):
     model = StudentProfile
@@ -73,29 +150,30 @@ class LevelAdmin(admin.ModelAdmin):
 
 
 @admin.register(StudentProfile)
-class StudentProfileAdmin(admin.ModelAdmin):
+class StudentProfileAdmin(RosterImportMixin, admin.ModelAdmin):
     list_display = ('matric_number', 'user', 'faculty', 'department', 'level', 'admission_year')
     list_filter = ('faculty', 'department', 'level')
     search_fields = ('matric_number', 'user__full_name', 'user__email')
     autocomplete_fields = ['user', 'faculty', 'department', 'level']
+    roster_importer = staticmethod(rosters.import_students)
+    roster_columns = rosters.STUDENT_COLUMNS
+    roster_optional_columns = rosters.STUDENT_OPTIONAL_COLUMNS
 
 
-# Custom Admin Site for Each Lecturer
+# Admin site shared by all lecturers; querysets are scoped per request
 class LecturerAdminSite(admin.AdminSite):
-    def __init__(self, lecturer_profile, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.lecturer_profile = lecturer_profile
-        self.name = f'lecturer_{lecturer_profile.staff_id}'
+    site_header = 'Lecturer Administration'
+    site_title = 'Lecturer Admin'
+    index_title = 'My courses and submissions'
     
     def has_permission(self, request):
         """
-        Only allow access if the user is the lecturer
+        Only allow access to active staff users with a lecturer profile
         """
         return (
             request.user.is_active and
             request.user.is_staff and
-            hasattr(request.user, 'lecturer_profile') and
-            request.user.lecturer_profile.id == self.lecturer_profile.id
+            is_lecturer(request.user)
         )
 
 
@@ -108,28 +186,23 @@ class LecturerProfileAdmin(admin.ModelAdmin):
     
     def save_model(self, request, obj, form, change):
         """
-        Create custom admin site for lecturer when profile is created/updated
+        Make new lecturers staff so they can sign in to the lecturer admin site
         """
         super().save_model(request, obj, form, change)
         if not change:  # New lecturer
-            # Make user a staff member
             obj.user.is_staff = True
-            obj.user.save()
-            
-            # Create their custom admin site
-            lecturer_site = LecturerAdminSite(obj, name=f'lecturer_{obj.staff_id}')
-            # Register models they can access
-            lecturer_site.register(Course, CourseAdmin)
-            lecturer_site.register(Assignment, AssignmentAdmin)
-            # Store the site instance (you might want to store this in cache or a dedicated model)
+            obj.user.save(update_fields=['is_staff'])
 
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(RosterImportMixin, admin.ModelAdmin):
     list_display = ('code', 'title', 'department', 'level', 'lecturer', 'credit_units', 'is_active')
     list_filter = ('department', 'level', 'is_active')
     search_fields = ('code', 'title')
     autocomplete_fields = ['department', 'level', 'lecturer']
+    roster_importer = staticmethod(rosters.import_courses)
+    roster_columns = rosters.COURSE_COLUMNS
+    roster_optional_columns = rosters.COURSE_OPTIONAL_COLUMNS
 
 
 @admin.register(Assignment)
@@ -137,37 +210,87 @@ class AssignmentAdmin(admin.ModelAdmin):
     list_display = ('title', 'student', 'course', 'status', 'grade', 'date_uploaded')
     list_filter = ('status', 'course', 'date_uploaded')
     search_fields = ('title', 'student__matric_number', 'course__code')
-    readonly_fields = ('date_uploaded', 'submission_date')
+    readonly_fields = ('date_uploaded', 'submission_date', 'upload_status')
     autocomplete_fields = ['course', 'student', 'graded_by']
+    formfield_overrides = {SubmissionFileField: {'widget': AdminFileWidget}}
+    
+    def save_model(self, request, obj, form, change):
+        """
+        Stage uploaded files and queue them for run_upload_worker, the same
+        way the student upload view does
+        """
+        uploaded_file = form.cleaned_data.get('file')
+        if isinstance(uploaded_file, UploadedFile):
+            enqueue_upload(obj, spool_file(uploaded_file), uploaded_file.name)
+        else:
+            super().save_model(request, obj, form, change)
 
 
-# Base admin classes for lecturer-specific views
-class CourseAdmin(admin.ModelAdmin):
+@admin.register(UploadJob)
+class UploadJobAdmin(admin.ModelAdmin):
+    list_display = ('original_name', 'assignment', 'state', 'attempts', 'queued_at', 'finished_at')
+    list_filter = ('state',)
+    readonly_fields = ('queued_at', 'started_at', 'finished_at', 'last_error')
+    raw_id_fields = ['assignment']
+
+
+# Admin classes for the lecturer site, scoped to the signed-in lecturer
+class LecturerCourseAdmin(admin.ModelAdmin):
+    list_display = ('code', 'title', 'department', 'level', 'credit_units', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('code', 'title')
+    fields = (
+        'code', 'title', 'description', 'department', 'level', 'lecturer',
+        'credit_units', 'deadline', 'is_active',
+    )
+    # Who teaches a course, and where it sits, is set by the main admin.
+    readonly_fields = ('code', 'department', 'level', 'lecturer')
+    
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        if hasattr(request.user, 'lecturer_profile'):
-            return qs.filter(lecturer=request.user.lecturer_profile)
-        return qs
+        qs = super().get_queryset(request).select_related('department', 'level')
+        return qs.filter(lecturer=request.user.lecturer_profile)
     
     def has_module_permission(self, request):
-        return hasattr(request.user, 'lecturer_profile')
+        return is_lecturer(request.user)
+    
+    def has_view_permission(self, request, obj=None):
+        return is_lecturer(request.user)
+    
+    def has_change_permission(self, request, obj=None):
+        return is_lecturer(request.user)
 
 
-class AssignmentAdmin(admin.ModelAdmin):
+class LecturerAssignmentAdmin(admin.ModelAdmin):
     list_display = ('title', 'student', 'course', 'status', 'grade', 'date_uploaded')
-    list_filter = ('status', 'course')
-    readonly_fields = ('date_uploaded', 'submission_date', 'student', 'course')
+    # Only the courses that have submissions in the lecturer's queryset.
+    list_filter = ('status', ('course', admin.RelatedOnlyFieldListFilter))
+    # Lecturers grade submissions; they never replace the student's file.
+    readonly_fields = ('date_uploaded', 'submission_date', 'student', 'course', 'file', 'upload_status')
     
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        if hasattr(request.user, 'lecturer_profile'):
-            return qs.filter(course__lecturer=request.user.lecturer_profile)
-        return qs
+        qs = super().get_queryset(request).select_related('student__user', 'course')
+        return qs.filter(course__lecturer=request.user.lecturer_profile)
+    
+    def get_field_queryset(self, db, db_field, request):
+        if db_field.name == 'graded_by':
+            return LecturerProfile.objects.filter(pk=request.user.lecturer_profile.pk)
+        return super().get_field_queryset(db, db_field, request)
     
     def has_module_permission(self, request):
-        return hasattr(request.user, 'lecturer_profile')
+        return is_lecturer(request.user)
+    
+    def has_view_permission(self, request, obj=None):
+        return is_lecturer(request.user)
+    
+    def has_change_permission(self, request, obj=None):
+        return is_lecturer(request.user)
     
     def save_model(self, request, obj, form, change):
-        if not obj.graded_by and hasattr(request.user, 'lecturer_profile'):
+        if not obj.graded_by:
             obj.graded_by = request.user.lecturer_profile
         super().save_model(request, obj, form, change)
+
+
+lecturer_admin_site = LecturerAdminSite(name='lecturer_admin')
+lecturer_admin_site.register(Course, LecturerCourseAdmin)
+lecturer_admin_site.register(Assignment, LecturerAssignmentAdmin)
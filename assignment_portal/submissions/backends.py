@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .throttling import is_locked_out
+
+
+UserModel = get_user_model()
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's student and lecturer profiles in the
+    same query, so role checks never trigger a reverse one-to-one lookup.
+    
+    Attempts from a locked-out username or IP (see submissions.throttling)
+    are refused before the user is looked up or a password is hashed.
+    """
+    
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if request is not None and is_locked_out(request, username):
+            request.login_throttled = True
+            # Stops authenticate() from trying any other backend.
+            raise PermissionDenied
+        return super().authenticate(request, username, password, **kwargs)
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related(
+                'student_profile', 'lecturer_profile'
+            ).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,153 @@
+import json
+import logging
+import time
+from collections import namedtuple
+from tempfile import TemporaryDirectory
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from .models import Assignment
+
+
+# ``data`` is form data, or a dict/list sent as JSON when ``json`` is set.
+# ``files`` maps form fields to ``(name, content)`` uploads sent with the
+# form data; ``status`` is the response status every request must return.
+Scenario = namedtuple(
+    'Scenario', ['name', 'user', 'method', 'url', 'data', 'json', 'files', 'status'],
+    defaults=[None, False, None, 200],
+)
+
+BENCHMARK_UPLOAD = ('benchmark.pdf', b'%PDF-1.4\n% Benchmark upload\n%%EOF\n')
+
+
+def default_scenarios():
+    """
+    The student and lecturer pages worth watching, driven as the owner of
+    the oldest assignment and the lecturer of its course.
+    """
+    assignment = (
+        Assignment.objects.filter(course__lecturer__isnull=False)
+        .select_related('student__user', 'course__lecturer__user').order_by('pk').first()
+    )
+    if assignment is None:
+        raise ValidationError('No assignments to benchmark; run seed_data first.')
+    student, course = assignment.student, assignment.course
+    lecturer = course.lecturer
+    to_grade = list(
+        Assignment.objects.filter(course__lecturer=lecturer).order_by('pk').values_list('pk', flat=True)[:25]
+    )
+
+    return [
+        Scenario('student_dashboard', student.user, 'get', reverse('student_dashboard')),
+        Scenario('student_assignments_rows', student.user, 'get', reverse('student_assignments_rows')),
+        Scenario('upload_assignment', student.user, 'post', reverse('upload_assignment'),
+                 {'title': 'Benchmark upload', 'description': '', 'course': course.pk},
+                 files={'file': BENCHMARK_UPLOAD}, status=302),
+        Scenario('api_assignments', student.user, 'get', reverse('api-assignment-list')),
+        Scenario('lecturer_dashboard', lecturer.user, 'get', reverse('lecturer_dashboard')),
+        Scenario('lecturer_assignments_rows', lecturer.user, 'get', reverse('lecturer_assignments_rows')),
+        Scenario('search_assignments_rows', lecturer.user, 'get', reverse('search_assignments_rows'),
+                 {'q': course.code}),
+        Scenario('grade_assignment', lecturer.user, 'post', reverse('grade_assignment', args=[assignment.pk]),
+                 {'grade': 'B', 'score': '65', 'feedback': 'Benchmark', 'status': 'graded'}, status=302),
+        Scenario('bulk_grade_assignments', lecturer.user, 'post', reverse('bulk_grade_assignments'),
+                 {'grades': [{'assignment_id': pk, 'grade': 'B', 'score': 65} for pk in to_grade]}, True),
+        Scenario('api_courses', lecturer.user, 'get', reverse('api-course-list')),
+    ]
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(scenario, iterations=30, warmup=3):
+    """
+    Request ``scenario`` ``warmup + iterations`` times through the test
+    client. Every request runs in a transaction that is rolled back, so
+    uploads and grades leave the data set as it was. Raises ValidationError
+    when a response does not have the scenario's status, so a form that is
+    re-rendered with errors is not timed as if it had been submitted.
+    """
+    client = Client(raise_request_exception=False)
+    client.force_login(scenario.user)
+    if scenario.json:
+        send = lambda: getattr(client, scenario.method)(
+            scenario.url, json.dumps(scenario.data), content_type='application/json'
+        )
+    else:
+        # Uploads are read as they are sent, so each request gets fresh ones.
+        send = lambda: getattr(client, scenario.method)(scenario.url, {
+            **(scenario.data or {}),
+            **{field: SimpleUploadedFile(name, content) for field, (name, content) in (scenario.files or {}).items()},
+        })
+
+    timings, query_counts, statuses = [], [], set()
+    for index in range(warmup + iterations):
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = send()
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        if response.status_code != scenario.status:
+            raise ValidationError(
+                f'{scenario.name}: expected status {scenario.status}, got {response.status_code}.'
+            )
+        if index >= warmup:
+            timings.append(elapsed)
+            query_counts.append(len(queries))
+            statuses.add(response.status_code)
+    client.logout()
+
+    timings.sort()
+    return {
+        'p50_ms': round(_percentile(timings, 0.50) * 1000, 2),
+        'p95_ms': round(_percentile(timings, 0.95) * 1000, 2),
+        'queries': max(query_counts),
+        'status': max(statuses),
+    }
+
+
+def run_benchmarks(scenarios=None, iterations=30, warmup=3):
+    """
+    ``{scenario name: {p50_ms, p95_ms, queries, status}}``. Runs with DEBUG
+    off, as in production. Uploads are spooled to a temporary directory,
+    since their rolled-back jobs will never clean the files up.
+    """
+    scenarios = default_scenarios() if scenarios is None else scenarios
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    request_logger.setLevel(logging.CRITICAL)
+    try:
+        with TemporaryDirectory() as spool, \
+                override_settings(ALLOWED_HOSTS=['testserver'], DEBUG=False, UPLOAD_SPOOL_DIR=spool):
+            return {scenario.name: run_scenario(scenario, iterations, warmup) for scenario in scenarios}
+    finally:
+        request_logger.setLevel(level)
+
+
+def compare_to_baseline(results, baseline, tolerance=0.5):
+    """
+    Regressions of ``results`` against ``baseline``, as readable strings:
+    p50 latency more than ``tolerance`` slower (p95, being noisier, more
+    than twice that), any extra query, or a different status code.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result['status'] != before['status']:
+            regressions.append(f"{name}: status {before['status']} -> {result['status']}")
+        if result['queries'] > before['queries']:
+            regressions.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+        if result['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {before['p50_ms']} ms -> {result['p50_ms']} ms")
+        if result['p95_ms'] > before['p95_ms'] * (1 + 2 * tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} ms -> {result['p95_ms']} ms")
+    return regressions
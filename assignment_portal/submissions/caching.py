@@ -0,0 +1,78 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .checks import cache_is_shared
+from .models import Course
+from .stats import attach_student_counts, student_dashboard_stats
+
+
+# Generations are version stamps baked into cache keys. Bumping one makes
+# every key built from it unreachable, so invalidation never has to know
+# which keys exist. Signal handlers in submissions.signals do the bumping.
+# A bump made by one worker only reaches the others through a shared cache,
+# so under a per-process cache (the locmem default) every lookup below goes
+# to the database instead and template fragments are not cached.
+COURSES = 'courses'
+STUDENTS = 'students'
+
+
+def student_generation(student_id):
+    return f'student:{student_id}'
+
+
+def get_generation(name):
+    return cache.get_or_set(f'generation:{name}', lambda: uuid.uuid4().hex, None)
+
+
+def bump_generation(*names):
+    cache.set_many({f'generation:{name}': uuid.uuid4().hex for name in names}, None)
+
+
+def fragment_cache_timeout():
+    """Timeout for ``{% cache %}`` fragments keyed by a generation; 0 leaves them uncached."""
+    return settings.FRAGMENT_CACHE_TIMEOUT if cache_is_shared() else 0
+
+
+def _cached(key, compute, timeout):
+    if not cache_is_shared():
+        return compute()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+# ---------- Cached Lookups ----------
+def get_current_courses(department_id, level_id):
+    """Active courses for a (department, level) pair, shared by every student in it."""
+    key = f'courses:{department_id}:{level_id}:{get_generation(COURSES)}'
+    return _cached(key, lambda: list(Course.objects.filter(
+        department_id=department_id,
+        level_id=level_id,
+        is_active=True
+    ).select_related('lecturer__user').order_by('code')), settings.COURSE_CACHE_TIMEOUT)
+
+
+def get_student_dashboard_stats(student):
+    """
+    Dashboard statistics for ``student``. Invalidated by the student's own
+    submissions and by course changes; the cohort-wide submission rate may
+    lag by up to STATS_CACHE_TIMEOUT.
+    """
+    key = 'student-stats:{}:{}:{}'.format(
+        student.pk, get_generation(student_generation(student.pk)), get_generation(COURSES)
+    )
+    return _cached(key, lambda: student_dashboard_stats(student), settings.STATS_CACHE_TIMEOUT)
+
+
+def get_lecturer_courses(lecturer):
+    """The lecturer's courses with ``student_count`` attached."""
+    key = 'lecturer-courses:{}:{}:{}'.format(
+        lecturer.pk, get_generation(COURSES), get_generation(STUDENTS)
+    )
+    return _cached(key, lambda: attach_student_counts(
+        Course.objects.filter(lecturer=lecturer).select_related('department', 'level')
+    ), settings.COURSE_CACHE_TIMEOUT)
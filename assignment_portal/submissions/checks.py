@@ -0,0 +1,47 @@
+import ipaddress
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+# Backends whose entries only the process that wrote them can see.
+PER_PROCESS_CACHES = (LocMemCache, DummyCache)
+
+CACHE_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def cache_is_shared(alias=DEFAULT_CACHE_ALIAS):
+    """True when every worker process reads and writes the same entries in cache ``alias``."""
+    return not isinstance(caches[alias], PER_PROCESS_CACHES)
+
+
+@register()
+def check_session_cache(app_configs, **kwargs):
+    # A session flushed by one worker would stay valid in the others' caches.
+    if settings.SESSION_ENGINE in CACHE_SESSION_ENGINES and not cache_is_shared():
+        return [Error(
+            f'SESSION_ENGINE {settings.SESSION_ENGINE!r} needs a cache shared by every worker.',
+            hint="Set CACHE_BACKEND to 'file' or 'db', or SESSION_BACKEND to 'db'.",
+            id='submissions.E001',
+        )]
+    return []
+
+
+@register()
+def check_trusted_proxies(app_configs, **kwargs):
+    errors = []
+    for proxy in settings.TRUSTED_PROXIES:
+        try:
+            ipaddress.ip_network(proxy, strict=False)
+        except ValueError:
+            errors.append(Error(
+                f'TRUSTED_PROXIES entry {proxy!r} is not an IP address or network.',
+                id='submissions.E003',
+            ))
+    return errors
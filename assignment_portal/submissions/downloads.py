@@ -0,0 +1,153 @@
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from django.utils.text import get_valid_filename
+
+from .storage import CONTENT_ADDRESSED_PREFIX, BoundedReader, file_extension, get_blob_store, stored_name
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def download_filename(assignment):
+    """``<matric number>_<title><extension>``, safe to put in Content-Disposition."""
+    base = get_valid_filename(f'{assignment.student.matric_number}_{assignment.title}') or 'submission'
+    return f'{base}{file_extension(assignment.file)}'
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)``, inclusive, of a single-range ``Range: bytes=...``
+    header against a file of ``size`` bytes, or None when the whole file
+    should be sent (no header, several ranges or anything malformed; RFC
+    9110 lets a server ignore those). Raises RangeNotSatisfiable for a
+    range that starts past the end of the file.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the final ``last`` bytes.
+        if int(last) == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _etag(resource, stat=None):
+    name = stored_name(resource)
+    if name.startswith(CONTENT_ADDRESSED_PREFIX):
+        # The name is the SHA-256 of the content.
+        return Path(name).stem
+    if stat is not None:
+        # Local names can be rewritten in place, so use nginx's mtime-size form.
+        return f'{int(stat.st_mtime):x}-{stat.st_size:x}'
+    # Remote names are never reused for different content.
+    return hashlib.sha256(name.encode()).hexdigest()[:32]
+
+
+def serve_stored_file(request, resource, filename, store=None):
+    """
+    Respond with the stored ``resource`` as an attachment named ``filename``.
+    Access must already have been checked.
+
+    Files on this host are handed to the front-end server when
+    SUBMISSION_FILE_SERVER asks for it (X-Accel-Redirect for nginx,
+    X-Sendfile for Apache); otherwise they go out as a FileResponse, which
+    servers with ``wsgi.file_wrapper`` send with sendfile. Files with a
+    public URL (still on Cloudinary) are redirected there. Responses carry
+    a strong ETag, so ``If-None-Match`` gets a 304 without touching the
+    file, and a single ``Range`` gets a 206.
+    """
+    store = store or get_blob_store()
+    try:
+        path = store.local_path(resource)
+        if path is None and (url := store.url(resource)):
+            # The CDN does its own ranges and revalidation.
+            return HttpResponseRedirect(url)
+        stat = path.stat() if path is not None else None
+        size = stat.st_size if stat is not None else store.size(resource)
+    except (FileNotFoundError, ValueError):
+        # Missing, or a stored name pointing outside the store.
+        raise Http404('Submission file not found.')
+    etag = quote_etag(_etag(resource, stat))
+    last_modified = int(stat.st_mtime) if stat is not None else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, store, resource, path, size, etag, filename)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _file_response(request, store, resource, path, size, etag, filename):
+    if path is not None and (response := _front_end_response(path, filename)):
+        return response
+
+    byte_range = None
+    if request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        body = open(path, 'rb') if path is not None else store.open(resource)
+        response = FileResponse(body, as_attachment=True, filename=filename)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        if path is None:
+            body = store.open_range(resource, start, end)
+        else:
+            body = open(path, 'rb')
+            body.seek(start)
+            if end < size - 1:
+                body = BoundedReader(body, end - start + 1)
+        response = FileResponse(body, status=206, as_attachment=True, filename=filename)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _front_end_response(path, filename):
+    """An empty response that has nginx or Apache send ``path``, or None to send it ourselves."""
+    server = settings.SUBMISSION_FILE_SERVER
+    if server == 'nginx':
+        try:
+            relative = path.relative_to(Path(settings.SUBMISSION_BLOB_ROOT).resolve())
+        except ValueError:
+            # Only the blob root is exposed as an internal location.
+            return None
+        header, value = 'X-Accel-Redirect', settings.SUBMISSION_ACCEL_REDIRECT_PREFIX + relative.as_posix()
+    elif server == 'apache':
+        header, value = 'X-Sendfile', str(path)
+    else:
+        return None
+
+    response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response[header] = value
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
@@ -0,0 +1,234 @@
+import csv
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import Assignment
+from .storage import file_extension
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+GRADEBOOK_HEADER = [
+    'Matric Number', 'Full Name', 'Assignment', 'Submitted', 'Status',
+    'Grade', 'Score', 'Feedback', 'Graded On',
+]
+
+_CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Characters that are not allowed anywhere in an XML 1.0 document.
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class StreamBuffer:
+    """
+    Write-only file object that hands back whatever was written since the
+    last ``drain()``. Lets csv/zipfile writers feed a streaming response
+    without building the whole file in memory or on disk.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data) if not isinstance(data, str) else data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        if chunks and isinstance(chunks[0], str):
+            return ''.join(chunks)
+        return b''.join(chunks)
+
+
+# ---------- Gradebook ----------
+def gradebook_rows(course):
+    """
+    Yield one row per submission for ``course``, joined to the student's
+    matric number and name. Rows are read from the database in chunks so
+    memory use does not depend on the size of the course.
+    """
+    submissions = Assignment.objects.filter(course=course).order_by(
+        'student__matric_number', 'date_uploaded', 'id'
+    ).values_list(
+        'student__matric_number', 'student__user__full_name', 'title',
+        'date_uploaded', 'status', 'grade', 'score', 'feedback', 'graded_date',
+    )
+    for row in submissions.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield row
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    # Spreadsheets run text starting with these as a formula; the quote
+    # makes them show it as typed.
+    if isinstance(value, str) and value.startswith(_CSV_FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def stream_csv(header, rows):
+    buffer = StreamBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.drain()
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        yield buffer.drain()
+
+
+# ---------- XLSX ----------
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_XLSX_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c t="n"><v>{value}</v></c>'
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat(sep=' ', timespec='seconds')
+    text = escape(_ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(header, rows, sheet_name='Sheet1', flush_every=500):
+    """
+    Stream a single-sheet XLSX workbook. The archive is written to a
+    non-seekable buffer, so zipfile emits data descriptors and each chunk
+    can be sent as soon as it is compressed.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        workbook.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        workbook.writestr('xl/workbook.xml', _XLSX_WORKBOOK.format(sheet_name=escape(sheet_name)))
+        workbook.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+        yield buffer.drain()
+
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_XLSX_SHEET_HEAD + _xlsx_row(header)).encode())
+            for count, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode())
+                if count % flush_every == 0:
+                    yield buffer.drain()
+            sheet.write(_XLSX_SHEET_TAIL.encode())
+    yield buffer.drain()
+
+
+# ---------- Submission Archives ----------
+def _fetch(store, resource):
+    with store.open(resource) as source:
+        return source.read()
+
+
+def _archive_name(matric_number, title, extension, used_names):
+    base = get_valid_filename(f'{matric_number}_{title}') or 'submission'
+    name = f'{base}{extension}'
+    counter = 1
+    while name in used_names:
+        counter += 1
+        name = f'{base}_{counter}{extension}'
+    used_names.add(name)
+    return name
+
+
+def stream_submissions_zip(assignments, store, workers=4):
+    """
+    Stream a ZIP of the files attached to ``assignments``.
+
+    Files are fetched from ``store`` on a bounded thread pool, at most
+    ``2 * workers`` at a time, and written to the archive in queryset order
+    as they arrive. Nothing is written to disk. Files that cannot be fetched
+    are listed in ``MISSING.txt`` at the end of the archive.
+    """
+    submissions = assignments.exclude(file__isnull=True).exclude(file='').order_by(
+        'student__matric_number', 'date_uploaded', 'id'
+    ).values_list('student__matric_number', 'title', 'file').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    buffer = StreamBuffer()
+    used_names = set()
+    missing = []
+    date_time = timezone.localtime().timetuple()[:6]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, \
+            zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        pending = deque()
+
+        def write_next():
+            matric_number, title, resource, future = pending.popleft()
+            name = _archive_name(matric_number, title, file_extension(resource), used_names)
+            try:
+                data = future.result()
+            except Exception as exc:
+                missing.append(f'{name}: {exc}')
+                return
+            # Most submissions (PDF, DOCX, ZIP) are already compressed.
+            archive.writestr(zipfile.ZipInfo(name, date_time), data)
+
+        for matric_number, title, resource in submissions:
+            pending.append((matric_number, title, resource, pool.submit(_fetch, store, resource)))
+            if len(pending) >= workers * 2:
+                write_next()
+                yield buffer.drain()
+
+        while pending:
+            write_next()
+            yield buffer.drain()
+
+        if missing:
+            archive.writestr(zipfile.ZipInfo('MISSING.txt', date_time), '\n'.join(missing) + '\n')
+    yield buffer.drain()
@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import bump_generation, student_generation
+from .forms import GradeAssignmentForm
+from .models import Assignment
+from .search import index_assignments
+from .summaries import record_assignment_changes
+
+
+GRADED_FIELDS = ['grade', 'score', 'feedback', 'status', 'graded_by', 'graded_date']
+
+
+def bulk_grade(lecturer, rows, batch_size=500):
+    """
+    Grade many assignments at once.
+
+    ``rows`` is an iterable of dicts with ``assignment_id`` and the
+    ``GradeAssignmentForm`` fields. Ownership is checked for the whole batch
+    in one query and valid rows are written with a single ``bulk_update``.
+    Invalid rows are reported and skipped; they never abort the batch.
+
+    Returns ``(graded_ids, errors)`` where ``errors`` maps the row index to
+    a dict of field errors.
+    """
+    rows = list(rows)
+    errors = {}
+
+    requested_ids = {}
+    seen_ids = set()
+    for index, row in enumerate(rows):
+        try:
+            assignment_id = int(row.get('assignment_id'))
+        except (TypeError, ValueError):
+            errors[index] = {'assignment_id': ['A valid assignment id is required.']}
+            continue
+        if assignment_id in seen_ids:
+            errors[index] = {'assignment_id': ['Assignment appears more than once in this batch.']}
+            continue
+        seen_ids.add(assignment_id)
+        requested_ids[index] = assignment_id
+
+    owned = Assignment.objects.filter(course__lecturer=lecturer).in_bulk(seen_ids)
+
+    graded_date = timezone.now()
+    to_update = []
+    for index, assignment_id in requested_ids.items():
+        assignment = owned.get(assignment_id)
+        if assignment is None:
+            errors[index] = {'assignment_id': ['Assignment not found.']}
+            continue
+
+        row = dict(rows[index])
+        row.setdefault('status', 'graded')
+        form = GradeAssignmentForm(row, instance=assignment)
+        if not form.is_valid():
+            errors[index] = {field: list(messages) for field, messages in form.errors.items()}
+            continue
+        if not form.cleaned_data.get('grade'):
+            errors[index] = {'grade': ['Please enter a grade.']}
+            continue
+
+        assignment = form.save(commit=False)
+        assignment.grade = assignment.grade.upper()
+        assignment.graded_by = lecturer
+        assignment.graded_date = graded_date
+        to_update.append(assignment)
+
+    with transaction.atomic():
+        Assignment.objects.bulk_update(to_update, GRADED_FIELDS, batch_size=batch_size)
+        # bulk_update bypasses Assignment.save, so fold the grades into the
+        # summary tables and the search index in the same transaction.
+        changes = []
+        for assignment in to_update:
+            current = assignment.summary_state()
+            changes.append((assignment._summary_state, current))
+            assignment._summary_state = current
+        record_assignment_changes(changes)
+        index_assignments([assignment.pk for assignment in to_update])
+    # bulk_update sends no post_save either, so invalidate the dashboards here.
+    if to_update:
+        bump_generation(*{student_generation(assignment.student_id) for assignment in to_update})
+
+    return [assignment.pk for assignment in to_update], errors
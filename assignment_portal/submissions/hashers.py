@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+)
+
+
+# Cost parameters come from settings.PASSWORD_HASHER_COST and are read on
+# every call, so changing them only needs a restart. Hashes made with other
+# parameters (or by a hasher further down PASSWORD_HASHERS) still verify and
+# are re-encoded with the current ones on the user's next login.
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id; needs the argon2-cffi package."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_HASHER_COST['argon2']['time_cost']
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_HASHER_COST['argon2']['memory_cost']
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHER_COST['argon2']['parallelism']
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_HASHER_COST['scrypt']['work_factor']
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_HASHER_COST['scrypt']['block_size']
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHER_COST['scrypt']['parallelism']
+
+    @property
+    def maxmem(self):
+        # scrypt needs about 128 * N * r bytes; OpenSSL refuses anything over
+        # 32 MiB unless told otherwise.
+        return 2 * 128 * self.work_factor * self.block_size * self.parallelism
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHER_COST['pbkdf2']['iterations']
+
+
+# settings.PASSWORD_HASHER name -> hasher class
+TUNED_HASHERS = {
+    'argon2': TunedArgon2PasswordHasher,
+    'scrypt': TunedScryptPasswordHasher,
+    'pbkdf2': TunedPBKDF2PasswordHasher,
+}
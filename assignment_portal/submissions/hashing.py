@@ -0,0 +1,47 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+
+def setup_worker():
+    # Spawned workers start without Django (DJANGO_SETTINGS_MODULE is
+    # inherited from the parent's environment); for forked ones this is a no-op.
+    import django
+
+    django.setup()
+
+
+def _hash(password):
+    return make_password(password)
+
+
+def hash_workers():
+    return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hash ``passwords`` with the active hasher, in order. Batches are spread
+    over a process pool so hashing uses every core instead of one; None
+    entries become unusable passwords without going to the pool.
+    """
+    passwords = list(passwords)
+    to_hash = [index for index, password in enumerate(passwords) if password is not None]
+    hashed = [make_password(None) if password is None else None for password in passwords]
+
+    workers = workers or hash_workers()
+    if workers <= 1 or len(to_hash) < 2:
+        results = map(_hash, (passwords[index] for index in to_hash))
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(to_hash)), initializer=setup_worker)
+        with pool:
+            results = list(pool.map(
+                _hash, (passwords[index] for index in to_hash),
+                chunksize=max(1, len(to_hash) // (workers * 4)),
+            ))
+
+    for index, value in zip(to_hash, results):
+        hashed[index] = value
+    return hashed
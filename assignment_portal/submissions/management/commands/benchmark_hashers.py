@@ -0,0 +1,76 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from submissions.hashers import TUNED_HASHERS
+from submissions.hashing import hash_passwords, hash_workers
+
+
+class Command(BaseCommand):
+    help = 'Measure password hashes per second per core for each hasher and cost setting'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hasher', action='append', dest='hashers', metavar='NAME',
+                            help='Hasher to measure (argon2, scrypt, pbkdf2); repeatable. Defaults to all.')
+        parser.add_argument('--cost', action='append', default=[], metavar='NAME:PARAM=VALUE',
+                            help='Extra setting to measure, e.g. scrypt:work_factor=32768; repeatable.')
+        parser.add_argument('--seconds', type=float, default=2.0,
+                            help='Time spent on each single-core measurement.')
+        parser.add_argument('--processes', type=int, default=hash_workers(),
+                            help='Pool size for the multi-core measurement; 1 skips it.')
+
+    def handle(self, *args, **options):
+        names = options['hashers'] or list(TUNED_HASHERS)
+        unknown = set(names) - set(TUNED_HASHERS)
+        if unknown:
+            raise CommandError(f"Unknown hasher(s): {', '.join(sorted(unknown))}")
+
+        candidates = [(name, {}) for name in names]
+        for spec in options['cost']:
+            try:
+                name, assignment = spec.split(':', 1)
+                param, value = assignment.split('=', 1)
+                candidates.append((name, {param: int(value)}))
+            except ValueError:
+                raise CommandError(f"--cost expects NAME:PARAM=VALUE, got '{spec}'.")
+            if name not in settings.PASSWORD_HASHER_COST or param not in settings.PASSWORD_HASHER_COST[name]:
+                raise CommandError(f"Unknown cost parameter '{spec}'.")
+
+        processes = options['processes']
+        self.stdout.write(f"{'hasher':<8} {'parameters':<46} {'ms/hash':>9} {'hashes/s/core':>14} "
+                          f"{f'pool x{processes} hashes/s':>20}")
+        for name, overrides in candidates:
+            cost = copy.deepcopy(settings.PASSWORD_HASHER_COST)
+            cost[name].update(overrides)
+            hasher = TUNED_HASHERS[name]
+            # Overridden settings reach the pool because its workers are forked.
+            with override_settings(PASSWORD_HASHER_COST=cost,
+                                   PASSWORD_HASHERS=[f'{hasher.__module__}.{hasher.__qualname__}']):
+                self.measure(name, cost[name], options['seconds'], processes)
+
+    def measure(self, name, params, seconds, processes):
+        label = ' '.join(f'{key}={value}' for key, value in params.items())
+        hasher = TUNED_HASHERS[name]()
+        try:
+            hasher.encode('benchmark', hasher.salt())
+        except ValueError as exc:
+            self.stdout.write(f'{name:<8} {label:<46} skipped: {exc}')
+            return
+
+        count, started = 0, time.perf_counter()
+        while count < 3 or time.perf_counter() - started < seconds:
+            hasher.encode('benchmark', hasher.salt())
+            count += 1
+        per_hash = (time.perf_counter() - started) / count
+
+        pool_rate = '-'
+        if processes > 1:
+            batch = max(processes * 2, int(processes * seconds / per_hash))
+            started = time.perf_counter()
+            hash_passwords(['benchmark'] * batch, workers=processes)
+            pool_rate = f'{batch / (time.perf_counter() - started):.1f}'
+
+        self.stdout.write(f'{name:<8} {label:<46} {per_hash * 1000:>9.1f} {1 / per_hash:>14.1f} {pool_rate:>20}')
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from submissions.sessions import measure_session_overhead
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request session overhead across the SESSION_ENGINES modes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engine', action='append', dest='engines', metavar='NAME',
+                            help=f"Mode to measure ({', '.join(settings.SESSION_ENGINES)}); repeatable. "
+                                 f"Defaults to all.")
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests per measurement.')
+        parser.add_argument('--write-every', type=int, default=10,
+                            help='Modify the session on every Nth request in the mixed measurement.')
+
+    def handle(self, *args, **options):
+        names = options['engines'] or list(settings.SESSION_ENGINES)
+        unknown = set(names) - set(settings.SESSION_ENGINES)
+        if unknown:
+            raise CommandError(f"Unknown session mode(s): {', '.join(sorted(unknown))}")
+
+        self.stdout.write(f"{'mode':<15} {'traffic':<10} {'mean us':>9} {'p95 us':>9} "
+                          f"{'queries/req':>12} {'cookie bytes':>13}")
+        for name in names:
+            for traffic, write_every in (('read', 0), ('mixed', options['write_every'])):
+                result = measure_session_overhead(
+                    settings.SESSION_ENGINES[name], requests=options['requests'], write_every=write_every,
+                )
+                self.stdout.write(
+                    f"{name:<15} {traffic:<10} {result['mean_us']:>9.1f} {result['p95_us']:>9.1f} "
+                    f"{result['queries']:>12.2f} {result['cookie_bytes']:>13}"
+                )
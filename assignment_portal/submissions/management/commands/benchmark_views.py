@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from submissions.benchmarks import compare_to_baseline, default_scenarios, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Drive the main portal views and report p50/p95 latency and query counts against a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', metavar='NAME',
+                            help='Scenario to run; repeatable. Defaults to all.')
+        parser.add_argument('--iterations', type=int, default=30, help='Measured requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per scenario.')
+        parser.add_argument('--baseline', default=settings.BENCHMARK_BASELINE,
+                            help='Baseline JSON file. Defaults to BENCHMARK_BASELINE.')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write the results to the baseline file instead of comparing.')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed p50 slowdown before failing, as a fraction; p95 may slow down twice as much.')
+
+    def handle(self, *args, **options):
+        try:
+            scenarios = default_scenarios()
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+        if options['scenarios']:
+            unknown = set(options['scenarios']) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['scenarios']]
+
+        try:
+            results = run_benchmarks(scenarios, options['iterations'], options['warmup'])
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+        baseline_path = Path(options['baseline'])
+        baseline = {}
+        if not options['save_baseline'] and baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text())
+
+        self.stdout.write(f"{'scenario':<28} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} "
+                          f"{'base p95':>9} {'base q':>7}")
+        for name, result in results.items():
+            before = baseline.get(name, {})
+            self.stdout.write(
+                f"{name:<28} {result['status']:>6} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['queries']:>8} {before.get('p95_ms', '-'):>9} {before.get('queries', '-'):>7}"
+            )
+
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+            if options['verbosity'] >= 1:
+                self.stdout.write(self.style.SUCCESS(f'Saved baseline to {baseline_path}.'))
+            return
+
+        regressions = compare_to_baseline(results, baseline, options['tolerance'])
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) against {baseline_path}.')
+        if options['verbosity'] >= 1 and baseline:
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,124 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from submissions.models import Assignment, Course, LecturerProfile, StudentProfile
+from submissions.stats import (
+    attach_student_counts, lecturer_submission_totals, student_dashboard_stats
+)
+
+
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(?P<table>\w+)(?P<rest>.*)$')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (?P<table>\w+)')
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the queries issued by the portal's hot views and fail on full table scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--allow-scan', action='append', default=[], metavar='TABLE',
+            help='Table that may be scanned in full (repeatable), e.g. small lookup tables.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'EXPLAIN parsing is not supported for {connection.vendor}.')
+
+        allowed = set(options['allow_scan'])
+        failures = []
+
+        for view_name, scenario in self.get_scenarios():
+            for sql, params in self.capture_queries(scenario):
+                plan = self.explain(sql, params)
+                scans = [table for table in self.full_scans(plan) if table not in allowed]
+
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f'{view_name}: {sql}')
+                    for line in plan:
+                        self.stdout.write(f'    {line}')
+
+                if scans:
+                    failures.append((view_name, sql, scans))
+                    self.stdout.write(self.style.ERROR(
+                        f"{view_name}: full scan of {', '.join(scans)}"
+                    ))
+                elif options['verbosity'] >= 1:
+                    self.stdout.write(self.style.SUCCESS(f'{view_name}: ok'))
+
+        if failures:
+            raise CommandError(f'{len(failures)} quer{"y" if len(failures) == 1 else "ies"} fell back to a full table scan.')
+
+    def get_scenarios(self):
+        """
+        Representative calls for each hot view. Placeholder ids are used so
+        the command can run against an empty database.
+        """
+        student = StudentProfile(pk=0, department_id=0, level_id=0)
+        lecturer = LecturerProfile(pk=0)
+        now = timezone.now()
+
+        lecturer_assignments = Assignment.objects.filter(course__lecturer=lecturer)
+
+        return [
+            ('student_dashboard', lambda: student_dashboard_stats(student)),
+            ('student_dashboard', lambda: list(Course.objects.filter(
+                department_id=student.department_id,
+                level_id=student.level_id,
+                is_active=True,
+            ).select_related('lecturer__user'))),
+            ('student_dashboard', lambda: list(
+                Assignment.objects.filter(student=student).select_related('course')[:5]
+            )),
+            ('student_assignments', lambda: list(
+                Assignment.objects.filter(student=student).order_by('-date_uploaded')
+            )),
+            ('lecturer_dashboard', lambda: attach_student_counts(
+                Course.objects.filter(lecturer=lecturer).select_related('department', 'level')
+            )),
+            ('lecturer_dashboard', lambda: lecturer_submission_totals(lecturer)),
+            ('lecturer_dashboard', lambda: list(lecturer_assignments.filter(
+                deadline__isnull=False,
+                deadline__gte=now,
+                deadline__lte=now + timedelta(days=7),
+            ).order_by('deadline')[:5])),
+            ('lecturer_assignments', lambda: list(
+                lecturer_assignments.select_related('student', 'course').order_by('-date_uploaded')
+            )),
+            ('lecturer_assignments', lambda: list(
+                lecturer_assignments.filter(status='pending').order_by('-date_uploaded')
+            )),
+        ]
+
+    def capture_queries(self, scenario):
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            scenario()
+        return queries
+
+    def explain(self, sql, params):
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+    def full_scans(self, plan):
+        tables = []
+        for line in plan:
+            if connection.vendor == 'sqlite':
+                match = SQLITE_SCAN.search(line)
+                if match and 'USING' not in match.group('rest'):
+                    tables.append(match.group('table'))
+            else:
+                match = POSTGRES_SCAN.search(line)
+                if match:
+                    tables.append(match.group('table'))
+        return tables
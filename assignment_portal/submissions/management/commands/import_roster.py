@@ -0,0 +1,48 @@
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from submissions.rosters import import_courses, import_students, write_error_report
+
+
+class Command(BaseCommand):
+    help = 'Create students or courses in bulk from a CSV roster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['students', 'courses'])
+        parser.add_argument('path', help="CSV file to import, or '-' for standard input.")
+        parser.add_argument('--chunk-size', type=int,
+                            help='Rows per transaction. Defaults to ROSTER_IMPORT_CHUNK_SIZE.')
+        parser.add_argument('--workers', type=int,
+                            help='Password hashing processes. Defaults to PASSWORD_HASH_WORKERS.')
+        parser.add_argument('--errors', metavar='PATH',
+                            help='Write the per-row error report to this CSV file instead of stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                result = self.run_import(sys.stdin, options)
+            else:
+                with open(options['path'], newline='', encoding='utf-8-sig') as csv_file:
+                    result = self.run_import(csv_file, options)
+        except (OSError, ValidationError) as exc:
+            raise CommandError(exc)
+
+        if result.errors:
+            if options['errors']:
+                with open(options['errors'], 'w', newline='', encoding='utf-8') as report:
+                    write_error_report(result.errors, report)
+            else:
+                write_error_report(result.errors, self.stdout)
+
+        if options['verbosity'] >= 1:
+            style = self.style.WARNING if result.errors else self.style.SUCCESS
+            self.stdout.write(style(
+                f"Imported {result.created} {options['kind']}; {len(result.errors)} row(s) rejected."
+            ))
+
+    def run_import(self, csv_file, options):
+        if options['kind'] == 'students':
+            return import_students(csv_file, options['chunk_size'], options['workers'])
+        return import_courses(csv_file, options['chunk_size'])
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from submissions.uploads import files_to_migrate, migrate_submission_files
+
+
+class Command(BaseCommand):
+    help = 'Copy submission files from the old store (Cloudinary) into the content-addressed store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default='submissions.storage.CloudinaryBlobStore',
+                            help='Dotted path of the store the files are read from.')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=settings.SUBMISSION_DOWNLOAD_WORKERS,
+                            help='Files downloaded at once.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the files left to copy.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f'{files_to_migrate().count()} files to migrate.')
+            return
+        try:
+            copied, failed = migrate_submission_files(
+                import_string(options['source'])(), batch_size=options['batch_size'], workers=options['workers'],
+            )
+        except (ImportError, ValueError) as exc:
+            raise CommandError(exc)
+        if options['verbosity'] >= 1:
+            style = self.style.WARNING if failed else self.style.SUCCESS
+            self.stdout.write(style(f'Migrated {copied} files; {len(failed)} failed.'))
+        if failed:
+            raise CommandError('Some files could not be copied; run the command again to retry them.')
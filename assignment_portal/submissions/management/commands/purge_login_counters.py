@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from submissions.throttling import purge_login_counters
+
+
+class Command(BaseCommand):
+    help = 'Remove expired login throttling counters'
+
+    def handle(self, *args, **options):
+        deleted = purge_login_counters()
+        if options['verbosity'] >= 1:
+            self.stdout.write(self.style.SUCCESS(f'Removed {deleted} expired login counters.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from submissions.profiling import purge_profile_samples
+
+
+class Command(BaseCommand):
+    help = "Remove request profiling samples older than REQUEST_PROFILING['RETENTION']"
+
+    def handle(self, *args, **options):
+        deleted = purge_profile_samples()
+        if options['verbosity'] >= 1:
+            self.stdout.write(self.style.SUCCESS(f'Removed {deleted} profiling samples.'))
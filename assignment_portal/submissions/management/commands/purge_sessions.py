@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from submissions.sessions import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Remove expired sessions in batches (a batched replacement for clearsessions)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Session rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_sessions(batch_size=options['batch_size'])
+        if options['verbosity'] >= 1:
+            if deleted is None:
+                self.stdout.write(self.style.SUCCESS('Cleared expired sessions.'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'Removed {deleted} expired sessions.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from submissions.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recreate the full-text search index from every assignment'
+
+    def handle(self, *args, **options):
+        indexed = rebuild_search_index()
+        if options['verbosity'] >= 1:
+            self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} assignment(s).'))
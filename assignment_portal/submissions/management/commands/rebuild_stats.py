@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from submissions.summaries import find_drift, rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the CourseStats and StudentCourseStats summary tables from the assignments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only compare the stored summaries with the assignments and fail on drift.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            written = rebuild_summaries()
+            if options['verbosity'] >= 1:
+                self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} summary rows.'))
+            return
+
+        course_drift, student_course_drift = find_drift()
+        for label, drift in (('course', course_drift), ('student/course', student_course_drift)):
+            for key, stored, expected in drift:
+                self.stdout.write(self.style.ERROR(
+                    f'{label} {key}: stored {stored}, expected {expected}'
+                ))
+
+        total = len(course_drift) + len(student_course_drift)
+        if total:
+            raise CommandError(
+                f'{total} summary row{"" if total == 1 else "s"} drifted; run rebuild_stats to repair.'
+            )
+        if options['verbosity'] >= 1:
+            self.stdout.write(self.style.SUCCESS('Summary tables match the assignments.'))
@@ -0,0 +1,52 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from submissions.hashing import setup_worker
+from submissions.models import SubmissionFingerprint
+from submissions.similarity import index_fingerprints, pending_fingerprints
+
+
+class Command(BaseCommand):
+    help = 'Fingerprint newly stored submissions for near-duplicate detection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processes extracting and hashing text (default SIMILARITY["WORKERS"]).')
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Submissions fingerprinted per round.')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds to sleep when nothing is waiting.')
+        parser.add_argument('--once', action='store_true',
+                            help='Index everything waiting once and exit instead of polling.')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Drop every fingerprint first, e.g. after changing SIMILARITY settings.')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or settings.SIMILARITY['WORKERS'] or os.cpu_count() or 1
+        if options['rebuild']:
+            SubmissionFingerprint.objects.all().delete()
+
+        # Text extraction and MinHash are CPU-bound; a process pool keeps them
+        # off the web and upload workers and uses every core.
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=setup_worker) if workers > 1 else nullcontext()
+        total = 0
+        with pool as executor:
+            while True:
+                close_old_connections()
+                indexed = index_fingerprints(pending_fingerprints().order_by('pk')[:options['batch_size']], executor)
+                total += indexed
+                if indexed:
+                    if options['verbosity'] >= 1:
+                        self.stdout.write(f'Fingerprinted {indexed} submission(s).')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        if options['verbosity'] >= 1:
+            self.stdout.write(self.style.SUCCESS(f'Fingerprinted {total} submissions.'))
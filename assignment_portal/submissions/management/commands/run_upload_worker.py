@@ -0,0 +1,58 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from submissions.storage import get_blob_store
+from submissions.uploads import (
+    claim_jobs, process_job, purge_stale_chunked_uploads, queue_stats
+)
+
+
+logger = logging.getLogger('submissions.uploads')
+
+
+def _run(job, store):
+    try:
+        return process_job(job, store)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Push staged assignment uploads to the submission store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Number of uploads to run at once.')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the due jobs once and exit instead of polling.')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        store = get_blob_store()
+        logger.info('upload_worker_started concurrency=%s store=%s', concurrency, type(store).__name__)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                close_old_connections()
+                jobs = claim_jobs(concurrency)
+                if jobs:
+                    results = list(pool.map(lambda job: _run(job, store), jobs))
+                    stats = queue_stats()
+                    logger.info(
+                        'upload_worker_batch stored=%s failed=%s queued=%s running=%s p95_latency_s=%s',
+                        results.count(True), results.count(False),
+                        stats['queued'], stats['running'], stats['latency_seconds']['p95'],
+                    )
+                    if options['verbosity'] >= 1:
+                        self.stdout.write(f'Processed {len(jobs)} upload(s); {stats["queued"]} queued.')
+                elif options['once']:
+                    break
+                else:
+                    purge_stale_chunked_uploads()
+                    time.sleep(options['poll_interval'])
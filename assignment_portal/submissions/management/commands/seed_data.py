@@ -0,0 +1,36 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from submissions.seeding import seed_portal
+
+
+class Command(BaseCommand):
+    help = 'Bulk-insert synthetic faculties, courses, students and assignments for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--faculties', type=int, default=4)
+        parser.add_argument('--departments', type=int, default=5, help='Departments per faculty.')
+        parser.add_argument('--courses', type=int, default=3, help='Courses per department and level.')
+        parser.add_argument('--students', type=int, default=20000)
+        parser.add_argument('--assignments', type=int, default=200000)
+        parser.add_argument('--password', default='password', help='Password shared by every seeded account.')
+        parser.add_argument('--prefix', default='SD', help='Prefix for seeded codes and usernames.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data sets.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert.')
+
+    def handle(self, *args, **options):
+        log = None
+        if options['verbosity'] >= 2:
+            log = self.stdout.write
+        try:
+            counts = seed_portal(
+                faculties=options['faculties'], departments=options['departments'], courses=options['courses'],
+                students=options['students'], assignments=options['assignments'], password=options['password'],
+                prefix=options['prefix'], seed=options['seed'], batch_size=options['batch_size'], log=log,
+            )
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+        if options['verbosity'] >= 1:
+            self.stdout.write(self.style.SUCCESS(
+                'Seeded ' + ', '.join(f'{count} {name}' for name, count in counts.items()) + '.'
+            ))
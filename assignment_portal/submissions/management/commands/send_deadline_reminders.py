@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from submissions.reminders import send_deadline_reminders
+
+
+class Command(BaseCommand):
+    help = 'Email students who have not submitted for courses whose deadline is approaching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, action='append', dest='windows', metavar='HOURS',
+                            help='Reminder window in hours (repeatable). Defaults to DEADLINE_REMINDER_WINDOWS.')
+        parser.add_argument('--batch-size', type=int,
+                            help='Messages per send. Defaults to REMINDER_BATCH_SIZE.')
+        parser.add_argument('--rate-limit', type=float,
+                            help='Messages per second, 0 for unlimited. Defaults to REMINDER_RATE_LIMIT.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count the reminders that would be sent without sending them.')
+        parser.add_argument('--loop', type=float, metavar='SECONDS',
+                            help='Keep running, checking again every SECONDS.')
+
+    def handle(self, *args, **options):
+        if options['windows'] and any(hours <= 0 for hours in options['windows']):
+            raise CommandError('Reminder windows must be positive numbers of hours.')
+
+        while True:
+            close_old_connections()
+            sent = send_deadline_reminders(
+                windows=options['windows'],
+                batch_size=options['batch_size'],
+                rate_limit=options['rate_limit'],
+                dry_run=options['dry_run'],
+            )
+            if options['verbosity'] >= 1:
+                for window_hours, count in sent.items():
+                    verb = 'would be sent' if options['dry_run'] else 'sent'
+                    self.stdout.write(f'{window_hours}h window: {count} reminder(s) {verb}.')
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
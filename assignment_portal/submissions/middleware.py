@@ -0,0 +1,60 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .profiling import profile_request, profile_streaming_content, record_profile
+from .roles import get_request_role
+
+
+class UserRoleMiddleware:
+    """Set ``request.user_role`` once per request from the session-cached role."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_role = get_request_role(request)
+        return self.get_response(request)
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile a random REQUEST_PROFILING['SAMPLE_RATE'] share of requests:
+    wall time, SQL count and time, repeated statements, template render and
+    storage time. Unloaded entirely when the rate is 0; unsampled requests
+    only cost a random() call. Place it first so it sees every query.
+    """
+
+    def __init__(self, get_response):
+        self.sample_rate = settings.REQUEST_PROFILING['SAMPLE_RATE']
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        started = time.perf_counter()
+        profile, response = profile_request(self.get_response, request)
+        if not response.streaming:
+            record_profile(request, response, profile, time.perf_counter() - started)
+            return response
+
+        # A streamed body is produced while the server sends it, so the
+        # sample is taken when the server closes the response. Files handed
+        # to wsgi.file_wrapper keep their content untouched for sendfile.
+        if getattr(response, 'file_to_stream', None) is None and not getattr(response, 'is_async', False):
+            response.streaming_content = profile_streaming_content(response.streaming_content, profile)
+        close = response.close
+
+        def close_and_record():
+            # Recorded before close(), which ends the request and may close
+            # the database connection.
+            try:
+                record_profile(request, response, profile, time.perf_counter() - started)
+            finally:
+                close()
+        response.close = close_and_record
+        return response
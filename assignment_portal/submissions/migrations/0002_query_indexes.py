@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['student', 'status'], name='assignment_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['student', '-date_uploaded'], name='assignment_student_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['course', 'status', '-date_uploaded'], name='assignment_course_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['course', '-date_uploaded'], name='assignment_course_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'under_review'])), fields=['course', '-date_uploaded'], name='assignment_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('deadline__isnull', False)), fields=['deadline'], name='assignment_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['department', 'level', 'is_active'], name='course_dept_level_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['department', 'level'], name='student_dept_level_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    from submissions.summaries import rebuild_summaries
+
+    rebuild_summaries(
+        course_stats_model=apps.get_model('submissions', 'CourseStats'),
+        student_course_stats_model=apps.get_model('submissions', 'StudentCourseStats'),
+        assignment_model=apps.get_model('submissions', 'Assignment'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0004_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('submitted', models.PositiveIntegerField(default=0)),
+                ('graded', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('score_count', models.PositiveIntegerField(default=0)),
+                ('last_submission_at', models.DateTimeField(blank=True, null=True)),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='submissions.course')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentCourseStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submitted', models.PositiveIntegerField(default=0)),
+                ('graded', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('score_count', models.PositiveIntegerField(default=0)),
+                ('last_submission_at', models.DateTimeField(blank=True, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_stats', to='submissions.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_stats', to='submissions.studentprofile')),
+            ],
+            options={
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from submissions.search import rebuild_search_index
+
+    rebuild_search_index(apps.get_model('submissions', 'Assignment'), using=schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from submissions.search import get_search_backend
+
+    backend = get_search_backend(schema_editor.connection.vendor)
+    if backend is not None:
+        with schema_editor.connection.cursor() as cursor:
+            backend.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0006_deadline_reminders'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
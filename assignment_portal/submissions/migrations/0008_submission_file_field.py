@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:16
+
+import submissions.storage
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignment',
+            name='file',
+            field=submissions.storage.SubmissionFileField(blank=True, max_length=255, null=True),
+        ),
+    ]
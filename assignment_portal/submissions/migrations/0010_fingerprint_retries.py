@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0009_similarity_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submissionfingerprint',
+            name='failures',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='submissionfingerprint',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='submissionfingerprint',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+    ]
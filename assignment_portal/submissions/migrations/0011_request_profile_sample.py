@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0010_fingerprint_retries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfileSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(max_length=200)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('wall_us', models.PositiveBigIntegerField()),
+                ('queries', models.PositiveIntegerField()),
+                ('sql_us', models.PositiveBigIntegerField()),
+                ('template_us', models.PositiveBigIntegerField()),
+                ('storage_us', models.PositiveBigIntegerField()),
+                ('duplicate_queries', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['recorded_at'], name='profile_sample_recorded_idx')],
+            },
+        ),
+    ]
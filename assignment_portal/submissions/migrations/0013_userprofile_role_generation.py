@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0012_login_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='role_generation',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,8 +1,11 @@
-from django.db import models
-from cloudinary.models import CloudinaryField
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.contrib.auth import get_user_model
 
+from .storage import SubmissionFileField
+
 # ---------- Base User Models ----------
 class BaseUserManager(BaseUserManager):
     def create_user(self, username, password=None, **extra_fields):
@@ -33,6 +36,9 @@ class UserProfile(AbstractBaseUser, PermissionsMixin):
     date_joined = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Bumped by submissions.roles.invalidate_role; sessions that cached the
+    # role under another value resolve it again.
+    role_generation = models.PositiveIntegerField(default=0, editable=False)
     
     objects = BaseUserManager()
     
@@ -94,6 +100,11 @@ class StudentProfile(models.Model):
     admission_year = models.IntegerField()
     phone_number = models.CharField(max_length=15, blank=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['department', 'level'], name='student_dept_level_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.matric_number} - {self.user.full_name}"
 
@@ -127,6 +138,11 @@ class Course(models.Model):
                                 related_name='courses_teaching')
     is_active = models.BooleanField(default=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['department', 'level', 'is_active'], name='course_dept_level_active_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.code} - {self.title}"
 
@@ -137,7 +153,7 @@ class Assignment(models.Model):
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='assignments')
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
-    file = CloudinaryField('file', null=True, blank=True)
+    file = SubmissionFileField(null=True, blank=True)
     date_uploaded = models.DateTimeField(auto_now_add=True)
     submission_date = models.DateTimeField(auto_now=True)
     deadline = models.DateTimeField(null=True, blank=True)
@@ -152,9 +168,258 @@ class Assignment(models.Model):
     feedback = models.TextField(blank=True, null=True)
     graded_by = models.ForeignKey(LecturerProfile, on_delete=models.SET_NULL, null=True, blank=True)
     graded_date = models.DateTimeField(null=True, blank=True)
+    upload_status = models.CharField(max_length=20, choices=[
+        ('uploading', 'Uploading'),
+        ('stored', 'Stored'),
+        ('failed', 'Upload Failed'),
+    ], default='stored')
     
     class Meta:
         ordering = ['-date_uploaded']
+        indexes = [
+            # Student dashboard counts and "my assignments" listings
+            models.Index(fields=['student', 'status'], name='assignment_student_status_idx'),
+            models.Index(fields=['student', '-date_uploaded'], name='assignment_student_recent_idx'),
+            # Lecturer listings: course__lecturer join, optional status filter, newest first
+            models.Index(fields=['course', 'status', '-date_uploaded'], name='assignment_course_status_idx'),
+            models.Index(fields=['course', '-date_uploaded'], name='assignment_course_recent_idx'),
+            # Grading queue only ever looks at work still awaiting a mark
+            models.Index(
+                fields=['course', '-date_uploaded'],
+                name='assignment_open_idx',
+                condition=models.Q(status__in=['pending', 'under_review']),
+            ),
+            # Upcoming deadline lookups
+            models.Index(
+                fields=['deadline'],
+                name='assignment_deadline_idx',
+                condition=models.Q(deadline__isnull=False),
+            ),
+        ]
+    
+    # Fields the statistics tables are derived from (see submissions.summaries).
+    SUMMARY_FIELDS = ('student_id', 'course_id', 'status', 'score', 'date_uploaded')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(cls.SUMMARY_FIELDS).issubset(field_names):
+            instance._summary_state = instance.summary_state()
+        return instance
+    
+    def summary_state(self):
+        return tuple(getattr(self, field) for field in self.SUMMARY_FIELDS)
+    
+    def save(self, *args, **kwargs):
+        from .summaries import record_assignment_changes
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {
+            name.removesuffix('_id') for name in update_fields
+        } & {name.removesuffix('_id') for name in self.SUMMARY_FIELDS}:
+            return super().save(*args, **kwargs)
+        
+        with transaction.atomic():
+            previous = getattr(self, '_summary_state', None)
+            if previous is None and not self._state.adding:
+                previous = Assignment.objects.filter(pk=self.pk).values_list(*self.SUMMARY_FIELDS).first()
+            super().save(*args, **kwargs)
+            self._summary_state = self.summary_state()
+            record_assignment_changes([(previous, self._summary_state)])
     
     def __str__(self):
         return f"{self.title} - {self.student.matric_number}"
+
+
+# ---------- Upload Queue ----------
+class UploadJob(models.Model):
+    """
+    A staged file waiting to be pushed to the submission store by the
+    upload worker (``manage.py run_upload_worker``).
+    """
+    STATES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    assignment = models.OneToOneField(Assignment, on_delete=models.CASCADE, related_name='upload_job')
+    spool_path = models.CharField(max_length=500)
+    original_name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    state = models.CharField(max_length=20, choices=STATES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'available_at'], name='uploadjob_state_available_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.original_name} ({self.state})"
+
+
+class ChunkedUpload(models.Model):
+    """
+    A resumable upload in progress. Chunks are appended in order to a
+    partial file in the spool directory; ``received_chunks`` is the index
+    of the next chunk the server expects.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='chunked_uploads')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='chunked_uploads')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    received_chunks = models.PositiveIntegerField(default=0)
+    chunk_checksums = models.JSONField(default=list)
+    assignment = models.OneToOneField(Assignment, on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='chunked_upload')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.size // self.chunk_size))
+    
+    @property
+    def received_bytes(self):
+        return min(self.size, self.received_chunks * self.chunk_size)
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received_chunks}/{self.total_chunks})"
+
+
+# ---------- Statistics ----------
+class SubmissionCounters(models.Model):
+    """Counters kept in step with Assignment rows by submissions.summaries."""
+    submitted = models.PositiveIntegerField(default=0)
+    graded = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    score_count = models.PositiveIntegerField(default=0)
+    last_submission_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def average_score(self):
+        return self.score_sum / self.score_count if self.score_count else None
+
+
+class CourseStats(SubmissionCounters):
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    
+    def __str__(self):
+        return f"{self.course.code}: {self.submitted} submitted"
+
+
+class StudentCourseStats(SubmissionCounters):
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='course_stats')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='student_stats')
+    
+    class Meta:
+        unique_together = ('student', 'course')
+    
+    def __str__(self):
+        return f"{self.student.matric_number} / {self.course.code}: {self.submitted} submitted"
+
+
+# ---------- Reminders ----------
+class DeadlineReminder(models.Model):
+    """A deadline reminder already sent, so each window only emails a student once."""
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='deadline_reminders')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='deadline_reminders')
+    deadline = models.DateTimeField()
+    window_hours = models.PositiveIntegerField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('student', 'course', 'deadline', 'window_hours')
+    
+    def __str__(self):
+        return f"{self.student.matric_number} / {self.course.code} ({self.window_hours}h)"
+
+
+# ---------- Similarity ----------
+class SubmissionFingerprint(models.Model):
+    """
+    MinHash signature of the text in an assignment's file, kept by
+    ``manage.py run_similarity_indexer`` (see submissions.similarity).
+    """
+    assignment = models.OneToOneField(Assignment, on_delete=models.CASCADE, primary_key=True,
+                                      related_name='fingerprint')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='fingerprints')
+    # The Assignment.file this was computed from; a resubmission makes it stale.
+    file = models.CharField(max_length=255)
+    signature = models.BinaryField()
+    shingle_count = models.PositiveIntegerField(default=0)
+    # Failed reads of ``file`` so far; the signature stays empty and the
+    # indexer retries at ``retry_at`` until SIMILARITY['MAX_ATTEMPTS'].
+    failures = models.PositiveSmallIntegerField(default=0)
+    retry_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    indexed_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.assignment_id} ({self.shingle_count} shingles)"
+
+
+class SimilarityBucket(models.Model):
+    """One LSH band of a fingerprint; fingerprints sharing a bucket are candidate pairs."""
+    fingerprint = models.ForeignKey(SubmissionFingerprint, on_delete=models.CASCADE, related_name='buckets')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=24)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'key'], name='similarity_bucket_idx'),
+        ]
+
+
+# ---------- Request Profiling ----------
+class RequestProfileSample(models.Model):
+    """
+    One request measured by RequestProfilingMiddleware. Rows from every
+    worker are averaged per view by ``submissions.profiling.profile_stats``.
+    """
+    view_name = models.CharField(max_length=200)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+    wall_us = models.PositiveBigIntegerField()
+    queries = models.PositiveIntegerField()
+    sql_us = models.PositiveBigIntegerField()
+    template_us = models.PositiveBigIntegerField()
+    storage_us = models.PositiveBigIntegerField()
+    duplicate_queries = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['recorded_at'], name='profile_sample_recorded_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.view_name} ({self.wall_us / 1000:.1f} ms)"
+
+
+# ---------- Login Throttling ----------
+class LoginCounter(models.Model):
+    """
+    A count that every worker increments in place: failed logins per
+    username or client IP, and login outcomes per hour. See
+    ``submissions.throttling``.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.key}={self.count}"
@@ -0,0 +1,89 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import Http404
+from rest_framework.pagination import CursorPagination
+
+
+DEFAULT_PAGE_SIZE = 25
+
+
+class KeysetPage:
+    """
+    One page of a queryset ordered newest first by (date_uploaded, id).
+    ``next_cursor`` is an opaque token for the following page, or None.
+    """
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(obj):
+    raw = f"{obj.date_uploaded.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date_uploaded, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(date_uploaded), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise Http404("Invalid page cursor.")
+
+
+def paginate_keyset(queryset, cursor=None, per_page=DEFAULT_PAGE_SIZE):
+    """
+    Seek to the rows after ``cursor`` instead of using OFFSET, so every page
+    costs the same index range scan as the first one.
+    """
+    queryset = queryset.order_by('-date_uploaded', '-id')
+
+    if cursor:
+        date_uploaded, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(date_uploaded__lt=date_uploaded) |
+            Q(date_uploaded=date_uploaded, id__lt=pk)
+        )
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = encode_cursor(rows[per_page - 1]) if len(rows) > per_page else None
+    return KeysetPage(rows[:per_page], next_cursor)
+
+
+# ---------- API ----------
+class ApiCursorPagination(CursorPagination):
+    """Opaque ``?cursor=`` pages for the API; ``?page_size=`` up to 100."""
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class NewestFirstCursorPagination(ApiCursorPagination):
+    ordering = ('-date_uploaded', '-id')
+
+
+class CodeCursorPagination(ApiCursorPagination):
+    ordering = 'code'
+
+
+class MatricNumberCursorPagination(ApiCursorPagination):
+    ordering = 'matric_number'
+
+
+class StaffIdCursorPagination(ApiCursorPagination):
+    ordering = 'staff_id'
@@ -0,0 +1,205 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+
+logger = logging.getLogger('submissions.profiling')
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.storage_time = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook. ``sql`` still has placeholders, so
+        # the same statement run for every row of a loop counts as duplicate.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """``(count, sql)`` for statements run at least ``threshold`` times, most repeated first."""
+        return [(count, sql) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+def _profiled(profile, function, *args):
+    token = _current.set(profile)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            return function(*args)
+    finally:
+        _current.reset(token)
+
+
+def profile_request(get_response, request):
+    """Run ``get_response(request)`` with every database connection instrumented."""
+    profile = RequestProfile()
+    return profile, _profiled(profile, get_response, request)
+
+
+def profile_streaming_content(content, profile):
+    """
+    Iterate a streaming response's ``content`` under ``profile``: the rows
+    of a streamed export are queried and rendered while the server sends
+    the body, after the view has returned.
+    """
+    iterator = iter(content)
+    while True:
+        try:
+            chunk = _profiled(profile, next, iterator)
+        except StopIteration:
+            return
+        yield chunk
+
+
+# ---------- Instrumented Templates and Storage ----------
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_time += time.perf_counter() - started
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates whose templates add their render time to the current request profile."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class ProfiledBlobStore:
+    """Wraps a BlobStore so its calls count as storage time in the request profile."""
+
+    def __init__(self, store, profile):
+        self.store = store
+        self.profile = profile
+
+    def __getattr__(self, name):
+        attribute = getattr(self.store, name)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self.profile.storage_time += time.perf_counter() - started
+        return timed
+
+
+def profiled_store(store):
+    profile = _current.get()
+    return store if profile is None else ProfiledBlobStore(store, profile)
+
+
+# ---------- Reporting ----------
+# Samples are rows rather than cache counters so every worker's requests
+# add up, whatever the cache backend. Imported lazily: models imports
+# storage, which imports this module.
+def record_profile(request, response, profile, wall_time):
+    """Log one structured line for the request and store it as a sample of its view."""
+    from .models import RequestProfileSample
+
+    config = settings.REQUEST_PROFILING
+    match = getattr(request, 'resolver_match', None)
+    view_name = (match.view_name if match else None) or '<unresolved>'
+    duplicates = profile.duplicates(config['DUPLICATE_QUERY_THRESHOLD'])
+    repeated = sum(count - 1 for count, _sql in duplicates)
+
+    logger.info(
+        'request_profile view=%s method=%s status=%s wall_ms=%.1f queries=%d sql_ms=%.1f '
+        'template_ms=%.1f storage_ms=%.1f duplicate_queries=%d',
+        view_name, request.method, response.status_code, wall_time * 1000, profile.queries,
+        profile.sql_time * 1000, profile.template_time * 1000, profile.storage_time * 1000, repeated,
+    )
+    for count, sql in duplicates[:3]:
+        logger.warning('duplicate_query view=%s count=%d sql=%s', view_name, count, sql[:300])
+
+    RequestProfileSample.objects.create(
+        view_name=view_name[:200],
+        wall_us=int(wall_time * 1_000_000),
+        queries=profile.queries,
+        sql_us=int(profile.sql_time * 1_000_000),
+        template_us=int(profile.template_time * 1_000_000),
+        storage_us=int(profile.storage_time * 1_000_000),
+        duplicate_queries=repeated,
+    )
+
+
+def profile_stats():
+    """Per-view averages of the sampled requests, slowest total time first."""
+    from .models import RequestProfileSample
+
+    rows = RequestProfileSample.objects.values('view_name').annotate(
+        requests=Count('id'),
+        total_wall_us=Sum('wall_us'),
+        total_queries=Sum('queries'),
+        total_sql_us=Sum('sql_us'),
+        total_template_us=Sum('template_us'),
+        total_storage_us=Sum('storage_us'),
+        total_duplicates=Sum('duplicate_queries'),
+        duplicate_requests=Count('id', filter=Q(duplicate_queries__gt=0)),
+    ).order_by('-total_wall_us', 'view_name')
+    return {
+        row['view_name']: {
+            'requests': row['requests'],
+            'avg_ms': round(row['total_wall_us'] / row['requests'] / 1000, 2),
+            'avg_queries': round(row['total_queries'] / row['requests'], 1),
+            'avg_sql_ms': round(row['total_sql_us'] / row['requests'] / 1000, 2),
+            'avg_template_ms': round(row['total_template_us'] / row['requests'] / 1000, 2),
+            'avg_storage_ms': round(row['total_storage_us'] / row['requests'] / 1000, 2),
+            'duplicate_queries': row['total_duplicates'],
+            'requests_with_duplicates': row['duplicate_requests'],
+            'total_ms': round(row['total_wall_us'] / 1000, 1),
+        }
+        for row in rows
+    }
+
+
+def reset_profile_stats():
+    from .models import RequestProfileSample
+
+    RequestProfileSample.objects.all().delete()
+
+
+def purge_profile_samples():
+    """Delete samples older than REQUEST_PROFILING['RETENTION'] seconds; returns how many."""
+    from .models import RequestProfileSample
+
+    cutoff = timezone.now() - timedelta(seconds=settings.REQUEST_PROFILING['RETENTION'])
+    return RequestProfileSample.objects.filter(recorded_at__lt=cutoff).delete()[0]
@@ -0,0 +1,135 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mass_mail
+from django.db.models import Exists, F, OuterRef
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import Assignment, DeadlineReminder, StudentProfile
+
+
+logger = logging.getLogger('submissions.reminders')
+
+
+def missing_submissions(window_hours, now=None):
+    """
+    Students who have not submitted to an active course of their department
+    and level whose deadline falls within the next ``window_hours`` hours.
+
+    One query: the enrolment join minus students with a submission and minus
+    students already reminded for this deadline in this or a closer window.
+    Yields ``(student_id, course_id, deadline, email, full_name, course_code, course_title)``.
+    """
+    now = now or timezone.now()
+    candidates = StudentProfile.objects.filter(
+        user__is_active=True,
+        department__courses__level=F('level'),
+        department__courses__is_active=True,
+        department__courses__deadline__gt=now,
+        department__courses__deadline__lte=now + timedelta(hours=window_hours),
+    ).annotate(
+        course_id=F('department__courses__id'),
+        deadline=F('department__courses__deadline'),
+    )
+    return candidates.filter(
+        ~Exists(Assignment.objects.filter(student=OuterRef('pk'), course=OuterRef('course_id'))),
+        ~Exists(DeadlineReminder.objects.filter(
+            student=OuterRef('pk'),
+            course=OuterRef('course_id'),
+            deadline=OuterRef('deadline'),
+            window_hours__lte=window_hours,
+        )),
+    ).exclude(user__email='').order_by().values_list(
+        'pk', 'course_id', 'deadline', 'user__email', 'user__full_name',
+        'department__courses__code', 'department__courses__title',
+    ).iterator(chunk_size=settings.REMINDER_BATCH_SIZE)
+
+
+class _RateLimiter:
+    """Spreads sends so no more than ``per_second`` messages go out each second."""
+
+    def __init__(self, per_second):
+        self.per_second = per_second
+        self.started = time.monotonic()
+        self.sent = 0
+
+    def wait(self, count):
+        self.sent += count
+        if self.per_second:
+            delay = self.sent / self.per_second - (time.monotonic() - self.started)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def _messages(rows):
+    subject_template = get_template('submissions/emails/deadline_reminder_subject.txt')
+    body_template = get_template('submissions/emails/deadline_reminder.txt')
+    for student_id, course_id, deadline, email, full_name, code, title in rows:
+        context = {
+            'full_name': full_name,
+            'course_code': code,
+            'course_title': title,
+            'deadline': deadline,
+            'protocol': 'https',
+            'domain': settings.DOMAIN,
+            'site_name': settings.SITE_NAME,
+        }
+        subject = ' '.join(subject_template.render(context).split())
+        message = (subject, body_template.render(context), settings.DEFAULT_FROM_EMAIL, [email])
+        yield (student_id, course_id, deadline), message
+
+
+def send_deadline_reminders(windows=None, batch_size=None, rate_limit=None, dry_run=False, now=None):
+    """
+    Email every student who is missing a submission inside one of the
+    reminder ``windows`` (hours before the deadline). All batches go over a
+    single mail connection and each batch is recorded in DeadlineReminder
+    right after it is sent, so re-running only picks up what is left.
+    Returns ``{window_hours: messages_sent}``.
+    """
+    windows = sorted(windows or settings.DEADLINE_REMINDER_WINDOWS)
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    rate_limit = settings.REMINDER_RATE_LIMIT if rate_limit is None else rate_limit
+    now = now or timezone.now()
+    limiter = _RateLimiter(rate_limit)
+    sent = {}
+
+    connection = get_connection()
+    connection.open()
+    try:
+        # Closest window first, so a student already inside it is not also
+        # sent the earlier, wider reminders on the same run.
+        for window_hours in windows:
+            sent[window_hours] = 0
+            batch = []
+            for item in _messages(missing_submissions(window_hours, now)):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    sent[window_hours] += _send_batch(batch, window_hours, connection, limiter, dry_run)
+                    batch = []
+            if batch:
+                sent[window_hours] += _send_batch(batch, window_hours, connection, limiter, dry_run)
+            logger.info('reminders_sent window_hours=%s count=%s dry_run=%s',
+                        window_hours, sent[window_hours], dry_run)
+    finally:
+        connection.close()
+    return sent
+
+
+def _send_batch(batch, window_hours, connection, limiter, dry_run):
+    if dry_run:
+        return len(batch)
+    send_mass_mail([message for _key, message in batch], fail_silently=False, connection=connection)
+    DeadlineReminder.objects.bulk_create(
+        [
+            DeadlineReminder(student_id=student_id, course_id=course_id,
+                             deadline=deadline, window_hours=window_hours)
+            for (student_id, course_id, deadline), _message in batch
+        ],
+        ignore_conflicts=True,
+    )
+    limiter.wait(len(batch))
+    return len(batch)
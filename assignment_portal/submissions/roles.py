@@ -0,0 +1,59 @@
+from django.db.models import F
+
+from .models import UserProfile
+
+
+ROLE_SESSION_KEY = '_user_role'
+
+
+def resolve_role(user):
+    """
+    The portal role of ``user``: 'student', 'lecturer', 'admin' or None.
+    Free of queries when the profiles were loaded with select_related,
+    as ProfileModelBackend does for every authenticated request.
+    """
+    if not user.is_authenticated:
+        return None
+    if hasattr(user, 'student_profile'):
+        return 'student'
+    if hasattr(user, 'lecturer_profile'):
+        return 'lecturer'
+    if user.is_superuser:
+        return 'admin'
+    return None
+
+
+def is_student(user):
+    return resolve_role(user) == 'student'
+
+
+def is_lecturer(user):
+    return resolve_role(user) == 'lecturer'
+
+
+# ---------- Session Cache ----------
+def invalidate_role(user):
+    """Make every session of ``user`` resolve its role again."""
+    if UserProfile.objects.filter(pk=user.pk).update(role_generation=F('role_generation') + 1):
+        # A later save() of this instance must not write the old value back.
+        user.refresh_from_db(fields=['role_generation'])
+
+
+def get_request_role(request):
+    """
+    The role of ``request.user``, cached in the session together with the
+    user's role generation. The user row is loaded for every authenticated
+    request anyway, so checking the generation costs nothing; the session
+    is only written when the role has to be resolved again.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+
+    cached = request.session.get(ROLE_SESSION_KEY)
+    if cached and cached[1] == user.role_generation:
+        return cached[0]
+
+    role = resolve_role(user)
+    request.session[ROLE_SESSION_KEY] = [role, user.role_generation]
+    return role
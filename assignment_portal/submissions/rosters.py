@@ -0,0 +1,262 @@
+import csv
+from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .caching import COURSES, STUDENTS, bump_generation
+from .hashing import hash_passwords
+from .models import Course, Department, Faculty, LecturerProfile, Level, StudentProfile, UserProfile
+
+
+STUDENT_COLUMNS = ['matric_number', 'full_name', 'email', 'faculty', 'department', 'level', 'admission_year']
+STUDENT_OPTIONAL_COLUMNS = ['username', 'password', 'phone_number']
+COURSE_COLUMNS = ['code', 'title', 'department', 'level']
+COURSE_OPTIONAL_COLUMNS = ['description', 'credit_units', 'lecturer', 'deadline', 'is_active']
+
+RowError = namedtuple('RowError', ['line', 'key', 'message'])
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def error(self, line, key, message):
+        self.errors.append(RowError(line, key, message))
+
+
+def _rows(csv_file, required):
+    """Yield ``(line_number, row)`` with stripped values, after checking the header."""
+    reader = csv.DictReader(csv_file)
+    missing = [column for column in required if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValidationError(f"Missing column(s): {', '.join(missing)}")
+    for row in reader:
+        yield reader.line_num, {key: (value or '').strip() for key, value in row.items() if key}
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def write_error_report(errors, output):
+    """Write ``errors`` as CSV (line, key, error) to the text file ``output``."""
+    writer = csv.writer(output)
+    writer.writerow(['line', 'key', 'error'])
+    for error in errors:
+        writer.writerow(error)
+
+
+# ---------- Students ----------
+def import_students(csv_file, chunk_size=None, workers=None):
+    """
+    Create a user and StudentProfile for every valid row of ``csv_file``.
+
+    Faculty, department and level codes are resolved through maps loaded
+    once up front. Each chunk of ROSTER_IMPORT_CHUNK_SIZE rows costs two
+    duplicate-check queries and two ``bulk_create`` calls in one
+    transaction, and its passwords are hashed across a process pool. Rows
+    without a password get an unusable one (students then use password
+    reset). Invalid rows are reported in ``result.errors`` and skipped.
+    """
+    chunk_size = chunk_size or settings.ROSTER_IMPORT_CHUNK_SIZE
+    result = ImportResult()
+    faculties = dict(Faculty.objects.values_list('code', 'id'))
+    departments = {code: (pk, faculty_id) for code, pk, faculty_id in
+                   Department.objects.values_list('code', 'id', 'faculty_id')}
+    levels = dict(Level.objects.values_list('name', 'id'))
+    seen = {'matric_number': set(), 'username': set(), 'email': set()}
+
+    for chunk in _chunks(_rows(csv_file, STUDENT_COLUMNS), chunk_size):
+        valid = []
+        for line, row in chunk:
+            row['username'] = row.get('username') or row['matric_number']
+            row['email'] = UserProfile.objects.normalize_email(row['email'])
+            message = _student_row_error(row, faculties, departments, levels, seen)
+            if message:
+                result.error(line, row['matric_number'], message)
+                continue
+            for field, values in seen.items():
+                values.add(row[field])
+            valid.append((line, row))
+
+        valid = _drop_existing_students(valid, result)
+        if not valid:
+            continue
+
+        passwords = hash_passwords([row.get('password') or None for _line, row in valid], workers)
+        try:
+            with transaction.atomic():
+                users = UserProfile.objects.bulk_create([
+                    UserProfile(username=row['username'], email=row['email'], full_name=row['full_name'],
+                                user_type='student', password=password)
+                    for (_line, row), password in zip(valid, passwords)
+                ])
+                StudentProfile.objects.bulk_create([
+                    StudentProfile(
+                        user_id=user.pk,
+                        matric_number=row['matric_number'],
+                        faculty_id=faculties[row['faculty']],
+                        department_id=departments[row['department']][0],
+                        level_id=levels[row['level']],
+                        admission_year=int(row['admission_year']),
+                        phone_number=row.get('phone_number', ''),
+                    )
+                    for user, (_line, row) in zip(users, valid)
+                ])
+        except IntegrityError as exc:
+            # Lost a race with a registration; report the whole chunk.
+            for line, row in valid:
+                result.error(line, row['matric_number'], f'Not imported: {exc}')
+            continue
+        result.created += len(valid)
+
+    if result.created:
+        bump_generation(STUDENTS)
+    return result
+
+
+def _student_row_error(row, faculties, departments, levels, seen):
+    for column in STUDENT_COLUMNS:
+        if not row.get(column):
+            return f'{column} is required.'
+    try:
+        validate_email(row['email'])
+    except ValidationError:
+        return f"'{row['email']}' is not a valid email address."
+    if not row['admission_year'].isdigit():
+        return f"admission_year '{row['admission_year']}' is not a year."
+    if row['faculty'] not in faculties:
+        return f"Unknown faculty code '{row['faculty']}'."
+    if row['department'] not in departments:
+        return f"Unknown department code '{row['department']}'."
+    if departments[row['department']][1] != faculties[row['faculty']]:
+        return f"Department '{row['department']}' is not in faculty '{row['faculty']}'."
+    if row['level'] not in levels:
+        return f"Unknown level '{row['level']}'."
+    for field, values in seen.items():
+        if row[field] in values:
+            return f"Duplicate {field} '{row[field]}' earlier in the file."
+    return None
+
+
+def _drop_existing_students(valid, result):
+    """Report and remove rows whose username, email or matric number is already taken."""
+    if not valid:
+        return valid
+    usernames = {row['username'] for _line, row in valid}
+    emails = {row['email'] for _line, row in valid}
+    taken = set()
+    for username, email in UserProfile.objects.filter(
+        Q(username__in=usernames) | Q(email__in=emails)
+    ).values_list('username', 'email'):
+        taken.update({('username', username), ('email', email)})
+    taken.update(
+        ('matric_number', matric_number) for matric_number in StudentProfile.objects.filter(
+            matric_number__in=[row['matric_number'] for _line, row in valid]
+        ).values_list('matric_number', flat=True)
+    )
+
+    kept = []
+    for line, row in valid:
+        clash = next((field for field in ('matric_number', 'username', 'email') if (field, row[field]) in taken), None)
+        if clash:
+            result.error(line, row['matric_number'], f"{clash} '{row[clash]}' already exists.")
+        else:
+            kept.append((line, row))
+    return kept
+
+
+# ---------- Courses ----------
+def import_courses(csv_file, chunk_size=None):
+    """
+    Create a Course for every valid row of ``csv_file``. ``lecturer`` is a
+    staff id and ``deadline`` an ISO datetime; both are optional.
+    """
+    chunk_size = chunk_size or settings.ROSTER_IMPORT_CHUNK_SIZE
+    result = ImportResult()
+    departments = dict(Department.objects.values_list('code', 'id'))
+    levels = dict(Level.objects.values_list('name', 'id'))
+    lecturers = dict(LecturerProfile.objects.values_list('staff_id', 'id'))
+    seen = set()
+
+    for chunk in _chunks(_rows(csv_file, COURSE_COLUMNS), chunk_size):
+        existing = set(Course.objects.filter(
+            code__in=[row.get('code') for _line, row in chunk]
+        ).values_list('code', flat=True))
+
+        courses = []
+        for line, row in chunk:
+            try:
+                course = _course_from_row(row, departments, levels, lecturers)
+            except ValidationError as exc:
+                result.error(line, row.get('code', ''), exc.messages[0])
+                continue
+            if course.code in existing:
+                result.error(line, course.code, f"Course '{course.code}' already exists.")
+                continue
+            if course.code in seen:
+                result.error(line, course.code, f"Duplicate code '{course.code}' earlier in the file.")
+                continue
+            seen.add(course.code)
+            courses.append((line, course))
+        if not courses:
+            continue
+
+        try:
+            with transaction.atomic():
+                Course.objects.bulk_create([course for _line, course in courses])
+        except IntegrityError as exc:
+            for line, course in courses:
+                result.error(line, course.code, f'Not imported: {exc}')
+            continue
+        result.created += len(courses)
+
+    if result.created:
+        bump_generation(COURSES)
+    return result
+
+
+def _course_from_row(row, departments, levels, lecturers):
+    for column in COURSE_COLUMNS:
+        if not row.get(column):
+            raise ValidationError(f'{column} is required.')
+    if row['department'] not in departments:
+        raise ValidationError(f"Unknown department code '{row['department']}'.")
+    if row['level'] not in levels:
+        raise ValidationError(f"Unknown level '{row['level']}'.")
+    lecturer = row.get('lecturer')
+    if lecturer and lecturer not in lecturers:
+        raise ValidationError(f"Unknown lecturer staff id '{lecturer}'.")
+
+    credit_units = row.get('credit_units') or '3'
+    if not credit_units.isdigit():
+        raise ValidationError(f"credit_units '{credit_units}' is not a number.")
+    deadline = None
+    if row.get('deadline'):
+        deadline = parse_datetime(row['deadline'])
+        if deadline is None:
+            raise ValidationError(f"deadline '{row['deadline']}' is not an ISO datetime.")
+        if timezone.is_naive(deadline):
+            deadline = timezone.make_aware(deadline)
+
+    return Course(
+        code=row['code'],
+        title=row['title'],
+        description=row.get('description', ''),
+        credit_units=int(credit_units),
+        deadline=deadline,
+        department_id=departments[row['department']],
+        level_id=levels[row['level']],
+        lecturer_id=lecturers.get(lecturer),
+        is_active=row.get('is_active', '').lower() not in ('0', 'false', 'no'),
+    )
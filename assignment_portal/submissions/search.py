@@ -0,0 +1,238 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Assignment
+
+
+# Fields copied into each assignment's search document, in column order.
+DOCUMENT_FIELDS = (
+    'title', 'description', 'feedback',
+    'student__user__full_name', 'student__matric_number',
+    'course__code', 'course__title',
+)
+# Assignment fields whose change requires the document to be rebuilt.
+INDEXED_FIELDS = {'title', 'description', 'feedback', 'student', 'course'}
+
+SEARCH_TABLE = 'submissions_search'
+INDEX_BATCH_SIZE = 500
+
+_TOKEN = re.compile(r'\w+')
+
+
+def query_terms(text):
+    """Lower-cased word tokens of a search box query, punctuation dropped."""
+    return [token.lower() for token in _TOKEN.findall(text or '')][:16]
+
+
+# ---------- Backends ----------
+class SearchBackend:
+    """
+    Keeps one search document per assignment in SEARCH_TABLE. Every term of
+    a query must match, each as a prefix, so partial matric numbers and
+    course codes work while typing.
+    """
+
+    def create(self, cursor):
+        raise NotImplementedError
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def write(self, cursor, rows):
+        """Replace the documents for ``rows`` of ``(assignment_id, course_id, *DOCUMENT_FIELDS)``."""
+        raise NotImplementedError
+
+    def delete(self, cursor, assignment_ids):
+        placeholders = ', '.join(['%s'] * len(assignment_ids))
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE assignment_id IN ({placeholders})', list(assignment_ids)
+        )
+
+    def search(self, cursor, terms, course_ids, limit):
+        """Best ``limit`` assignment ids matching all ``terms``, best first."""
+        raise NotImplementedError
+
+
+class SqliteSearchBackend(SearchBackend):
+    """FTS5 table, ranked with bm25 weighted towards titles, names and codes."""
+
+    # bm25 weights for assignment_id, course_id, then DOCUMENT_FIELDS.
+    WEIGHTS = (0, 0, 10.0, 2.0, 1.0, 6.0, 8.0, 8.0, 3.0)
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+            'assignment_id UNINDEXED, course_id UNINDEXED, '
+            'title, description, feedback, student_name, matric_number, course_code, course_title, '
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+
+    def delete(self, cursor, assignment_ids):
+        # rowid is the assignment id, so this is a primary key lookup.
+        placeholders = ', '.join(['%s'] * len(assignment_ids))
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', list(assignment_ids))
+
+    def write(self, cursor, rows):
+        self.delete(cursor, [row[0] for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, assignment_id, course_id, title, description, feedback, '
+            'student_name, matric_number, course_code, course_title) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)',
+            [(row[0], *row) for row in rows],
+        )
+
+    def search(self, cursor, terms, course_ids, limit):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+        sql = f'SELECT assignment_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+        params = [match]
+        if course_ids is not None:
+            sql += f" AND course_id IN ({', '.join(['%s'] * len(course_ids))})"
+            params += list(course_ids)
+        cursor.execute(f'{sql} ORDER BY bm25({SEARCH_TABLE}, {weights}) LIMIT %s', params + [limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Weighted tsvector column with a GIN index, ranked with ts_rank_cd."""
+
+    # setweight() class for each of DOCUMENT_FIELDS.
+    WEIGHTS = ('A', 'C', 'D', 'B', 'A', 'A', 'B')
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+            'assignment_id bigint PRIMARY KEY, course_id bigint NOT NULL, document tsvector NOT NULL)'
+        )
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING gin (document)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_course ON {SEARCH_TABLE} (course_id)')
+
+    def write(self, cursor, rows):
+        document = ' || '.join(
+            f"setweight(to_tsvector('simple', coalesce(%s, '')), '{weight}')" for weight in self.WEIGHTS
+        )
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (assignment_id, course_id, document) VALUES (%s, %s, {document}) '
+            'ON CONFLICT (assignment_id) DO UPDATE SET course_id = EXCLUDED.course_id, document = EXCLUDED.document',
+            rows,
+        )
+
+    def search(self, cursor, terms, course_ids, limit):
+        query = ' & '.join(f'{term}:*' for term in terms)
+        sql = (
+            f"SELECT assignment_id FROM {SEARCH_TABLE}, to_tsquery('simple', %s) query "
+            'WHERE document @@ query'
+        )
+        params = [query]
+        if course_ids is not None:
+            sql += ' AND course_id = ANY(%s)'
+            params.append(list(course_ids))
+        cursor.execute(f'{sql} ORDER BY ts_rank_cd(document, query) DESC LIMIT %s', params + [limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SqliteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(vendor=None):
+    """The backend for the configured database, or None when it has no full-text support."""
+    backend = BACKENDS.get(vendor or connection.vendor)
+    return backend() if backend else None
+
+
+# ---------- Indexing ----------
+def document_rows(assignments):
+    return list(assignments.order_by().values_list('pk', 'course_id', *DOCUMENT_FIELDS))
+
+
+def index_assignments(assignment_ids):
+    """
+    Rebuild the search documents of ``assignment_ids``: one SELECT and one
+    or two writes per INDEX_BATCH_SIZE ids.
+    """
+    backend = get_search_backend()
+    assignment_ids = list(assignment_ids)
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(assignment_ids), INDEX_BATCH_SIZE):
+            batch = assignment_ids[start:start + INDEX_BATCH_SIZE]
+            rows = document_rows(Assignment.objects.filter(pk__in=batch))
+            if rows:
+                backend.write(cursor, rows)
+            missing = set(batch) - {row[0] for row in rows}
+            if missing:
+                backend.delete(cursor, list(missing))
+
+
+def unindex_assignments(assignment_ids):
+    backend = get_search_backend()
+    if backend is not None and assignment_ids:
+        with connection.cursor() as cursor:
+            backend.delete(cursor, list(assignment_ids))
+
+
+def rebuild_search_index(assignment_model=Assignment, using=None, batch_size=2000):
+    """Recreate the search table and index every assignment. Returns the number indexed."""
+    db = connection if using is None else using
+    backend = get_search_backend(db.vendor)
+    if backend is None:
+        return 0
+    total = 0
+    # One transaction: in autocommit mode SQLite commits every inserted row.
+    with transaction.atomic(using=db.alias), db.cursor() as cursor:
+        backend.drop(cursor)
+        backend.create(cursor)
+        queryset = assignment_model.objects.order_by('pk').values_list('pk', 'course_id', *DOCUMENT_FIELDS)
+        batch = []
+        for row in queryset.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                backend.write(cursor, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            backend.write(cursor, batch)
+            total += len(batch)
+    return total
+
+
+# ---------- Queries ----------
+def search_assignments(text, lecturer=None, limit=20):
+    """
+    Assignments matching ``text``, best match first, limited to
+    ``lecturer``'s courses when given. Databases without a full-text
+    backend fall back to unranked substring matching.
+    """
+    terms = query_terms(text)
+    if not terms:
+        return []
+
+    assignments = Assignment.objects.select_related('student__user', 'course')
+    if lecturer is not None:
+        assignments = assignments.filter(course__lecturer=lecturer)
+
+    backend = get_search_backend()
+    if backend is None:
+        for term in terms:
+            assignments = assignments.filter(
+                Q(title__icontains=term) | Q(description__icontains=term) | Q(feedback__icontains=term)
+                | Q(student__user__full_name__icontains=term) | Q(student__matric_number__icontains=term)
+                | Q(course__code__icontains=term) | Q(course__title__icontains=term)
+            )
+        return list(assignments[:limit])
+
+    course_ids = None
+    if lecturer is not None:
+        course_ids = list(lecturer.courses_teaching.values_list('pk', flat=True))
+        if not course_ids:
+            return []
+    with connection.cursor() as cursor:
+        ranked_ids = backend.search(cursor, terms, course_ids, limit)
+    found = assignments.in_bulk(ranked_ids)
+    return [found[pk] for pk in ranked_ids if pk in found]
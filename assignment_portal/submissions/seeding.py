@@ -0,0 +1,174 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import COURSES, STUDENTS, bump_generation
+from .models import Assignment, Course, Department, Faculty, LecturerProfile, Level, StudentProfile, UserProfile
+from .search import rebuild_search_index
+from .summaries import rebuild_summaries
+
+
+LEVEL_NAMES = ['100', '200', '300', '400', '500']
+TOPICS = [
+    'Algorithms', 'Databases', 'Operating Systems', 'Networks', 'Statistics', 'Linear Algebra',
+    'Thermodynamics', 'Organic Chemistry', 'Microeconomics', 'Cell Biology', 'Compilers', 'Ethics',
+]
+KINDS = ['Essay', 'Lab Report', 'Problem Set', 'Project', 'Case Study', 'Literature Review']
+STATUS_WEIGHTS = {'pending': 40, 'under_review': 10, 'graded': 45, 'returned': 5}
+GRADES = [(70, 'A'), (60, 'B'), (50, 'C'), (45, 'D'), (40, 'E'), (0, 'F')]
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+@contextmanager
+def _explicit_timestamps():
+    # bulk_create runs pre_save, which would stamp every seeded assignment
+    # with the same "now"; spread them over the semester instead.
+    fields = [Assignment._meta.get_field(name) for name in ('date_uploaded', 'submission_date')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_portal(faculties=4, departments=5, courses=3, students=20000, assignments=200000,
+                password='password', prefix='SD', seed=0, batch_size=5000, log=None):
+    """
+    Bulk-insert a synthetic portal for benchmarking.
+
+    ``departments`` is per faculty and ``courses`` per department and level
+    (100-500). Each department gets one lecturer per two courses. Every
+    account shares one password hash, so seeding does not spend minutes in
+    the hasher. Assignments are spread over the last 120 days and the
+    summary tables and search index are rebuilt afterwards, because
+    ``bulk_create`` bypasses ``Assignment.save``. Codes and usernames start
+    with ``prefix``, which must not be in use yet.
+    """
+    log = log or (lambda message: None)
+    if Faculty.objects.filter(code__startswith=f'{prefix}F').exists():
+        raise ValidationError(f"Seed data with prefix '{prefix}' already exists.")
+    rng = random.Random(seed)
+    now = timezone.now()
+    password_hash = make_password(password)
+    levels = [Level.objects.get_or_create(name=name)[0] for name in LEVEL_NAMES]
+
+    with transaction.atomic():
+        faculty_rows = Faculty.objects.bulk_create([
+            Faculty(name=f'{prefix} Faculty {index}', code=f'{prefix}F{index:02}')
+            for index in range(faculties)
+        ])
+        department_rows = Department.objects.bulk_create([
+            Department(faculty=faculty, name=f'{prefix} Department {index}', code=f'{prefix}D{index:03}')
+            for index, faculty in enumerate(
+                faculty for faculty in faculty_rows for _ in range(departments)
+            )
+        ])
+
+        lecturers_per_department = max(1, (courses * len(levels) + 1) // 2)
+        lecturer_users = UserProfile.objects.bulk_create([
+            UserProfile(username=f'{prefix.lower()}l{index:05}', email=f'{prefix.lower()}l{index:05}@seed.example.edu',
+                        full_name=f'Lecturer {index}', user_type='lecturer', password=password_hash)
+            for index in range(len(department_rows) * lecturers_per_department)
+        ])
+        lecturer_rows = LecturerProfile.objects.bulk_create([
+            LecturerProfile(user=user, staff_id=f'{prefix}-STF{index:05}', designation='Lecturer',
+                            department=department_rows[index // lecturers_per_department],
+                            faculty_id=department_rows[index // lecturers_per_department].faculty_id)
+            for index, user in enumerate(lecturer_users)
+        ])
+
+        course_objects = []
+        for position, department in enumerate(department_rows):
+            staff = lecturer_rows[position * lecturers_per_department:(position + 1) * lecturers_per_department]
+            for level in levels:
+                for number in range(courses):
+                    course_objects.append(Course(
+                        code=f'{prefix}{position:03}{level.name[0]}{number:02}',
+                        title=f'{rng.choice(TOPICS)} {level.name[0]}{number:02}',
+                        department=department, level=level,
+                        lecturer=staff[len(course_objects) % len(staff)],
+                        deadline=now + timedelta(days=rng.randint(-30, 60)),
+                    ))
+        course_rows = Course.objects.bulk_create(course_objects, batch_size=batch_size)
+    log(f'{len(faculty_rows)} faculties, {len(department_rows)} departments, '
+        f'{len(lecturer_rows)} lecturers, {len(course_rows)} courses')
+
+    offering = {}
+    for course in course_rows:
+        offering.setdefault((course.department_id, course.level_id), []).append(course)
+
+    student_keys = []
+    for batch in _batches(range(students), batch_size):
+        with transaction.atomic():
+            users = UserProfile.objects.bulk_create([
+                UserProfile(username=f'{prefix.lower()}s{index:06}', email=f'{prefix.lower()}s{index:06}@seed.example.edu',
+                            full_name=f'Student {index}', user_type='student', password=password_hash)
+                for index in batch
+            ])
+            profiles = []
+            for index, user in zip(batch, users):
+                department = rng.choice(department_rows)
+                level = rng.choice(levels)
+                profiles.append(StudentProfile(
+                    user=user, matric_number=f'{prefix}/{index:06}', faculty_id=department.faculty_id,
+                    department=department, level=level, admission_year=now.year - int(level.name[0]) + 1,
+                ))
+            for profile in StudentProfile.objects.bulk_create(profiles):
+                student_keys.append((profile.pk, profile.department_id, profile.level_id))
+    log(f'{len(student_keys)} students')
+
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+
+    def generate():
+        for _ in range(assignments if student_keys else 0):
+            student_id, department_id, level_id = rng.choice(student_keys)
+            course = rng.choice(offering[department_id, level_id])
+            uploaded = now - timedelta(seconds=rng.randint(0, 120 * 24 * 60 * 60))
+            assignment = Assignment(
+                student_id=student_id, course=course, status=rng.choices(statuses, weights)[0],
+                title=f'{rng.choice(KINDS)}: {course.title}', deadline=course.deadline,
+                date_uploaded=uploaded, submission_date=uploaded,
+            )
+            if assignment.status in ('graded', 'returned'):
+                score = rng.randint(20, 100)
+                assignment.score = Decimal(score)
+                assignment.grade = next(grade for floor, grade in GRADES if score >= floor)
+                assignment.graded_by_id = course.lecturer_id
+                assignment.graded_date = uploaded + timedelta(days=rng.randint(1, 14))
+                assignment.feedback = 'Seeded feedback.'
+            yield assignment
+
+    created = 0
+    with _explicit_timestamps():
+        for batch in _batches(generate(), batch_size):
+            with transaction.atomic():
+                Assignment.objects.bulk_create(batch)
+            created += len(batch)
+            log(f'{created} assignments')
+
+    rebuild_summaries()
+    rebuild_search_index()
+    bump_generation(COURSES, STUDENTS)
+    return {
+        'faculties': len(faculty_rows),
+        'departments': len(department_rows),
+        'lecturers': len(lecturer_rows),
+        'courses': len(course_rows),
+        'students': len(student_keys),
+        'assignments': created,
+    }
@@ -0,0 +1,133 @@
+from rest_framework import serializers
+
+from .models import Assignment, Course, LecturerProfile, StudentProfile
+
+
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer that can be limited to some of its fields
+    (``?fields=a,b`` in the API) and knows which relations each field reads.
+
+    ``Meta.related`` maps a field name to the ``select_related`` paths it
+    needs; ``setup_queryset`` joins only those of the requested fields, so a
+    serializer and its query plan cannot drift apart.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """The field names in the comma separated ``value``, or None for all of them."""
+        if not value:
+            return None
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = sorted(set(fields) - set(cls.Meta.fields))
+        if unknown:
+            raise serializers.ValidationError({'fields': [f"Unknown field(s): {', '.join(unknown)}."]})
+        return fields
+
+    @classmethod
+    def setup_queryset(cls, queryset, fields=None):
+        related = getattr(cls.Meta, 'related', {})
+        paths = {path for name, names in related.items() if fields is None or name in fields for path in names}
+        return queryset.select_related(*sorted(paths)) if paths else queryset
+
+
+class CourseSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Course
+        fields = ['id', 'code', 'title']
+
+
+class LecturerSummarySerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(source='user.full_name')
+
+    class Meta:
+        model = LecturerProfile
+        fields = ['id', 'staff_id', 'full_name']
+
+
+class StudentSummarySerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(source='user.full_name')
+
+    class Meta:
+        model = StudentProfile
+        fields = ['id', 'matric_number', 'full_name']
+
+
+# ---------- Resources ----------
+class AssignmentSerializer(SparseFieldsetSerializer):
+    course = CourseSummarySerializer()
+    student = StudentSummarySerializer()
+
+    class Meta:
+        model = Assignment
+        fields = [
+            'id', 'title', 'description', 'course', 'student', 'status', 'grade', 'score',
+            'feedback', 'deadline', 'date_uploaded', 'graded_date', 'upload_status',
+        ]
+        related = {
+            'course': ['course'],
+            'student': ['student__user'],
+        }
+
+
+class CourseSerializer(SparseFieldsetSerializer):
+    department = serializers.CharField(source='department.code')
+    level = serializers.CharField(source='level.name')
+    lecturer = LecturerSummarySerializer(allow_null=True)
+
+    class Meta:
+        model = Course
+        fields = [
+            'id', 'code', 'title', 'description', 'credit_units', 'deadline',
+            'department', 'level', 'lecturer', 'is_active',
+        ]
+        related = {
+            'department': ['department'],
+            'level': ['level'],
+            'lecturer': ['lecturer__user'],
+        }
+
+
+class StudentSerializer(SparseFieldsetSerializer):
+    full_name = serializers.CharField(source='user.full_name')
+    email = serializers.EmailField(source='user.email')
+    faculty = serializers.CharField(source='faculty.code', allow_null=True)
+    department = serializers.CharField(source='department.code', allow_null=True)
+    level = serializers.CharField(source='level.name', allow_null=True)
+
+    class Meta:
+        model = StudentProfile
+        fields = [
+            'id', 'matric_number', 'full_name', 'email', 'faculty', 'department', 'level', 'admission_year',
+        ]
+        related = {
+            'full_name': ['user'],
+            'email': ['user'],
+            'faculty': ['faculty'],
+            'department': ['department'],
+            'level': ['level'],
+        }
+
+
+class LecturerSerializer(SparseFieldsetSerializer):
+    full_name = serializers.CharField(source='user.full_name')
+    email = serializers.EmailField(source='user.email')
+    department = serializers.CharField(source='department.code', allow_null=True)
+
+    class Meta:
+        model = LecturerProfile
+        fields = [
+            'id', 'staff_id', 'full_name', 'email', 'department', 'designation',
+            'office_location', 'office_hours',
+        ]
+        related = {
+            'full_name': ['user'],
+            'email': ['user'],
+            'department': ['department'],
+        }
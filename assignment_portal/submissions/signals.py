@@ -0,0 +1,103 @@
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import COURSES, STUDENTS, bump_generation, student_generation
+from .models import Assignment, Course, LecturerProfile, StudentProfile, UserProfile
+from .roles import invalidate_role
+from .search import INDEXED_FIELDS, index_assignments, unindex_assignments
+from .summaries import record_assignment_changes
+from .throttling import clear_failures, record_failure, record_outcome
+
+
+# ---------- Role Generations ----------
+@receiver(post_save, sender=UserProfile)
+def invalidate_role_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and 'user_type' not in update_fields):
+        return
+    invalidate_role(instance)
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+@receiver([post_save, post_delete], sender=LecturerProfile)
+def invalidate_role_on_profile_change(sender, instance, **kwargs):
+    invalidate_role(instance.user)
+
+
+# ---------- Dashboard Caches ----------
+@receiver([post_save, post_delete], sender=Course)
+@receiver(post_save, sender=LecturerProfile)
+def invalidate_course_lists(sender, **kwargs):
+    bump_generation(COURSES)
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def invalidate_student_caches(sender, instance, **kwargs):
+    bump_generation(STUDENTS, student_generation(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Assignment)
+def invalidate_assignment_caches(sender, instance, **kwargs):
+    bump_generation(student_generation(instance.student_id))
+
+
+# ---------- Statistics ----------
+@receiver(post_delete, sender=Assignment)
+def remove_assignment_from_summaries(sender, instance, **kwargs):
+    # Runs inside the delete's transaction, cascades included.
+    record_assignment_changes([(instance.summary_state(), None)])
+
+
+# ---------- Search Index ----------
+def _touches(update_fields, fields):
+    return update_fields is None or bool(set(update_fields) & set(fields))
+
+
+@receiver(post_save, sender=Assignment)
+def index_assignment(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, INDEXED_FIELDS | {'student_id', 'course_id'}):
+        index_assignments([instance.pk])
+
+
+@receiver(post_delete, sender=Assignment)
+def unindex_assignment(sender, instance, **kwargs):
+    unindex_assignments([instance.pk])
+
+
+@receiver(post_save, sender=UserProfile)
+def reindex_student_name(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _touches(update_fields, ['full_name']):
+        index_assignments(Assignment.objects.filter(student__user=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=StudentProfile)
+def reindex_student(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _touches(update_fields, ['matric_number', 'user', 'user_id']):
+        index_assignments(instance.assignments.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Course)
+def reindex_course(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _touches(update_fields, ['code', 'title']):
+        index_assignments(instance.assignments.values_list('pk', flat=True))
+
+
+# ---------- Login Throttling ----------
+@receiver(user_login_failed)
+def count_failed_login(sender, credentials, request=None, **kwargs):
+    if request is None:
+        return
+    username = credentials.get('username')
+    if getattr(request, 'login_throttled', False):
+        record_outcome(request, username, 'throttled')
+        return
+    record_failure(request, username)
+    record_outcome(request, username, 'failed')
+
+
+@receiver(user_logged_in)
+def reset_login_failures(sender, request, user, **kwargs):
+    if request is None:
+        return
+    clear_failures(request, user.get_username())
+    record_outcome(request, user.get_username(), 'success')
@@ -0,0 +1,399 @@
+import hashlib
+import logging
+import random
+import re
+import struct
+import zipfile
+import zlib
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+from io import BytesIO
+from itertools import combinations
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Assignment, SimilarityBucket, SubmissionFingerprint
+from .storage import file_extension, get_blob_store
+
+
+logger = logging.getLogger('submissions.similarity')
+
+TEXT_EXTENSIONS = {'.txt', '.md', '.csv', '.tex', '.html', '.py', '.java', '.c', '.cpp', '.js'}
+MERSENNE_PRIME = (1 << 61) - 1
+PERMUTATION_SEED = 2718
+
+
+# ---------- Text Extraction ----------
+_DOCX_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_PDF_OBJECT_RE = re.compile(rb'(\d+)\s+\d+\s+obj\b(.*?)\bendobj', re.S)
+_PDF_STREAM_RE = re.compile(rb'stream\r?\n(.*?)\r?\n?endstream', re.S)
+_PDF_TEXT_RE = re.compile(rb'BT\s(.*?)\sET', re.S)
+# Literal and hex strings, names, numbers and the text-showing, font and
+# positioning operators.
+_PDF_TOKEN_RE = re.compile(
+    rb'\((?:[^()\\]|\\.|\((?:[^()\\]|\\.)*\))*\)|<[0-9A-Fa-f\s]*>|/[^\s/<>\[\]()]+|-?\d*\.?\d+'
+    rb'|T\*|Td|TD|Tf|Tj|TJ|\'|"',
+    re.S,
+)
+_PDF_ESCAPE_RE = re.compile(rb'\\([0-7]{1,3}|.)', re.S)
+_PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f', b'\n': b'', b'\r': b''}
+_PDF_FONTS_RE = re.compile(rb'/Font\s*(?:<<(.*?)>>|(\d+)\s+\d+\s+R)', re.S)
+_PDF_FONT_ENTRY_RE = re.compile(rb'/([^\s/<>\[\]()]+)\s+(\d+)\s+\d+\s+R')
+_PDF_TO_UNICODE_RE = re.compile(rb'/ToUnicode\s+(\d+)\s+\d+\s+R')
+_CMAP_BFCHAR_RE = re.compile(rb'beginbfchar(.*?)endbfchar', re.S)
+_CMAP_BFRANGE_RE = re.compile(rb'beginbfrange(.*?)endbfrange', re.S)
+_CMAP_HEX_RE = re.compile(rb'<([0-9A-Fa-f\s]*)>')
+_CMAP_RANGE_RE = re.compile(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f\s]*>|\[[^\]]*\])')
+
+
+def _docx_text(data):
+    with zipfile.ZipFile(BytesIO(data)) as document:
+        root = ElementTree.fromstring(document.read('word/document.xml'))
+    paragraphs = []
+    for paragraph in root.iter(f'{_DOCX_NS}p'):
+        paragraphs.append(''.join(
+            (node.text or '') if node.tag == f'{_DOCX_NS}t' else ' '
+            for node in paragraph.iter() if node.tag in (f'{_DOCX_NS}t', f'{_DOCX_NS}tab')
+        ))
+    return '\n'.join(paragraphs)
+
+
+def _pdf_unescape(raw):
+    return _PDF_ESCAPE_RE.sub(
+        lambda match: bytes([int(match[1], 8) & 0xFF]) if match[1][:1].isdigit()
+        else _PDF_ESCAPES.get(match[1], match[1]),
+        raw,
+    )
+
+
+def _hex_bytes(raw):
+    digits = re.sub(rb'\s', b'', raw).decode('ascii')
+    return bytes.fromhex(digits + '0' * (len(digits) % 2))
+
+
+def _pdf_objects(data):
+    """``{number: (dictionary, stream)}`` for every object, including those packed in object streams."""
+    objects = {}
+    for match in _PDF_OBJECT_RE.finditer(data):
+        body, stream = match[2], _PDF_STREAM_RE.search(match[2])
+        if stream is None:
+            objects[int(match[1])] = (body, None)
+            continue
+        content = stream[1]
+        try:
+            content = zlib.decompress(content)
+        except zlib.error:
+            pass
+        objects[int(match[1])] = (body[:stream.start()], content)
+
+    for head, content in list(objects.values()):
+        first = re.search(rb'/First\s+(\d+)', head)
+        if content is None or b'/ObjStm' not in head or first is None:
+            continue
+        first = int(first[1])
+        header = [int(value) for value in content[:first].split()]
+        offsets = header[1::2] + [len(content) - first]
+        for index, number in enumerate(header[0::2]):
+            objects.setdefault(number, (content[first + offsets[index]:first + offsets[index + 1]], None))
+    return objects
+
+
+def _pdf_cmap(content):
+    """Character codes to text from a ToUnicode CMap's bfchar and bfrange entries."""
+    decode = lambda raw: _hex_bytes(raw).decode('utf-16-be', errors='replace')
+    mapping = {}
+    for block in _CMAP_BFCHAR_RE.findall(content):
+        codes = _CMAP_HEX_RE.findall(block)
+        for code, target in zip(codes[0::2], codes[1::2]):
+            mapping[_hex_bytes(code)] = decode(target)
+    for block in _CMAP_BFRANGE_RE.findall(content):
+        for start, end, target in _CMAP_RANGE_RE.findall(block):
+            low, high, width = int(start, 16), int(end, 16), len(start) // 2
+            if target.startswith(b'['):
+                targets = _CMAP_HEX_RE.findall(target)
+            else:
+                base = _hex_bytes(target[1:-1])
+                value = int.from_bytes(base, 'big')
+                targets = [
+                    (value + offset).to_bytes(len(base), 'big').hex().encode()
+                    for offset in range(min(high - low + 1, 0x10000))
+                ]
+            for offset, text in enumerate(targets[:high - low + 1]):
+                mapping[(low + offset).to_bytes(width, 'big')] = decode(text)
+    return mapping
+
+
+def _pdf_fonts(objects):
+    """Font resource names (b'F1') to the ToUnicode map of the font they name."""
+    cmaps = {}
+    for number, (head, _content) in objects.items():
+        reference = _PDF_TO_UNICODE_RE.search(head)
+        target = reference and objects.get(int(reference[1]))
+        if target and target[1]:
+            cmaps[number] = _pdf_cmap(target[1])
+    fonts = {}
+    for head, _content in objects.values():
+        for entries, reference in _PDF_FONTS_RE.findall(head):
+            if reference:
+                entries = objects.get(int(reference), (b'', None))[0]
+            for name, number in _PDF_FONT_ENTRY_RE.findall(entries):
+                if int(number) in cmaps:
+                    fonts[name] = cmaps[int(number)]
+    return fonts
+
+
+def _cmap_decode(raw, cmap):
+    widths = sorted({len(code) for code in cmap}, reverse=True) or [1]
+    text, index = [], 0
+    while index < len(raw):
+        for width in widths:
+            if raw[index:index + width] in cmap:
+                text.append(cmap[raw[index:index + width]])
+                index += width
+                break
+        else:
+            # Unmapped single-byte codes are most likely plain Latin-1.
+            text.append(chr(raw[index]) if widths[-1] == 1 else '')
+            index += widths[-1]
+    return ''.join(text)
+
+
+def _pdf_text(data):
+    # Enough of PDF for the text word processors write: content streams
+    # (Flate-compressed or not, also inside object streams) showing literal
+    # or hex strings. Strings in a font with a ToUnicode map, as Word and
+    # LibreOffice embed for their subset and CID fonts, are decoded through
+    # it; hex strings in fonts without one mean nothing and are skipped.
+    objects = _pdf_objects(data)
+    fonts = _pdf_fonts(objects)
+    text = []
+    for _head, content in objects.values():
+        if not content:
+            continue
+        font, name = None, None
+        for block in _PDF_TEXT_RE.finditer(content):
+            for token in _PDF_TOKEN_RE.findall(block[1]):
+                if token.startswith(b'('):
+                    raw = _pdf_unescape(token[1:-1])
+                    text.append(_cmap_decode(raw, font) if font else raw.decode('latin-1'))
+                elif token.startswith(b'<'):
+                    if font:
+                        text.append(_cmap_decode(_hex_bytes(token[1:-1]), font))
+                elif token.startswith(b'/'):
+                    name = token[1:]
+                elif token == b'Tf':
+                    font = fonts.get(name)
+                elif token[:1].isdigit() or token[:1] in b'-.':
+                    # A large negative kern inside TJ is a word gap.
+                    if float(token) < -200:
+                        text.append(' ')
+                elif token != b'Tj':
+                    text.append(' ')
+            text.append('\n')
+    return ''.join(text)
+
+
+def extract_text(data, extension):
+    """The text of a PDF, DOCX or plain-text file's bytes, or '' for other formats."""
+    extension = extension.lower()
+    if extension == '.pdf':
+        return _pdf_text(data)
+    if extension == '.docx':
+        return _docx_text(data)
+    if extension in TEXT_EXTENSIONS:
+        return data.decode('utf-8', errors='replace')
+    return ''
+
+
+# ---------- Fingerprints ----------
+def shingles(text, size):
+    """The set of ``size``-word runs in ``text``, ignoring case and punctuation."""
+    words = re.findall(r'\w+', text.casefold())
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[index:index + size]) for index in range(len(words) - size + 1)}
+
+
+@lru_cache
+def _permutations(num_perm):
+    # Fixed seed: signatures computed by different processes must agree.
+    rng = random.Random(PERMUTATION_SEED)
+    return [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)]
+
+
+def minhash(shingle_set, num_perm):
+    """MinHash signature of ``shingle_set``: ``num_perm`` minima of universal hashes."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big') % MERSENNE_PRIME
+        for shingle in shingle_set
+    ]
+    return [min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in _permutations(num_perm)]
+
+
+def pack_signature(signature):
+    return struct.pack(f'>{len(signature)}Q', *signature)
+
+
+def unpack_signature(data):
+    data = bytes(data)
+    return struct.unpack(f'>{len(data) // 8}Q', data)
+
+
+def estimate_similarity(signature, other):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    if not signature or len(signature) != len(other):
+        return 0.0
+    return sum(map(int.__eq__, signature, other)) / len(signature)
+
+
+def lsh_keys(signature, bands):
+    """One bucket key per band of ``signature``; similar signatures share at least one."""
+    rows = len(signature) // bands
+    return [
+        f'{band:02x}' + hashlib.blake2b(
+            pack_signature(signature[band * rows:(band + 1) * rows]), digest_size=8
+        ).hexdigest()
+        for band in range(bands)
+    ] if rows else []
+
+
+def fingerprint_file(resource):
+    """
+    ``(signature, shingle_count, error)`` for the stored file ``resource``.
+    Runs in the indexer's worker processes, so it does not touch the
+    database; failures are returned rather than raised.
+    """
+    config = settings.SIMILARITY
+    try:
+        with get_blob_store().open(resource) as source:
+            data = source.read(config['MAX_FILE_BYTES'] + 1)
+        if len(data) > config['MAX_FILE_BYTES']:
+            return [], 0, None
+        shingle_set = shingles(extract_text(data, file_extension(resource)), config['SHINGLE_SIZE'])
+    except Exception as exc:
+        return [], 0, f'{type(exc).__name__}: {exc}'
+    return (minhash(shingle_set, config['NUM_PERM']) if shingle_set else []), len(shingle_set), None
+
+
+# ---------- Index ----------
+def _current():
+    return Q(fingerprint__file=F('file'), fingerprint__course=F('course'))
+
+
+def pending_fingerprints():
+    """
+    Stored assignments with no fingerprint, one computed from another file
+    or course, or a failed read that is due for another attempt.
+    """
+    retry = Q(
+        fingerprint__failures__gt=0,
+        fingerprint__failures__lt=settings.SIMILARITY['MAX_ATTEMPTS'],
+        fingerprint__retry_at__lte=timezone.now(),
+    )
+    return Assignment.objects.filter(upload_status='stored').exclude(file__isnull=True).exclude(file='').filter(
+        Q(fingerprint__isnull=True) | ~_current() | retry
+    )
+
+
+def fingerprint_counts(course):
+    """
+    How many of ``course``'s stored submissions are ``indexed`` (compared
+    with each other), ``unreadable`` (no usable text, or still failing after
+    MAX_ATTEMPTS reads) and ``pending`` (not read yet, or awaiting a retry).
+    """
+    settled = Q(fingerprint__failures=0) | Q(fingerprint__failures__gte=settings.SIMILARITY['MAX_ATTEMPTS'])
+    counts = Assignment.objects.filter(
+        course=course, upload_status='stored'
+    ).exclude(file__isnull=True).exclude(file='').aggregate(
+        total=Count('pk'),
+        indexed=Count('pk', filter=_current() & Q(fingerprint__shingle_count__gt=0)),
+        unreadable=Count('pk', filter=_current() & Q(fingerprint__shingle_count=0) & settled),
+    )
+    total = counts.pop('total')
+    counts['pending'] = total - counts['indexed'] - counts['unreadable']
+    return counts
+
+
+def index_fingerprints(assignments, pool=None):
+    """
+    Fingerprint ``assignments`` and replace their LSH buckets; returns how
+    many were processed. Extraction and hashing, the slow part, run on
+    ``pool`` (a ProcessPoolExecutor) when one is given. Files without
+    usable text get an empty fingerprint, so they are not retried; files
+    that could not be read keep no signature and are retried with backoff.
+    """
+    rows = list(assignments.values_list('pk', 'course_id', 'file', 'fingerprint__file', 'fingerprint__failures'))
+    if not rows:
+        return 0
+    config = settings.SIMILARITY
+    names = [row[2] for row in rows]
+    results = list(pool.map(fingerprint_file, names) if pool else map(fingerprint_file, names))
+
+    with transaction.atomic():
+        SimilarityBucket.objects.filter(fingerprint_id__in=[row[0] for row in rows]).delete()
+        buckets = []
+        for (pk, course_id, name, previous_file, failures), (signature, shingle_count, error) in zip(rows, results):
+            if error:
+                failures = (failures or 0) + 1 if previous_file == name else 1
+                logger.warning('fingerprint_failed assignment=%s attempt=%s error=%r', pk, failures, error)
+            else:
+                failures = 0
+            SubmissionFingerprint.objects.update_or_create(assignment_id=pk, defaults={
+                'course_id': course_id,
+                'file': name,
+                'signature': pack_signature(signature),
+                'shingle_count': shingle_count,
+                'failures': failures,
+                'retry_at': timezone.now() + timedelta(
+                    seconds=config['RETRY_BACKOFF'] * 2 ** (failures - 1)
+                ) if error else None,
+                'last_error': error or '',
+            })
+            buckets.extend(
+                SimilarityBucket(fingerprint_id=pk, course_id=course_id, key=key)
+                for key in lsh_keys(signature, config['BANDS'])
+            )
+        SimilarityBucket.objects.bulk_create(buckets, batch_size=1000)
+    logger.info('fingerprints_indexed count=%d buckets=%d', len(rows), len(buckets))
+    return len(rows)
+
+
+def similar_pairs(course, threshold=None):
+    """
+    ``(similarity, assignment_id, other_assignment_id)`` for submissions to
+    ``course`` whose estimated similarity is at least ``threshold``, most
+    similar first. Only fingerprints sharing an LSH bucket are compared, so
+    the cost follows the number of near-duplicates, not the square of the
+    cohort. Pairs from the same student (resubmissions) are left out.
+    """
+    threshold = settings.SIMILARITY['THRESHOLD'] if threshold is None else threshold
+    course_buckets = SimilarityBucket.objects.filter(course=course)
+    collided = course_buckets.values('key').annotate(size=Count('id')).filter(size__gt=1).values('key')
+    members = defaultdict(list)
+    for key, fingerprint_id in course_buckets.filter(key__in=collided).values_list('key', 'fingerprint_id'):
+        members[key].append(fingerprint_id)
+    candidates = {pair for ids in members.values() for pair in combinations(sorted(ids), 2)}
+    if not candidates:
+        return []
+
+    fingerprints = {
+        pk: (unpack_signature(signature), student_id)
+        for pk, signature, student_id in SubmissionFingerprint.objects.filter(
+            course=course, pk__in=course_buckets.filter(key__in=collided).values('fingerprint_id')
+        ).values_list('pk', 'signature', 'assignment__student_id')
+    }
+    pairs = []
+    for first, second in candidates:
+        (signature, student_id), (other, other_student_id) = fingerprints[first], fingerprints[second]
+        if student_id == other_student_id:
+            continue
+        similarity = estimate_similarity(signature, other)
+        if similarity >= threshold:
+            pairs.append((similarity, first, second))
+    pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+    return pairs
@@ -0,0 +1,103 @@
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Course, CourseStats, StudentCourseStats, StudentProfile
+
+
+PENDING_STATUSES = ('pending', 'under_review')
+
+
+# ---------- Student Statistics ----------
+def student_dashboard_stats(student):
+    """
+    Build every number shown on the student dashboard from the summary
+    tables: one row per course the student submitted to plus one per
+    current course, however many submissions there are.
+    """
+    current_course = Q(
+        course__department_id=student.department_id,
+        course__level_id=student.level_id,
+        course__is_active=True,
+    )
+
+    submission_totals = StudentCourseStats.objects.filter(student=student).aggregate(
+        total_assignments=Coalesce(Sum('submitted'), Value(0)),
+        graded_assignments=Coalesce(Sum('graded'), Value(0)),
+        pending_assignments=Coalesce(Sum('pending'), Value(0)),
+        score_sum=Sum('score_sum'),
+        score_count=Coalesce(Sum('score_count'), Value(0)),
+        completed_courses=Count('course', filter=current_course & Q(graded__gt=0)),
+    )
+
+    course_totals = Course.objects.filter(
+        department_id=student.department_id,
+        level_id=student.level_id,
+        is_active=True,
+    ).aggregate(
+        total_courses=Count('id'),
+        total_possible_assignments=Coalesce(Sum('stats__submitted'), Value(0)),
+    )
+
+    total_assignments = submission_totals['total_assignments']
+    total_courses = course_totals['total_courses']
+    total_possible = course_totals['total_possible_assignments']
+
+    completion_percentage = (
+        submission_totals['completed_courses'] / total_courses * 100
+    ) if total_courses > 0 else 0
+    submission_rate = (
+        total_assignments / total_possible * 100
+    ) if total_possible > 0 else 0
+
+    score_count = submission_totals['score_count']
+    average_grade = (
+        round(submission_totals['score_sum'] / score_count, 1)
+    ) if score_count > 0 else 'N/A'
+
+    return {
+        'total_assignments': total_assignments,
+        'graded_assignments': submission_totals['graded_assignments'],
+        'pending_assignments': submission_totals['pending_assignments'],
+        'total_courses': total_courses,
+        'completed_courses': submission_totals['completed_courses'],
+        'completion_percentage': round(completion_percentage),
+        'average_grade': average_grade,
+        'submission_rate': round(submission_rate),
+    }
+
+
+# ---------- Course Statistics ----------
+def lecturer_submission_totals(lecturer):
+    """Submission counts across all of ``lecturer``'s courses, from CourseStats."""
+    return CourseStats.objects.filter(course__lecturer=lecturer).aggregate(
+        total_assignments=Coalesce(Sum('submitted'), Value(0)),
+        graded_assignments=Coalesce(Sum('graded'), Value(0)),
+        pending_assignments=Coalesce(Sum('pending'), Value(0)),
+    )
+
+
+def attach_student_counts(courses):
+    """
+    Set ``student_count`` on each course from a single query grouped by
+    (department, level), rather than one COUNT per course.
+    """
+    courses = list(courses)
+    department_ids = {course.department_id for course in courses}
+    level_ids = {course.level_id for course in courses}
+
+    counts = {}
+    if courses:
+        rows = StudentProfile.objects.filter(
+            department_id__in=department_ids,
+            level_id__in=level_ids,
+        ).values('department_id', 'level_id').annotate(
+            student_count=Count('id')
+        ).order_by()
+        counts = {
+            (row['department_id'], row['level_id']): row['student_count']
+            for row in rows
+        }
+
+    for course in courses:
+        course.student_count = counts.get((course.department_id, course.level_id), 0)
+    return courses
@@ -0,0 +1,320 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from urllib.request import Request, urlopen
+
+from cloudinary import CloudinaryResource, uploader
+from cloudinary.models import CloudinaryField
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import models
+from django.utils.module_loading import import_string
+
+from .profiling import profiled_store
+
+
+COPY_BLOCK_SIZE = 1024 * 1024
+CONTENT_ADDRESSED_PREFIX = 'sha256/'
+
+
+def stored_name(resource):
+    """The value persisted in ``Assignment.file`` for ``resource``."""
+    if isinstance(resource, CloudinaryResource):
+        return resource.get_prep_value()
+    return str(resource)
+
+
+def file_extension(resource):
+    """Extension (with dot) of a stored file, or an empty string."""
+    if isinstance(resource, CloudinaryResource):
+        return f'.{resource.format}' if resource.format else ''
+    return Path(str(resource)).suffix
+
+
+def as_cloudinary_resource(resource):
+    """``resource`` as a CloudinaryResource, parsing names stored by the old CloudinaryField."""
+    if isinstance(resource, CloudinaryResource):
+        return resource
+    return CloudinaryField('file', resource_type='raw').parse_cloudinary_resource(str(resource))
+
+
+def file_digest(path):
+    """SHA-256 hex digest of the file at ``path``, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(COPY_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BoundedReader:
+    """Reads at most ``length`` bytes from ``source``, then reports end of file."""
+
+    def __init__(self, source, length):
+        self.source = source
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.source.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ---------- Blob Stores ----------
+class BlobStore:
+    """
+    Where assignment files live. Configure the active store with
+    ``settings.SUBMISSION_STORE``.
+    """
+
+    # True when stored names are derived from the content (see ``lookup``).
+    content_addressed = False
+
+    def open(self, resource):
+        """Return a binary file-like object for the stored ``resource``."""
+        raise NotImplementedError
+
+    def save(self, name, content):
+        """Store the binary file ``content`` and return the value to persist in ``Assignment.file``."""
+        raise NotImplementedError
+
+    def size(self, resource):
+        """Size of the stored ``resource`` in bytes."""
+        raise NotImplementedError
+
+    def open_range(self, resource, start, end):
+        """A file-like object over bytes ``start`` to ``end`` (inclusive) of ``resource``."""
+        source = self.open(resource)
+        if source.seekable():
+            source.seek(start)
+        else:
+            skipped = 0
+            while skipped < start and (block := source.read(min(COPY_BLOCK_SIZE, start - skipped))):
+                skipped += len(block)
+        return BoundedReader(source, end - start + 1)
+
+    def lookup(self, digest, extension):
+        """The stored name of content with SHA-256 ``digest``, if the store already has it."""
+        return None
+
+    def url(self, resource):
+        """A public URL for ``resource``, or None when files are only served through the portal."""
+        return None
+
+    def local_path(self, resource):
+        """Path of ``resource`` on this host's disk, or None when it lives elsewhere."""
+        return None
+
+
+class CloudinaryBlobStore(BlobStore):
+    """Fetches files over HTTPS from their Cloudinary delivery URL."""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    def open(self, resource):
+        return urlopen(self.url(resource), timeout=self.timeout)
+
+    def save(self, name, content):
+        return uploader.upload_resource(
+            content, resource_type='auto', use_filename=True, filename_override=Path(name).name
+        )
+
+    def size(self, resource):
+        with urlopen(Request(self.url(resource), method='HEAD'), timeout=self.timeout) as response:
+            return int(response.headers['Content-Length'])
+
+    def open_range(self, resource, start, end):
+        request = Request(self.url(resource), headers={'Range': f'bytes={start}-{end}'})
+        response = urlopen(request, timeout=self.timeout)
+        if response.status == 206:
+            return response
+        # The CDN ignored the Range header; skip to ``start`` ourselves.
+        response.read(start)
+        return BoundedReader(response, end - start + 1)
+
+    def url(self, resource):
+        return as_cloudinary_resource(resource).url
+
+
+class LocalBlobStore(BlobStore):
+    """Reads files from a directory, keyed by their stored name."""
+
+    def __init__(self, location=None):
+        self.location = Path(location or settings.MEDIA_ROOT)
+
+    def path(self, resource):
+        path = (self.location / stored_name(resource)).resolve()
+        if not path.is_relative_to(self.location.resolve()):
+            raise ValueError(f'{stored_name(resource)!r} is outside the store.')
+        return path
+
+    def open(self, resource):
+        return open(self.path(resource), 'rb')
+
+    def save(self, name, content):
+        # Keep CloudinaryField's "<resource_type>/<type>/" prefix so the value
+        # parses back to the same stored name.
+        name = f'raw/upload/{name}'
+        path = self.path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as target:
+            shutil.copyfileobj(content, target)
+        return name
+
+    def size(self, resource):
+        return self.path(resource).stat().st_size
+
+    def local_path(self, resource):
+        return self.path(resource)
+
+
+class ContentAddressedBlobStore(LocalBlobStore):
+    """
+    Keeps each distinct file once, at ``sha256/<ab>/<digest><extension>``
+    under ``location``. Saving content the store already has costs one hash
+    and no copy, and uploads whose content is already stored skip the
+    upload queue altogether (see ``uploads.enqueue_upload``).
+
+    Names this store did not write (rows from before the switch) are read
+    from the ``fallback`` store (an instance or dotted path), so files can
+    move over gradually with ``manage.py migrate_submission_files``.
+    """
+
+    content_addressed = True
+
+    def __init__(self, location=None, fallback=None):
+        super().__init__(location or settings.SUBMISSION_BLOB_ROOT)
+        if isinstance(fallback, str):
+            fallback = import_string(fallback)()
+        self.fallback = fallback
+
+    def name_for(self, digest, extension):
+        return f'{CONTENT_ADDRESSED_PREFIX}{digest[:2]}/{digest}{extension.lower()}'
+
+    def is_local(self, resource):
+        return stored_name(resource).startswith(CONTENT_ADDRESSED_PREFIX) or self.fallback is None
+
+    def open(self, resource):
+        return super().open(resource) if self.is_local(resource) else self.fallback.open(resource)
+
+    def open_range(self, resource, start, end):
+        if self.is_local(resource):
+            return super().open_range(resource, start, end)
+        return self.fallback.open_range(resource, start, end)
+
+    def size(self, resource):
+        return super().size(resource) if self.is_local(resource) else self.fallback.size(resource)
+
+    def url(self, resource):
+        return None if self.is_local(resource) else self.fallback.url(resource)
+
+    def local_path(self, resource):
+        return self.path(resource) if self.is_local(resource) else self.fallback.local_path(resource)
+
+    def lookup(self, digest, extension):
+        name = self.name_for(digest, extension)
+        return name if self.path(name).exists() else None
+
+    def save(self, name, content):
+        scratch = self.location / 'tmp'
+        scratch.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=scratch, delete=False) as target:
+            for block in iter(lambda: content.read(COPY_BLOCK_SIZE), b''):
+                digest.update(block)
+                target.write(block)
+        stored = self.name_for(digest.hexdigest(), Path(name).suffix)
+        path = self.path(stored)
+        if path.exists():
+            os.unlink(target.name)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Atomic, so readers never see a partly written blob.
+            os.replace(target.name, path)
+        return stored
+
+
+def get_blob_store():
+    config = settings.SUBMISSION_STORE
+    return profiled_store(import_string(config['BACKEND'])(**config.get('OPTIONS', {})))
+
+
+# ---------- Model Field ----------
+class StoredFile(str):
+    """The stored name of a submission file, as kept in ``Assignment.file``."""
+
+    @property
+    def name(self):
+        return str(self)
+
+    @property
+    def url(self):
+        return get_blob_store().url(self)
+
+
+class SubmissionFileField(models.CharField):
+    """
+    Holds the name the active BlobStore gave a file. Uploads go through the
+    upload queue rather than the field, so it never talks to a store itself;
+    model forms still get a file input, and whoever saves the form hands
+    ``cleaned_data['file']`` to ``uploads.enqueue_upload``. File objects
+    assigned to the field directly are rejected instead of being saved as
+    their client-side name.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', 255)
+        super().__init__(*args, **kwargs)
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else StoredFile(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, StoredFile):
+            return value
+        if isinstance(value, File):
+            raise ValidationError(
+                'Uploaded files must be queued with enqueue_upload, not assigned to the field.',
+                code='unstored_file',
+            )
+        return StoredFile(stored_name(value))
+
+    def get_prep_value(self, value):
+        if isinstance(value, File):
+            raise TypeError(
+                f'{self.name} holds stored names; queue {value.name!r} with enqueue_upload instead.'
+            )
+        return stored_name(value) if value else None
+
+    def save_form_data(self, instance, data):
+        # The upload itself stays in the form's cleaned_data for the queue;
+        # only "clear" (False) changes the stored name here.
+        if isinstance(data, File):
+            return
+        super().save_form_data(instance, data)
+
+    def formfield(self, **kwargs):
+        # The admin hands every CharField a text input, which would post the
+        # stored name back as if no file had been chosen.
+        widget = kwargs.get('widget')
+        if not (isinstance(widget, forms.FileInput)
+                or isinstance(widget, type) and issubclass(widget, forms.FileInput)):
+            kwargs['widget'] = forms.ClearableFileInput
+        return models.Field.formfield(self, **{'form_class': forms.FileField, **kwargs})
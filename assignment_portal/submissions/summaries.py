@@ -0,0 +1,184 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Assignment, CourseStats, StudentCourseStats
+from .stats import PENDING_STATUSES
+
+COUNTER_FIELDS = ('submitted', 'graded', 'pending', 'score_sum', 'score_count')
+
+
+def _contribution(state):
+    """What a single assignment in ``state`` adds to its summary rows."""
+    _student_id, _course_id, status, score, _uploaded = state
+    return {
+        'submitted': 1,
+        'graded': int(status == 'graded'),
+        'pending': int(status in PENDING_STATUSES),
+        'score_sum': Decimal(score) if score is not None else Decimal(0),
+        'score_count': int(score is not None),
+    }
+
+
+class _Delta:
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTER_FIELDS, 0)
+        self.last_submission_at = None
+
+    def add(self, state, sign, created=False):
+        for field, amount in _contribution(state).items():
+            self.counters[field] += sign * amount
+        uploaded = state[4]
+        if created and uploaded and (self.last_submission_at is None or uploaded > self.last_submission_at):
+            self.last_submission_at = uploaded
+
+    def is_empty(self):
+        return not any(self.counters.values()) and self.last_submission_at is None
+
+
+def _apply(model, lookup, delta):
+    """Add ``delta`` to the row matching ``lookup``, creating it on first use."""
+    changes = {field: F(field) + amount for field, amount in delta.counters.items() if amount}
+    if delta.last_submission_at is not None:
+        changes['last_submission_at'] = Greatest(
+            Coalesce('last_submission_at', Value(delta.last_submission_at)),
+            Value(delta.last_submission_at),
+        )
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    if any(amount < 0 for amount in delta.counters.values()):
+        # Removing from a row that is gone, e.g. its course is being deleted.
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **delta.counters, last_submission_at=delta.last_submission_at)
+    except IntegrityError:
+        # Another transaction created the row first; add to it instead.
+        model.objects.filter(**lookup).update(**changes)
+
+
+def record_assignment_changes(changes):
+    """
+    Fold assignment changes into CourseStats and StudentCourseStats.
+
+    ``changes`` is an iterable of ``(previous, current)`` pairs of
+    ``Assignment.summary_state()`` tuples; ``previous`` is None for a new
+    assignment and ``current`` is None for a deleted one. Deltas are summed
+    per row first, so a batch touching one course issues one UPDATE for it.
+    Must run inside the transaction that wrote the assignments.
+    """
+    by_student_course = defaultdict(_Delta)
+    by_course = defaultdict(_Delta)
+    for previous, current in changes:
+        if previous == current:
+            continue
+        for state, sign in ((previous, -1), (current, 1)):
+            if state is None:
+                continue
+            student_id, course_id = state[0], state[1]
+            created = sign > 0 and previous is None
+            by_student_course[student_id, course_id].add(state, sign, created)
+            by_course[course_id].add(state, sign, created)
+
+    for (student_id, course_id), delta in by_student_course.items():
+        if not delta.is_empty():
+            _apply(StudentCourseStats, {'student_id': student_id, 'course_id': course_id}, delta)
+    for course_id, delta in by_course.items():
+        if not delta.is_empty():
+            _apply(CourseStats, {'course_id': course_id}, delta)
+
+
+# ---------- Rebuild ----------
+def _aggregates(assignments, group_by):
+    return assignments.values(*group_by).annotate(
+        submitted=Count('id'),
+        graded=Count('id', filter=Q(status='graded')),
+        pending=Count('id', filter=Q(status__in=PENDING_STATUSES)),
+        score_sum=Coalesce(Sum('score'), Value(Decimal(0))),
+        score_count=Count('score'),
+        last_submission_at=Max('date_uploaded'),
+    ).order_by()
+
+
+def compute_summaries(assignment_model=Assignment):
+    """
+    Summary rows computed from scratch, as ``(course_rows, student_course_rows)``
+    where each is a dict keyed like the table's unique key. Takes the model so
+    migrations can pass their historical Assignment.
+    """
+    assignments = assignment_model.objects.all()
+    course_rows = {
+        row.pop('course_id'): row for row in _aggregates(assignments, ['course_id'])
+    }
+    student_course_rows = {
+        (row.pop('student_id'), row.pop('course_id')): row
+        for row in _aggregates(assignments, ['student_id', 'course_id'])
+    }
+    return course_rows, student_course_rows
+
+
+def _stored(model, key_fields):
+    fields = COUNTER_FIELDS + ('last_submission_at',)
+    rows = {}
+    for row in model.objects.values(*key_fields, *fields):
+        key = tuple(row.pop(field) for field in key_fields)
+        rows[key[0] if len(key) == 1 else key] = row
+    return rows
+
+
+def _matches(want, have):
+    empty = dict.fromkeys(COUNTER_FIELDS, 0)
+    want_counters = {field: want[field] for field in COUNTER_FIELDS} if want else empty
+    have_counters = {field: have[field] for field in COUNTER_FIELDS} if have else empty
+    if want_counters != have_counters:
+        return False
+    # Deleting the newest submission does not move last_submission_at back,
+    # so a stored value ahead of the real one is expected; one behind is not.
+    want_last = want and want['last_submission_at']
+    have_last = have and have['last_submission_at']
+    return not want_last or (have_last is not None and have_last >= want_last)
+
+
+def _diff(expected, stored):
+    drift = []
+    for key in expected.keys() | stored.keys():
+        want, have = expected.get(key), stored.get(key)
+        if not _matches(want, have):
+            drift.append((key, have, want))
+    return drift
+
+
+def find_drift():
+    """
+    Compare the stored summaries with a fresh computation. Returns
+    ``(course_drift, student_course_drift)``, lists of ``(key, stored, expected)``.
+    """
+    course_rows, student_course_rows = compute_summaries()
+    return (
+        _diff(course_rows, _stored(CourseStats, ['course_id'])),
+        _diff(student_course_rows, _stored(StudentCourseStats, ['student_id', 'course_id'])),
+    )
+
+
+def rebuild_summaries(course_stats_model=CourseStats, student_course_stats_model=StudentCourseStats,
+                      assignment_model=Assignment, batch_size=1000):
+    """Replace both summary tables with a fresh computation. Returns the number of rows written."""
+    course_rows, student_course_rows = compute_summaries(assignment_model)
+    with transaction.atomic():
+        course_stats_model.objects.all().delete()
+        student_course_stats_model.objects.all().delete()
+        course_stats_model.objects.bulk_create(
+            [course_stats_model(course_id=course_id, **row) for course_id, row in course_rows.items()],
+            batch_size=batch_size,
+        )
+        student_course_stats_model.objects.bulk_create(
+            [
+                student_course_stats_model(student_id=student_id, course_id=course_id, **row)
+                for (student_id, course_id), row in student_course_rows.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(course_rows) + len(student_course_rows)
@@ -1,3 +1,1879 @@
-from django.test import TestCase
+import csv
+import hashlib
+import os
+import random
+import tempfile
+import zipfile
+import zlib
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import ValidationError
+from django.core import mail
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.contrib.auth import authenticate
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    UserProfile, StudentProfile, LecturerProfile,
+    Faculty, Department, Level, Course, Assignment, UploadJob,
+    CourseStats, StudentCourseStats, DeadlineReminder, SubmissionFingerprint, RequestProfileSample,
+    LoginCounter,
+)
+from .benchmarks import compare_to_baseline, default_scenarios, run_benchmarks, run_scenario
+from .caching import (
+    COURSES, STUDENTS, get_current_courses, get_generation, get_lecturer_courses, get_student_dashboard_stats
+)
+from .checks import check_session_cache
+from .grading import bulk_grade
+from .middleware import RequestProfilingMiddleware
+from .pagination import paginate_keyset
+from .profiling import ProfiledBlobStore, profile_request, profile_stats, reset_profile_stats
+from .reminders import send_deadline_reminders
+from .rosters import import_courses, import_students
+from .search import search_assignments
+from .seeding import seed_portal
+from .sessions import measure_session_overhead, purge_expired_sessions
+from .similarity import (
+    estimate_similarity, extract_text, fingerprint_counts, index_fingerprints, minhash, pending_fingerprints,
+    shingles, similar_pairs,
+)
+from .storage import ContentAddressedBlobStore, LocalBlobStore, StoredFile, get_blob_store
+from .throttling import client_ip
+from .uploads import (
+    claim_jobs, enqueue_upload, migrate_submission_files, process_job, queue_stats, spool_file
+)
+from .stats import attach_student_counts, student_dashboard_stats
+from .summaries import find_drift
+
+
+# ---------- Fixtures ----------
+class SharedCacheMixin:
+    """Runs each test against a file-based default cache, shared like a production one."""
+
+    def setUp(self):
+        super().setUp()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(CACHES={**settings.CACHES, 'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir.name,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class PortalFixturesMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = Faculty.objects.create(name='Science', code='SCI')
+        cls.department = Department.objects.create(
+            faculty=cls.faculty, name='Computer Science', code='CSC'
+        )
+        cls.level = Level.objects.create(name='100')
+
+        lecturer_user = UserProfile.objects.create_user(
+            'lecturer', 'secret', email='lecturer@example.edu',
+            full_name='Ada Lecturer', user_type='lecturer'
+        )
+        cls.lecturer = LecturerProfile.objects.create(
+            user=lecturer_user, staff_id='STF001', faculty=cls.faculty,
+            department=cls.department, designation='Lecturer'
+        )
+
+    @classmethod
+    def make_course(cls, code, **kwargs):
+        kwargs.setdefault('department', cls.department)
+        kwargs.setdefault('level', cls.level)
+        kwargs.setdefault('lecturer', cls.lecturer)
+        kwargs.setdefault('title', f'Course {code}')
+        return Course.objects.create(code=code, **kwargs)
+
+    @classmethod
+    def make_student(cls, matric_number, **kwargs):
+        user = UserProfile.objects.create_user(
+            matric_number, 'secret', email=f'{matric_number}@example.edu',
+            full_name=f'Student {matric_number}'
+        )
+        kwargs.setdefault('faculty', cls.faculty)
+        kwargs.setdefault('department', cls.department)
+        kwargs.setdefault('level', cls.level)
+        return StudentProfile.objects.create(
+            user=user, matric_number=matric_number, admission_year=2024, **kwargs
+        )
+
+    @classmethod
+    def make_assignment(cls, student, course, **kwargs):
+        kwargs.setdefault('title', f'{course.code} work')
+        return Assignment.objects.create(student=student, course=course, **kwargs)
+
+
+# ---------- Statistics ----------
+class StudentDashboardStatsTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course_a = cls.make_course('CSC101')
+        cls.course_b = cls.make_course('CSC102')
+        cls.make_course('CSC199', is_active=False)
+        cls.student = cls.make_student('MAT001')
+        cls.classmate = cls.make_student('MAT002')
+
+        cls.make_assignment(cls.student, cls.course_a, status='graded', score=Decimal('70'))
+        cls.make_assignment(cls.student, cls.course_a, status='graded', score=Decimal('81'))
+        cls.make_assignment(cls.student, cls.course_b, status='under_review')
+        cls.make_assignment(cls.student, cls.course_b, status='returned')
+        cls.make_assignment(cls.classmate, cls.course_b, status='pending')
+
+    def test_statistics(self):
+        stats = student_dashboard_stats(self.student)
+
+        self.assertEqual(stats['total_assignments'], 4)
+        self.assertEqual(stats['graded_assignments'], 2)
+        self.assertEqual(stats['pending_assignments'], 1)
+        self.assertEqual(stats['total_courses'], 2)
+        self.assertEqual(stats['completed_courses'], 1)
+        self.assertEqual(stats['completion_percentage'], 50)
+        self.assertEqual(stats['average_grade'], Decimal('75.5'))
+        self.assertEqual(stats['submission_rate'], 80)
+
+    def test_statistics_without_submissions(self):
+        stats = student_dashboard_stats(self.make_student('MAT003'))
+
+        self.assertEqual(stats['total_assignments'], 0)
+        self.assertEqual(stats['average_grade'], 'N/A')
+        self.assertEqual(stats['completion_percentage'], 0)
+
+    def test_query_count_is_constant(self):
+        with self.assertNumQueries(2):
+            student_dashboard_stats(self.student)
+
+        for index in range(25):
+            self.make_assignment(self.student, self.course_a, title=f'Extra {index}')
+
+        with self.assertNumQueries(2):
+            student_dashboard_stats(self.student)
+
+
+class SummaryTablesTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+
+    def assertNoDrift(self):
+        self.assertEqual(find_drift(), ([], []))
+
+    def test_counters_follow_create_grade_and_delete(self):
+        first = self.make_assignment(self.student, self.course)
+        second = self.make_assignment(self.student, self.course, status='under_review')
+
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.submitted, stats.pending, stats.graded), (2, 2, 0))
+        self.assertEqual(stats.last_submission_at, second.date_uploaded)
+
+        first.status = 'graded'
+        first.score = Decimal('64')
+        first.save()
+        bulk_grade(self.lecturer, [{'assignment_id': second.pk, 'grade': 'A', 'score': '90'}])
+
+        stats = StudentCourseStats.objects.get(student=self.student, course=self.course)
+        self.assertEqual((stats.submitted, stats.pending, stats.graded), (2, 0, 2))
+        self.assertEqual(stats.average_score, Decimal('77'))
+        self.assertNoDrift()
+
+        first.delete()
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.submitted, stats.graded, stats.score_count), (1, 1, 1))
+        self.assertNoDrift()
+
+    def test_saves_that_do_not_touch_counted_fields_skip_the_tables(self):
+        assignment = self.make_assignment(self.student, self.course)
+        assignment.upload_status = 'failed'
+        with self.assertNumQueries(1):
+            assignment.save(update_fields=['upload_status'])
+
+    def test_deleting_a_course_removes_its_rows(self):
+        self.make_assignment(self.student, self.course)
+        self.course.delete()
+
+        self.assertFalse(CourseStats.objects.exists())
+        self.assertFalse(StudentCourseStats.objects.exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        self.make_assignment(self.student, self.course, status='graded', score=Decimal('50'))
+        Assignment.objects.update(status='pending', score=None)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stats', check=True, stdout=StringIO())
+
+        call_command('rebuild_stats', stdout=StringIO())
+        call_command('rebuild_stats', check=True, stdout=StringIO())
+        self.assertEqual(CourseStats.objects.get(course=self.course).pending, 1)
+
+
+class AttachStudentCountsTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_level = Level.objects.create(name='200')
+        for index in range(3):
+            cls.make_student(f'MAT10{index}')
+        cls.make_student('MAT200', level=cls.other_level)
+
+    def test_counts_students_per_department_and_level(self):
+        first = self.make_course('CSC101')
+        second = self.make_course('CSC201', level=self.other_level)
+        empty = self.make_course('CSC301', level=Level.objects.create(name='300'))
+
+        courses = attach_student_counts(Course.objects.order_by('code'))
+
+        self.assertEqual([course.student_count for course in courses], [3, 1, 0])
+        self.assertEqual([course.pk for course in courses], [first.pk, second.pk, empty.pk])
+
+    def test_single_query_regardless_of_course_count(self):
+        for index in range(20):
+            self.make_course(f'CSC{index:03d}')
+
+        with self.assertNumQueries(2):
+            attach_student_counts(Course.objects.filter(lecturer=self.lecturer))
+
+
+# ---------- Indexes ----------
+class ExplainQueriesCommandTests(TestCase):
+    def test_hot_view_queries_use_indexes(self):
+        # Raises CommandError if any query plan contains a full table scan.
+        call_command('explain_queries', stdout=StringIO())
+
+
+# ---------- Pagination ----------
+class KeysetPaginationTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+        for index in range(7):
+            cls.make_assignment(cls.student, cls.course, title=f'Work {index}')
+        # Ties on date_uploaded must be broken by id so no row is skipped or repeated.
+        Assignment.objects.update(date_uploaded=timezone.now())
+
+    def test_walks_every_row_once_in_stable_order(self):
+        seen = []
+        cursor = None
+        while True:
+            page = paginate_keyset(Assignment.objects.all(), cursor, per_page=3)
+            seen.extend(assignment.pk for assignment in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = list(Assignment.objects.order_by('-date_uploaded', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_later_pages_cost_one_query(self):
+        first = paginate_keyset(Assignment.objects.all(), per_page=2)
+        with self.assertNumQueries(1):
+            paginate_keyset(Assignment.objects.all(), first.next_cursor, per_page=2)
+
+    def test_rows_fragment(self):
+        self.client.force_login(self.student.user)
+
+        response = self.client.get(reverse('student_assignments_rows'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'assignment-row', count=7)
+        self.assertIsNone(response.context['next_url'])
+
+        response = self.client.get(reverse('student_assignments_rows'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+# ---------- Grading ----------
+class BulkGradeTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        other_user = UserProfile.objects.create_user(
+            'other', 'secret', email='other@example.edu', full_name='Other Lecturer'
+        )
+        other_lecturer = LecturerProfile.objects.create(
+            user=other_user, staff_id='STF002', designation='Lecturer'
+        )
+        cls.foreign_course = cls.make_course('CSC901', lecturer=other_lecturer)
+        cls.student = cls.make_student('MAT001')
+        cls.assignments = [
+            cls.make_assignment(cls.student, cls.course, title=f'Work {index}')
+            for index in range(5)
+        ]
+        cls.foreign = cls.make_assignment(cls.student, cls.foreign_course)
+
+    def test_grades_valid_rows_and_reports_the_rest(self):
+        first, second, third = self.assignments[:3]
+        rows = [
+            {'assignment_id': first.pk, 'grade': 'a', 'score': '71.5', 'feedback': 'Good'},
+            {'assignment_id': second.pk, 'grade': 'B', 'status': 'returned'},
+            {'assignment_id': third.pk, 'grade': ''},
+            {'assignment_id': third.pk, 'grade': 'C', 'score': 'abc'},
+            {'assignment_id': self.foreign.pk, 'grade': 'A'},
+            {'assignment_id': first.pk, 'grade': 'A'},
+            {'grade': 'A'},
+        ]
+
+        graded_ids, errors = bulk_grade(self.lecturer, rows)
+
+        self.assertEqual(graded_ids, [first.pk, second.pk])
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 6])
+        self.assertIn('grade', errors[2])
+        self.assertIn('assignment_id', errors[4])
+
+        first.refresh_from_db()
+        self.assertEqual((first.grade, first.score, first.status), ('A', Decimal('71.5'), 'graded'))
+        self.assertEqual(first.graded_by, self.lecturer)
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'returned')
+        self.foreign.refresh_from_db()
+        self.assertIsNone(self.foreign.grade)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        rows = [
+            {'assignment_id': assignment.pk, 'grade': 'B', 'score': '60'}
+            for assignment in self.assignments
+        ]
+        # Ownership lookup, then inside a savepoint: the bulk UPDATE, one
+        # UPDATE per summary row (here one student in one course) and the
+        # search index refresh (SELECT, DELETE, INSERT).
+        with self.assertNumQueries(9):
+            bulk_grade(self.lecturer, rows)
+
+    def test_endpoint(self):
+        self.client.force_login(self.lecturer.user)
+        response = self.client.post(
+            reverse('bulk_grade_assignments'),
+            {'grades': [{'assignment_id': self.assignments[0].pk, 'grade': 'A'}]},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'graded': [self.assignments[0].pk], 'errors': []})
+
+        response = self.client.post(
+            reverse('bulk_grade_assignments'), 'not json', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+# ---------- Exports ----------
+class GradebookExportTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+        cls.make_assignment(cls.student, cls.course, title='Essay, part 1', grade='A', score=Decimal('88.5'))
+        cls.make_assignment(cls.student, cls.make_course('CSC102'), title='Elsewhere')
+
+    def setUp(self):
+        self.client.force_login(self.lecturer.user)
+
+    def test_csv_export(self):
+        response = self.client.get(reverse('export_gradebook', args=[self.course.pk]))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="CSC101_gradebook.csv"')
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][:3], ['MAT001', 'Student MAT001', 'Essay, part 1'])
+        self.assertEqual(rows[1][5:7], ['A', '88.50'])
+
+    def test_csv_export_neutralizes_formulas(self):
+        self.make_assignment(
+            self.student, self.course, title='=HYPERLINK("http://example.com")', grade='-', feedback='@SUM(A1)',
+            score=Decimal('-1'),
+        )
+        self.student.user.full_name = '+Student'
+        self.student.user.save(update_fields=['full_name'])
+
+        response = self.client.get(reverse('export_gradebook', args=[self.course.pk]))
+
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[1][1], "'+Student")
+        row = next(row for row in rows if row[2].startswith("'="))
+        self.assertEqual(row[2], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(row[5:8], ["'-", '-1.00', "'@SUM(A1)"])
+
+    def test_xlsx_export(self):
+        response = self.client.get(
+            reverse('export_gradebook', args=[self.course.pk]), {'format': 'xlsx'}
+        )
+
+        workbook = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(workbook.testzip())
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 2)
+        self.assertIn('Essay, part 1', sheet)
+
+    def test_other_lecturers_course_is_not_found(self):
+        other_user = UserProfile.objects.create_user(
+            'other', 'secret', email='other@example.edu', full_name='Other Lecturer'
+        )
+        LecturerProfile.objects.create(user=other_user, staff_id='STF002', designation='Lecturer')
+        self.client.force_login(other_user)
+
+        response = self.client.get(reverse('export_gradebook', args=[self.course.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class SubmissionArchiveTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+        cls.make_assignment(cls.student, cls.course, title='Essay', file='raw/upload/essay.pdf', status='graded')
+        cls.make_assignment(cls.student, cls.course, title='Essay', file='raw/upload/essay2.pdf')
+        cls.make_assignment(cls.student, cls.course, title='Lost', file='raw/upload/lost.pdf')
+        cls.make_assignment(cls.student, cls.course, title='No file')
+
+    def setUp(self):
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        upload_dir = f'{store_dir.name}/raw/upload'
+        os.makedirs(upload_dir)
+        for name in ('essay', 'essay2'):
+            with open(f'{upload_dir}/{name}.pdf', 'wb') as handle:
+                handle.write(f'%PDF {name}'.encode())
+
+        settings_override = override_settings(SUBMISSION_STORE={
+            'BACKEND': 'submissions.storage.LocalBlobStore',
+            'OPTIONS': {'location': store_dir.name},
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.lecturer.user)
+
+    def download(self, **params):
+        response = self.client.get(reverse('download_submissions', args=[self.course.pk]), params)
+        self.assertTrue(response.streaming)
+        return zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+
+    def test_archive_contains_every_fetched_file(self):
+        archive = self.download()
+
+        self.assertEqual(
+            sorted(archive.namelist()),
+            ['MAT001_Essay.pdf', 'MAT001_Essay_2.pdf', 'MISSING.txt'],
+        )
+        self.assertEqual(
+            {archive.read('MAT001_Essay.pdf'), archive.read('MAT001_Essay_2.pdf')},
+            {b'%PDF essay', b'%PDF essay2'},
+        )
+        self.assertIn('MAT001_Lost.pdf', archive.read('MISSING.txt').decode())
+
+    def test_status_filter(self):
+        archive = self.download(status='graded')
+        self.assertEqual(archive.namelist(), ['MAT001_Essay.pdf'])
+
+
+# ---------- Upload Pipeline ----------
+class BrokenStore(LocalBlobStore):
+    def save(self, name, content):
+        raise OSError('storage unavailable')
+
+
+class UnreachableIndexStore(LocalBlobStore):
+    content_addressed = True
+
+    def lookup(self, digest, extension):
+        raise OSError('store index unavailable')
+
+
+class UploadPipelineTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+
+    def setUp(self):
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        self.store = LocalBlobStore(f'{work_dir.name}/store')
+        settings_override = override_settings(
+            UPLOAD_SPOOL_DIR=f'{work_dir.name}/spool', UPLOAD_MAX_ATTEMPTS=2
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def enqueue(self):
+        upload = SimpleUploadedFile('Essay Draft.pdf', b'%PDF essay')
+        assignment = Assignment(student=self.student, course=self.course, title='Essay')
+        return enqueue_upload(assignment, spool_file(upload), upload.name)
+
+    def test_assignment_is_created_before_the_file_is_stored(self):
+        job = self.enqueue()
+
+        assignment = Assignment.objects.get(pk=job.assignment_id)
+        self.assertEqual(assignment.upload_status, 'uploading')
+        self.assertFalse(assignment.file)
+        self.assertEqual(queue_stats()['queued'], 1)
+
+    def test_worker_stores_file_and_cleans_spool(self):
+        job = self.enqueue()
+
+        [claimed] = claim_jobs(10)
+        self.assertEqual(claim_jobs(10), [])
+        with self.assertLogs('submissions.uploads', 'INFO'):
+            self.assertTrue(process_job(claimed, self.store))
+
+        assignment = Assignment.objects.get(pk=job.assignment_id)
+        self.assertEqual(assignment.upload_status, 'stored')
+        with self.store.open(assignment.file) as stored:
+            self.assertEqual(stored.read(), b'%PDF essay')
+        self.assertFalse(os.path.exists(job.spool_path))
+        self.assertEqual(queue_stats()['latency_seconds']['count'], 1)
+
+    def test_failed_upload_is_retried_then_marked_failed(self):
+        job = self.enqueue()
+
+        [claimed] = claim_jobs(10)
+        with self.assertLogs('submissions.uploads', 'WARNING'):
+            self.assertFalse(process_job(claimed, BrokenStore()))
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), ('queued', 1))
+        self.assertGreater(job.available_at, timezone.now())
+
+        UploadJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+        [claimed] = claim_jobs(10)
+        with self.assertLogs('submissions.uploads', 'WARNING'):
+            process_job(claimed, BrokenStore())
+        job.refresh_from_db()
+        self.assertEqual(job.state, 'failed')
+        self.assertIn('storage unavailable', job.last_error)
+        self.assertEqual(Assignment.objects.get(pk=job.assignment_id).upload_status, 'failed')
+
+    def test_jobs_lost_by_a_worker_count_as_attempts(self):
+        job = self.enqueue()
+        lost_at = timezone.now() - timedelta(seconds=settings.UPLOAD_STALE_AFTER + 1)
+
+        claim_jobs(10)
+        UploadJob.objects.filter(pk=job.pk).update(started_at=lost_at)
+        [claimed] = claim_jobs(10)
+        self.assertEqual(claimed.attempts, 1)
+
+        UploadJob.objects.filter(pk=job.pk).update(started_at=lost_at)
+        with self.assertLogs('submissions.uploads', 'WARNING'):
+            self.assertEqual(claim_jobs(10), [])
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), ('failed', 2))
+        self.assertEqual(Assignment.objects.get(pk=job.assignment_id).upload_status, 'failed')
+
+    def test_admin_uploads_are_queued(self):
+        admin_user = UserProfile.objects.create_superuser(
+            'admin', 'secret', email='admin@example.edu', full_name='Admin'
+        )
+        self.client.force_login(admin_user)
+
+        response = self.client.post(reverse('admin:submissions_assignment_add'), {
+            'course': self.course.pk, 'student': self.student.pk, 'title': 'Admin copy',
+            'description': '', 'deadline_0': '', 'deadline_1': '', 'status': 'pending',
+            'grade': '', 'score': '', 'feedback': '', 'graded_by': '',
+            'graded_date_0': '', 'graded_date_1': '',
+            'file': SimpleUploadedFile('essay.pdf', b'%PDF admin upload'),
+        })
+        self.assertEqual(response.status_code, 302)
+
+        assignment = Assignment.objects.get(title='Admin copy')
+        self.assertEqual(assignment.upload_status, 'uploading')
+        with open(assignment.upload_job.spool_path, 'rb') as staged:
+            self.assertEqual(staged.read(), b'%PDF admin upload')
+
+    def test_admin_edits_keep_the_stored_file(self):
+        admin_user = UserProfile.objects.create_superuser(
+            'admin', 'secret', email='admin@example.edu', full_name='Admin'
+        )
+        self.client.force_login(admin_user)
+        assignment = self.make_assignment(self.student, self.course, title='Essay', file='raw/upload/essay.pdf')
+        url = reverse('admin:submissions_assignment_change', args=[assignment.pk])
+
+        with override_settings(SUBMISSION_STORE={'BACKEND': 'submissions.storage.LocalBlobStore'}):
+            self.assertContains(self.client.get(url), 'type="file" name="file"')
+        response = self.client.post(url, {
+            'course': self.course.pk, 'student': self.student.pk, 'title': 'Essay (final)',
+            'description': '', 'deadline_0': '', 'deadline_1': '', 'status': 'graded',
+            'grade': 'A', 'score': '90', 'feedback': '', 'graded_by': '',
+            'graded_date_0': '', 'graded_date_1': '',
+        })
+        self.assertEqual(response.status_code, 302)
+
+        assignment.refresh_from_db()
+        self.assertEqual((assignment.title, assignment.file), ('Essay (final)', 'raw/upload/essay.pdf'))
+        self.assertEqual(assignment.upload_status, 'stored')
+        self.assertFalse(UploadJob.objects.exists())
+
+    def test_files_cannot_be_assigned_to_the_field(self):
+        assignment = Assignment(
+            student=self.student, course=self.course, title='Essay',
+            file=SimpleUploadedFile('essay.pdf', b'%PDF'),
+        )
+        with self.assertRaises(TypeError):
+            assignment.save()
+        with self.assertRaises(ValidationError):
+            assignment.full_clean()
+
+
+class ChunkedUploadTests(PortalFixturesMixin, TestCase):
+    payload = b'%PDF-1.7 resumable upload body'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+
+    def setUp(self):
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        settings_override = override_settings(UPLOAD_SPOOL_DIR=work_dir.name, UPLOAD_CHUNK_SIZE=8)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.student.user)
+
+    def start(self, **overrides):
+        data = {'course': self.course.pk, 'title': 'Essay', 'filename': 'essay.pdf', 'size': len(self.payload)}
+        data.update(overrides)
+        return self.client.post(reverse('chunked_upload_start'), data, content_type='application/json')
+
+    def put_chunk(self, upload_id, index, checksum=None):
+        data = self.payload[index * 8:(index + 1) * 8]
+        return self.client.put(
+            reverse('chunked_upload_chunk', args=[upload_id, index]), data,
+            content_type='application/octet-stream',
+            headers={'X-Chunk-SHA256': checksum or hashlib.sha256(data).hexdigest()},
+        )
+
+    def test_interrupted_upload_resumes_from_last_acknowledged_chunk(self):
+        upload_id = self.start().json()['upload_id']
+        self.assertEqual(self.put_chunk(upload_id, 0).json()['next_chunk'], 1)
+        self.assertEqual(self.put_chunk(upload_id, 1).json()['next_chunk'], 2)
+
+        # The client reconnects and asks where to resume.
+        state = self.client.get(reverse('chunked_upload_status', args=[upload_id])).json()
+        self.assertEqual((state['next_chunk'], state['total_chunks']), (2, 4))
+
+        self.assertEqual(self.put_chunk(upload_id, 1).status_code, 200)  # replayed chunk
+        self.assertEqual(self.put_chunk(upload_id, 3).status_code, 409)  # gap
+        self.put_chunk(upload_id, 2)
+        self.put_chunk(upload_id, 3)
+
+        response = self.client.post(
+            reverse('chunked_upload_complete', args=[upload_id]),
+            headers={'X-File-SHA256': hashlib.sha256(self.payload).hexdigest()},
+        )
+        assignment = Assignment.objects.get(pk=response.json()['assignment_id'])
+        self.assertEqual(assignment.upload_status, 'uploading')
+        with open(assignment.upload_job.spool_path, 'rb') as staged:
+            self.assertEqual(staged.read(), self.payload)
+
+    def test_failed_completion_can_be_retried(self):
+        upload_id = self.start().json()['upload_id']
+        for index in range(4):
+            self.put_chunk(upload_id, index)
+        complete_url = reverse('chunked_upload_complete', args=[upload_id])
+
+        with override_settings(SUBMISSION_STORE={
+            'BACKEND': 'submissions.tests.UnreachableIndexStore', 'OPTIONS': {'location': settings.UPLOAD_SPOOL_DIR},
+        }), self.assertRaises(OSError):
+            self.client.post(complete_url)
+        self.assertFalse(Assignment.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(complete_url)
+        self.assertEqual(response.status_code, 200)
+        assignment = Assignment.objects.get(pk=response.json()['assignment_id'])
+        with open(assignment.upload_job.spool_path, 'rb') as staged:
+            self.assertEqual(staged.read(), self.payload)
+        # Completing again returns the same assignment.
+        self.assertEqual(self.client.post(complete_url).json()['assignment_id'], assignment.pk)
+        self.assertEqual(os.listdir(settings.UPLOAD_SPOOL_DIR), [Path(assignment.upload_job.spool_path).name])
+
+    def test_corrupt_chunk_is_rejected(self):
+        upload_id = self.start().json()['upload_id']
+
+        response = self.put_chunk(upload_id, 0, checksum='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['next_chunk'], 0)
+
+    def test_incomplete_upload_cannot_complete(self):
+        upload_id = self.start().json()['upload_id']
+        self.put_chunk(upload_id, 0)
+
+        response = self.client.post(reverse('chunked_upload_complete', args=[upload_id]))
+        self.assertEqual(response.status_code, 409)
+
+    def test_rejects_unsupported_files(self):
+        self.assertEqual(self.start(filename='malware.exe').status_code, 400)
+        self.assertEqual(self.start(size=21 * 1024 * 1024).status_code, 400)
+
+
+# ---------- Lecturer Admin ----------
+class LecturerAdminSiteTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lecturer.user.is_staff = True
+        cls.lecturer.user.save()
+        other_user = UserProfile.objects.create_user(
+            'other', 'secret', email='other@example.edu', full_name='Other Lecturer', is_staff=True
+        )
+        cls.other_lecturer = LecturerProfile.objects.create(
+            user=other_user, staff_id='STF002', designation='Lecturer'
+        )
+        student = cls.make_student('MAT001')
+        cls.make_assignment(student, cls.make_course('CSC101'), title='Mine')
+        cls.make_assignment(student, cls.make_course('CSC901', lecturer=cls.other_lecturer), title='Theirs')
+
+    def test_changelist_is_scoped_to_the_signed_in_lecturer(self):
+        self.client.force_login(self.lecturer.user)
+        response = self.client.get(reverse('lecturer_admin:submissions_assignment_changelist'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Mine')
+        self.assertNotContains(response, 'Theirs')
+        # Nor does the course filter offer other lecturers' courses.
+        self.assertNotContains(response, 'CSC901')
+
+    def test_course_ownership_is_read_only(self):
+        course = Course.objects.get(code='CSC101')
+        self.client.force_login(self.lecturer.user)
+
+        response = self.client.post(reverse('lecturer_admin:submissions_course_change', args=[course.pk]), {
+            'code': 'CSC999', 'title': 'Renamed', 'description': '', 'credit_units': 2,
+            'deadline_0': '', 'deadline_1': '', 'is_active': 'on',
+            'lecturer': self.other_lecturer.pk, 'department': '', 'level': '',
+        })
+        self.assertEqual(response.status_code, 302)
+
+        course.refresh_from_db()
+        self.assertEqual((course.code, course.title, course.credit_units), ('CSC101', 'Renamed', 2))
+        self.assertEqual((course.lecturer, course.department), (self.lecturer, self.department))
+
+    def test_lecturers_added_after_startup_can_sign_in(self):
+        user = UserProfile.objects.create_user(
+            'late', 'secret', email='late@example.edu', full_name='Late Lecturer', is_staff=True
+        )
+        LecturerProfile.objects.create(user=user, staff_id='STF003', designation='Lecturer')
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('lecturer_admin:index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_students_are_refused(self):
+        self.client.force_login(StudentProfile.objects.get().user)
+        response = self.client.get(reverse('lecturer_admin:index'))
+        self.assertEqual(response.status_code, 302)
+
+
+# ---------- Roles ----------
+class UserRoleTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.student = cls.make_student('MAT001')
+
+    def test_authenticated_requests_make_no_profile_queries(self):
+        self.client.force_login(self.student.user)
+        self.client.get(reverse('student_assignments_rows'))
+
+        # The session, the user joined to both profiles and the page of
+        # assignments; the role comes from the session.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('student_assignments_rows'))
+        self.assertEqual(response.wsgi_request.user_role, 'student')
+
+    def test_profile_changes_invalidate_the_cached_role(self):
+        user = self.student.user
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('login')).wsgi_request.user_role, 'student')
+
+        self.student.delete()
+        LecturerProfile.objects.create(user=user, staff_id='STF009', designation='Lecturer')
+
+        response = self.client.get(reverse('login'))
+        self.assertEqual(response.wsgi_request.user_role, 'lecturer')
+
+    def test_shared_links_follow_the_role(self):
+        self.client.force_login(self.student.user)
+        self.assertRedirects(self.client.get(reverse('dashboard')), reverse('student_dashboard'))
+        self.assertRedirects(
+            self.client.get(reverse('profile')), reverse('student_profile'), fetch_redirect_response=False
+        )
+
+        self.client.force_login(self.lecturer.user)
+        self.assertRedirects(self.client.get(reverse('dashboard')), reverse('lecturer_dashboard'))
+
+
+# ---------- Caching ----------
+class DashboardCacheTests(SharedCacheMixin, PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+        cls.assignment = cls.make_assignment(cls.student, cls.course)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_course_list_is_cached_until_a_course_changes(self):
+        get_current_courses(self.department.pk, self.level.pk)
+        with self.assertNumQueries(0):
+            courses = get_current_courses(self.department.pk, self.level.pk)
+        self.assertEqual(courses, [self.course])
+
+        self.make_course('CSC102')
+        self.assertEqual(len(get_current_courses(self.department.pk, self.level.pk)), 2)
+
+    def test_student_stats_follow_grading(self):
+        self.assertEqual(get_student_dashboard_stats(self.student)['graded_assignments'], 0)
+        with self.assertNumQueries(0):
+            get_student_dashboard_stats(self.student)
+
+        bulk_grade(self.lecturer, [{'assignment_id': self.assignment.pk, 'grade': 'A'}])
+        self.assertEqual(get_student_dashboard_stats(self.student)['graded_assignments'], 1)
+
+    def test_per_process_cache_reads_through(self):
+        with override_settings(CACHES={**settings.CACHES, 'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            get_current_courses(self.department.pk, self.level.pk)
+            with self.assertNumQueries(1):
+                get_current_courses(self.department.pk, self.level.pk)
+
+    def test_dashboard_fragments_are_served_from_the_cache(self):
+        dashboards = [
+            (self.student.user, 'student_dashboard', 'student_current_courses',
+             [self.department.pk, self.level.pk, 'COURSES']),
+            (self.lecturer.user, 'lecturer_dashboard', 'lecturer_courses',
+             [self.lecturer.pk, 'COURSES', 'STUDENTS']),
+        ]
+        for user, url_name, fragment, vary_on in dashboards:
+            with self.subTest(url_name):
+                self.client.force_login(user)
+                self.assertContains(self.client.get(reverse(url_name)), 'CSC101')
+
+                versions = {'COURSES': get_generation(COURSES), 'STUDENTS': get_generation(STUDENTS)}
+                key = make_template_fragment_key(fragment, [versions.get(value, value) for value in vary_on])
+                self.assertIn('CSC101', cache.get(key))
+                cache.set(key, '<p>Served from the fragment cache</p>')
+                self.assertContains(self.client.get(reverse(url_name)), 'Served from the fragment cache')
+
+    def test_lecturer_course_counts_follow_enrolment(self):
+        self.assertEqual(get_lecturer_courses(self.lecturer)[0].student_count, 1)
+
+        self.make_student('MAT002')
+        self.assertEqual(get_lecturer_courses(self.lecturer)[0].student_count, 2)
+
+
+# ---------- Deadline Reminders ----------
+@override_settings(REMINDER_RATE_LIMIT=0)
+class DeadlineReminderTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.due_soon = cls.make_course('CSC101', deadline=now + timedelta(hours=5))
+        cls.due_later = cls.make_course('CSC102', deadline=now + timedelta(hours=48))
+        cls.make_course('CSC103', deadline=now - timedelta(hours=1))
+        cls.make_course('CSC104', deadline=now + timedelta(hours=5), is_active=False)
+        other_level = Level.objects.create(name='200')
+        cls.make_course('CSC201', deadline=now + timedelta(hours=5), level=other_level)
+
+        cls.submitted = cls.make_student('MAT001')
+        cls.missing = cls.make_student('MAT002')
+        cls.also_missing = cls.make_student('MAT003')
+        cls.make_assignment(cls.submitted, cls.due_soon)
+        cls.make_assignment(cls.submitted, cls.due_later)
+
+    def setUp(self):
+        self.logs = self.enterContext(self.assertLogs('submissions.reminders'))
+
+    def test_reminds_students_without_a_submission_once_per_window(self):
+        sent = send_deadline_reminders(windows=[24, 72], batch_size=2)
+
+        self.assertEqual(sent, {24: 2, 72: 2})
+        recipients = sorted((message.to[0], message.subject.split()[1]) for message in mail.outbox)
+        self.assertEqual(recipients, [
+            ('MAT002@example.edu', 'CSC101'), ('MAT002@example.edu', 'CSC102'),
+            ('MAT003@example.edu', 'CSC101'), ('MAT003@example.edu', 'CSC102'),
+        ])
+        self.assertEqual(send_deadline_reminders(windows=[24, 72]), {24: 0, 72: 0})
+        self.assertEqual(DeadlineReminder.objects.count(), 4)
+        self.assertIn('reminders_sent window_hours=24 count=2 dry_run=False', self.logs.output[0])
+
+    def test_moved_deadline_triggers_a_new_reminder(self):
+        send_deadline_reminders(windows=[24])
+        Course.objects.filter(pk=self.due_soon.pk).update(deadline=timezone.now() + timedelta(hours=6))
+
+        self.assertEqual(send_deadline_reminders(windows=[24]), {24: 2})
+
+    def test_query_count_does_not_grow_with_students(self):
+        # Per window: the set-difference SELECT, then one INSERT per batch.
+        with self.assertNumQueries(2):
+            send_deadline_reminders(windows=[24])
+
+        for index in range(10):
+            self.make_student(f'MAT1{index:02}')
+        with self.assertNumQueries(2):
+            send_deadline_reminders(windows=[12])
+
+    def test_dry_run_sends_nothing(self):
+        out = StringIO()
+        call_command('send_deadline_reminders', window=[24], dry_run=True, stdout=out)
+
+        self.assertIn('24h window: 2 reminder(s) would be sent.', out.getvalue())
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(DeadlineReminder.objects.exists())
+
+
+# ---------- Search ----------
+class SearchTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101', title='Introduction to Databases')
+        cls.student = cls.make_student('CSC/2024/017')
+        cls.other_student = cls.make_student('CSC/2024/090')
+        cls.essay = cls.make_assignment(cls.student, cls.course, title='Normalisation essay')
+        cls.report = cls.make_assignment(
+            cls.other_student, cls.course, title='Lab report',
+            description='Query plans and normalisation of the schema',
+        )
+
+        other_user = UserProfile.objects.create_user(
+            'other', 'secret', email='other@example.edu', full_name='Other Lecturer', user_type='lecturer'
+        )
+        cls.other_lecturer = LecturerProfile.objects.create(
+            user=other_user, staff_id='STF002', faculty=cls.faculty,
+            department=cls.department, designation='Lecturer'
+        )
+        cls.foreign = cls.make_assignment(
+            cls.student, cls.make_course('CSC102', lecturer=cls.other_lecturer), title='Normalisation drill'
+        )
+
+    def search(self, text):
+        return search_assignments(text, lecturer=self.lecturer)
+
+    def test_ranks_title_matches_first_and_scopes_to_lecturer(self):
+        self.assertEqual(self.search('normalis'), [self.essay, self.report])
+        results = search_assignments('normalis')
+        self.assertCountEqual(results[:2], [self.essay, self.foreign])
+        self.assertEqual(results[2], self.report)
+
+    def test_matches_people_and_courses_by_prefix(self):
+        self.assertEqual(self.search('2024 017'), [self.essay])
+        self.assertEqual(self.search('csc10 databases lab'), [self.report])
+        self.assertEqual(self.search('Student CSC/2024/090'), [self.report])
+        self.assertEqual(self.search('   '), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.essay.feedback = 'Excellent treatment of functional dependencies'
+        self.essay.save()
+        self.assertEqual(self.search('functional'), [self.essay])
+
+        self.course.title = 'Relational Systems'
+        self.course.save()
+        self.assertEqual(len(self.search('relational')), 2)
+
+        self.student.user.full_name = 'Grace Hopper'
+        self.student.user.save()
+        self.assertEqual(self.search('hopper'), [self.essay])
+
+        self.report.delete()
+        self.assertEqual(self.search('lab'), [])
+
+    def test_query_count(self):
+        # Lecturer's course ids, the ranked FTS lookup, then the rows.
+        with self.assertNumQueries(3):
+            self.search('normalisation')
+
+    def test_endpoint_renders_rows(self):
+        self.client.force_login(self.lecturer.user)
+        response = self.client.get(reverse('search_assignments_rows'), {'q': 'lab'})
+
+        self.assertContains(response, 'Lab report')
+        self.assertNotContains(response, 'Normalisation essay')
+
+
+# ---------- Roster Import ----------
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+STUDENT_ROSTER = """matric_number,full_name,email,faculty,department,level,admission_year,password
+MAT100,Ada Obi,ada@example.edu,SCI,CSC,100,2025,first-pass
+MAT101,Bola Ade,bola@example.edu,SCI,CSC,100,2025,
+MAT102,Chi Eze,not-an-email,SCI,CSC,100,2025,
+MAT103,Dayo Ola,dayo@example.edu,SCI,XYZ,100,2025,
+MAT100,Ada Again,ada2@example.edu,SCI,CSC,100,2025,
+MAT001,Existing,existing@example.edu,SCI,CSC,100,2025,
+MAT104,Efe Uche,efe@example.edu,SCI,CSC,100,twenty,
+"""
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class RosterImportTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.make_student('MAT001')
+
+    def test_imports_valid_students_and_reports_the_rest(self):
+        result = import_students(StringIO(STUDENT_ROSTER), chunk_size=3, workers=1)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual([(error.line, error.key) for error in result.errors], [
+            (4, 'MAT102'), (5, 'MAT103'), (6, 'MAT100'), (7, 'MAT001'), (8, 'MAT104'),
+        ])
+        self.assertIn('already exists', result.errors[3].message)
+
+        ada = StudentProfile.objects.select_related('user').get(matric_number='MAT100')
+        self.assertEqual((ada.user.username, ada.user.user_type, ada.department), ('MAT100', 'student', self.department))
+        self.assertTrue(ada.user.check_password('first-pass'))
+        self.assertFalse(UserProfile.objects.get(username='MAT101').has_usable_password())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        rows = ''.join(
+            f'MAT2{index:02},Student {index},s{index}@example.edu,SCI,CSC,100,2025,\n' for index in range(40)
+        )
+        header = STUDENT_ROSTER.splitlines()[0] + '\n'
+        # Three lookup maps, then per chunk two duplicate checks and the two
+        # inserts inside a savepoint.
+        with self.assertNumQueries(3 + 2 + 4):
+            result = import_students(StringIO(header + rows), workers=1)
+        self.assertEqual(result.created, 40)
+
+    def test_hashes_in_a_process_pool(self):
+        result = import_students(StringIO(STUDENT_ROSTER), workers=2)
+
+        self.assertEqual(result.created, 2)
+        self.assertTrue(UserProfile.objects.get(username='MAT100').check_password('first-pass'))
+
+    def test_imports_courses(self):
+        roster = (
+            'code,title,department,level,lecturer,deadline,credit_units\n'
+            'CSC301,Compilers,CSC,100,STF001,2030-01-15T12:00,4\n'
+            'CSC302,Networks,CSC,100,STF999,,\n'
+            'CSC303,Graphics,CSC,100,,not-a-date,\n'
+        )
+        result = import_courses(StringIO(roster))
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error.line for error in result.errors], [3, 4])
+        course = Course.objects.get(code='CSC301')
+        self.assertEqual((course.lecturer, course.credit_units), (self.lecturer, 4))
+        self.assertIsNotNone(course.deadline)
+
+    def test_command_writes_error_report(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as roster:
+            roster.write(STUDENT_ROSTER)
+        self.addCleanup(os.unlink, roster.name)
+
+        out = StringIO()
+        call_command('import_roster', 'students', roster.name, workers=1, stdout=out)
+
+        report = list(csv.reader(StringIO(out.getvalue())))
+        self.assertEqual(report[0], ['line', 'key', 'error'])
+        self.assertEqual(len(report[1:6]), 5)
+        self.assertIn('Imported 2 students; 5 row(s) rejected.', out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('import_roster', 'students', '/nonexistent.csv', stdout=StringIO())
+
+    def test_admin_import_page(self):
+        admin_user = UserProfile.objects.create_superuser(
+            'root', 'secret', email='root@example.edu', full_name='Root'
+        )
+        self.client.force_login(admin_user)
+        url = reverse('admin:submissions_studentprofile_import')
+
+        self.assertContains(self.client.get(reverse('admin:submissions_studentprofile_changelist')), url)
+        upload = SimpleUploadedFile('roster.csv', STUDENT_ROSTER.encode())
+        with override_settings(PASSWORD_HASH_WORKERS=1):
+            response = self.client.post(url, {'roster': upload})
+
+        self.assertContains(response, '2 created, 5 rejected')
+        self.assertTrue(StudentProfile.objects.filter(matric_number='MAT101').exists())
+
+
+# ---------- Password Hashing ----------
+CHEAP_HASHER_COST = {
+    'argon2': {'time_cost': 1, 'memory_cost': 8, 'parallelism': 1},
+    'scrypt': {'work_factor': 2 ** 4, 'block_size': 8, 'parallelism': 1},
+    'pbkdf2': {'iterations': 10},
+}
+TUNED_HASHER_PATHS = [
+    'submissions.hashers.TunedScryptPasswordHasher',
+    'submissions.hashers.TunedPBKDF2PasswordHasher',
+]
+
+
+@override_settings(PASSWORD_HASHERS=TUNED_HASHER_PATHS, PASSWORD_HASHER_COST=CHEAP_HASHER_COST)
+class HasherPolicyTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(
+            'hasher', 'old-secret', email='hasher@example.edu', full_name='Hash Er'
+        )
+
+    def test_new_passwords_use_the_preferred_hasher(self):
+        self.assertTrue(self.user.password.startswith('scrypt$16$'))
+
+    def test_login_upgrades_old_hashes(self):
+        with override_settings(PASSWORD_HASHERS=list(reversed(TUNED_HASHER_PATHS))):
+            self.user.set_password('old-secret')
+            self.user.save()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$10$'))
+
+        self.assertTrue(self.client.login(username='hasher', password='old-secret'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$16$'))
+
+    def test_login_upgrades_hashes_with_old_costs(self):
+        cost = {**CHEAP_HASHER_COST, 'scrypt': {'work_factor': 2 ** 5, 'block_size': 8, 'parallelism': 1}}
+        with override_settings(PASSWORD_HASHER_COST=cost):
+            self.assertTrue(self.client.login(username='hasher', password='old-secret'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$32$'))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_hashers', hasher=['scrypt', 'pbkdf2'], cost=['pbkdf2:iterations=20'],
+                     seconds=0, processes=1, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn('work_factor=16', lines[1])
+        self.assertIn('iterations=20', lines[3])
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark_hashers', cost=['scrypt:rounds=3'], stdout=StringIO())
+
+
+# ---------- Login Throttling ----------
+@override_settings(
+    PASSWORD_HASHERS=TUNED_HASHER_PATHS, PASSWORD_HASHER_COST=CHEAP_HASHER_COST,
+    LOGIN_THROTTLE={'USERNAME_LIMIT': 3, 'IP_LIMIT': 5, 'WINDOW': 60, 'THROTTLED_SAMPLE_RATE': 0},
+)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(
+            'student', 'right-password', email='student@example.edu', full_name='Stu Dent'
+        )
+
+    def attempt(self, username='student', password='wrong', ip='10.0.0.1', forwarded_for=None):
+        meta = {'HTTP_X_FORWARDED_FOR': forwarded_for} if forwarded_for else {}
+        request = RequestFactory().post('/login/', REMOTE_ADDR=ip, **meta)
+        return request, authenticate(request, username=username, password=password)
+
+    def test_username_is_locked_after_repeated_failures(self):
+        for _ in range(3):
+            self.attempt()
+
+        # Refused after one read of the counters: no user lookup, no password
+        # hash, and no write for the refused attempt itself.
+        with self.assertNumQueries(1), self.assertLogs('submissions.auth', 'WARNING') as logs:
+            request, user = self.attempt(password='right-password', ip='10.0.0.2')
+        self.assertIsNone(user)
+        self.assertTrue(request.login_throttled)
+        self.assertIn("login_throttled ip=10.0.0.2 username='student'", logs.output[0])
+
+        self.assertFalse(hasattr(self.attempt('other', ip='10.0.0.3')[0], 'login_throttled'))
+
+    def test_ip_is_locked_across_usernames(self):
+        for index in range(5):
+            self.attempt(username=f'guess{index}')
+
+        with self.assertLogs('submissions.auth', 'WARNING'):
+            self.assertIsNone(self.attempt(password='right-password')[1])
+        self.assertIsNotNone(self.attempt(password='right-password', ip='10.0.0.9')[1])
+
+    @override_settings(TRUSTED_PROXIES=['192.168.0.0/24'])
+    def test_clients_behind_a_trusted_proxy_are_counted_separately(self):
+        proxy = '192.168.0.10'
+        for index in range(5):
+            self.attempt(username=f'guess{index}', ip=proxy, forwarded_for='203.0.113.7')
+
+        with self.assertLogs('submissions.auth', 'WARNING'):
+            self.assertIsNone(self.attempt(password='right-password', ip=proxy, forwarded_for='203.0.113.7')[1])
+        request, user = self.attempt(password='right-password', ip=proxy, forwarded_for='203.0.113.8')
+        self.assertIsNotNone(user)
+        self.assertEqual(client_ip(request), '203.0.113.8')
+
+        # A spoofed header only counts when a trusted proxy appended to it.
+        request = RequestFactory().get('/', REMOTE_ADDR='198.51.100.1', HTTP_X_FORWARDED_FOR='203.0.113.8')
+        self.assertEqual(client_ip(request), '198.51.100.1')
+        request = RequestFactory().get('/', REMOTE_ADDR=proxy, HTTP_X_FORWARDED_FOR='10.9.9.9, 203.0.113.9')
+        self.assertEqual(client_ip(request), '203.0.113.9')
+
+    def test_expired_windows_start_over(self):
+        for _ in range(3):
+            self.attempt()
+        LoginCounter.objects.filter(key__startswith='login-failures:').update(expires_at=timezone.now())
+
+        self.attempt()
+        self.assertEqual(LoginCounter.objects.get(key='login-failures:user:student').count, 1)
+        self.assertIsNotNone(self.attempt(password='right-password')[1])
+
+        LoginCounter.objects.filter(key='login-failures:ip:10.0.0.1').update(expires_at=timezone.now())
+        out = StringIO()
+        call_command('purge_login_counters', stdout=out)
+        self.assertIn('Removed 1 expired login counters.', out.getvalue())
+
+    def test_success_clears_the_username_count(self):
+        for _ in range(2):
+            self.attempt()
+        self.assertTrue(self.client.login(username='student', password='right-password'))
+        for _ in range(2):
+            self.attempt(ip='10.0.0.4')
+
+        self.assertIsNotNone(self.attempt(password='right-password', ip='10.0.0.5')[1])
+
+    @override_settings(LOGIN_THROTTLE={
+        'USERNAME_LIMIT': 3, 'IP_LIMIT': 5, 'WINDOW': 60, 'THROTTLED_SAMPLE_RATE': 1.0,
+    })
+    def test_login_view_reports_throttling_and_metrics(self):
+        for _ in range(3):
+            response = self.client.post(reverse('login'), {'username': 'student', 'password': 'wrong'})
+            self.assertEqual(response.status_code, 200)
+        with self.assertLogs('submissions.auth', 'WARNING'):
+            response = self.client.post(reverse('login'), {'username': 'student', 'password': 'right-password'})
+        self.assertEqual(response.status_code, 429)
+
+        staff = UserProfile.objects.create_user(
+            'staff', 'secret', email='staff@example.edu', full_name='Staff', is_staff=True
+        )
+        self.client.force_login(staff)
+        stats = self.client.get(reverse('login_attempt_status')).json()
+        # The one success is the staff sign-in above.
+        self.assertEqual(stats, {'hours': 1, 'success': 1, 'failed': 3, 'throttled': 1})
+
+
+# ---------- Sessions ----------
+class SessionTests(TestCase):
+    def make_session(self, key, expires_in):
+        return Session.objects.create(
+            session_key=key, session_data='', expire_date=timezone.now() + expires_in,
+        )
+
+    def test_purge_deletes_only_expired_sessions_in_batches(self):
+        for index in range(3):
+            self.make_session(f'expired{index}', timedelta(minutes=-1))
+        self.make_session('active', timedelta(days=1))
+
+        # One select and one delete per batch, then an empty select.
+        with self.assertNumQueries(5):
+            deleted = purge_expired_sessions(batch_size=2, engine='django.contrib.sessions.backends.db')
+        self.assertEqual(deleted, 3)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['active'])
+
+    def test_purge_command_uses_configured_engine(self):
+        self.make_session('expired', timedelta(minutes=-1))
+        out = StringIO()
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db'):
+            call_command('purge_sessions', stdout=out)
+        self.assertIn('Removed 1 expired sessions.', out.getvalue())
+
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'):
+            self.assertIsNone(purge_expired_sessions())
+
+    def test_cached_db_reads_skip_the_database(self):
+        engines = settings.SESSION_ENGINES
+        cached = measure_session_overhead(engines['cached_db'], requests=20)
+        database = measure_session_overhead(engines['db'], requests=20)
+        signed = measure_session_overhead(engines['signed_cookies'], requests=20, write_every=5)
+
+        self.assertEqual(cached['queries'], 0)
+        self.assertEqual(database['queries'], 1)
+        self.assertEqual(signed['queries'], 0)
+        self.assertGreater(signed['cookie_bytes'], cached['cookie_bytes'])
+        # The benchmark cleans up after itself.
+        self.assertFalse(Session.objects.exists())
+
+    def test_cached_sessions_require_a_shared_cache(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        database = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'sessions_check'}}
+        cached_db = settings.SESSION_ENGINES['cached_db']
+
+        with override_settings(SESSION_ENGINE=cached_db, CACHES=locmem):
+            self.assertEqual([error.id for error in check_session_cache(None)], ['submissions.E001'])
+        with override_settings(SESSION_ENGINE=cached_db, CACHES=database):
+            self.assertEqual(check_session_cache(None), [])
+        with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES['db'], CACHES=locmem):
+            self.assertEqual(check_session_cache(None), [])
+
+
+# ---------- REST API ----------
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class ApiTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.other_course = cls.make_course('CSC102', lecturer=None)
+        cls.student = cls.make_student('MAT001')
+        cls.classmate = cls.make_student('MAT002')
+        for index in range(3):
+            cls.make_assignment(cls.student, cls.course, title=f'Essay {index}')
+        cls.make_assignment(cls.classmate, cls.course)
+        cls.make_assignment(cls.student, cls.other_course)
+
+    def get(self, name, *args, **params):
+        response = self.client.get(reverse(name, args=args), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_requires_authentication(self):
+        response = self.client.get(reverse('api-assignment-list'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_assignment_list_query_count_does_not_grow_with_rows(self):
+        self.client.force_login(self.lecturer.user)
+        self.get('api-assignment-list')
+
+        # User joined to both profiles, then one joined page of assignments.
+        with self.assertNumQueries(2):
+            data = self.get('api-assignment-list')
+        self.assertEqual(len(data['results']), 4)
+        self.assertEqual(data['results'][0]['course'], {'id': self.course.pk, 'code': 'CSC101', 'title': 'Course CSC101'})
+
+        for index in range(10):
+            self.make_assignment(self.classmate, self.course, title=f'Late {index}')
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.get('api-assignment-list')['results']), 14)
+
+    def test_sparse_fieldsets_skip_unneeded_joins(self):
+        self.client.force_login(self.student.user)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get('api-assignment-list', fields='id,status')
+        self.assertEqual(set(data['results'][0]), {'id', 'status'})
+        self.assertNotIn('"submissions_course"."code"', queries[-1]['sql'])
+
+        response = self.client.get(reverse('api-assignment-list'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'fields': ['Unknown field(s): password.']})
+
+    def test_cursor_pagination(self):
+        self.client.force_login(self.student.user)
+        page = self.get('api-assignment-list', page_size=3, fields='title')
+        self.assertEqual(len(page['results']), 3)
+        self.assertIsNone(page['previous'])
+
+        rest = self.client.get(page['next']).json()
+        self.assertEqual(len(rest['results']), 1)
+        self.assertIsNone(rest['next'])
+
+    def test_rows_are_scoped_to_the_caller(self):
+        self.client.force_login(self.student.user)
+        self.assertEqual(len(self.get('api-assignment-list')['results']), 4)
+        courses = self.get('api-course-list')['results']
+        self.assertEqual([course['code'] for course in courses], ['CSC101', 'CSC102'])
+        self.assertEqual(courses[1]['lecturer'], None)
+        self.assertEqual([row['matric_number'] for row in self.get('api-student-list')['results']], ['MAT001'])
+        self.assertEqual(self.get('api-lecturer-list')['results'], [])
+
+        self.client.force_login(self.lecturer.user)
+        self.assertEqual([course['code'] for course in self.get('api-course-list')['results']], ['CSC101'])
+        students = self.get('api-student-list')['results']
+        self.assertEqual([row['matric_number'] for row in students], ['MAT001', 'MAT002'])
+        self.assertEqual(students[0]['department'], 'CSC')
+
+    def test_nested_collections(self):
+        self.client.force_login(self.lecturer.user)
+        self.get('api-student-assignments', self.student.pk)
+
+        # User, the student, then one page of assignments from own courses only.
+        with self.assertNumQueries(3):
+            data = self.get('api-student-assignments', self.student.pk)
+        self.assertEqual(len(data['results']), 3)
+
+        with self.assertNumQueries(3):
+            courses = self.get('api-lecturer-courses', self.lecturer.pk, fields='code,lecturer')['results']
+        self.assertEqual(courses, [{
+            'code': 'CSC101',
+            'lecturer': {'id': self.lecturer.pk, 'staff_id': 'STF001', 'full_name': 'Ada Lecturer'},
+        }])
+
+
+# ---------- Seed Data & Benchmarks ----------
+class SeedDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.counts = seed_portal(
+            faculties=1, departments=2, courses=1, students=6, assignments=40, prefix='TS', batch_size=16,
+        )
+
+    def test_seeded_rows_are_consistent(self):
+        self.assertEqual(self.counts, {
+            'faculties': 1, 'departments': 2, 'lecturers': 6, 'courses': 10, 'students': 6, 'assignments': 40,
+        })
+        self.assertEqual(find_drift(), ([], []))
+        self.assertGreater(Assignment.objects.values('date_uploaded').distinct().count(), 1)
+        for assignment in Assignment.objects.select_related('student', 'course'):
+            self.assertEqual(
+                (assignment.course.department_id, assignment.course.level_id),
+                (assignment.student.department_id, assignment.student.level_id),
+            )
+        self.assertTrue(search_assignments(Course.objects.first().code))
+
+        with self.assertRaisesMessage(CommandError, "Seed data with prefix 'TS' already exists."):
+            call_command('seed_data', prefix='TS', verbosity=0)
+
+    def test_benchmarks_roll_back_and_report(self):
+        before = Assignment.objects.count()
+        results = run_benchmarks(iterations=2, warmup=1)
+
+        self.assertEqual(Assignment.objects.count(), before)
+        self.assertFalse(Assignment.objects.filter(title='Benchmark upload').exists())
+        self.assertFalse(UploadJob.objects.exists())
+        self.assertEqual(set(results), {scenario.name for scenario in default_scenarios()})
+        self.assertEqual(results['api_assignments']['status'], 200)
+        self.assertEqual(results['upload_assignment']['status'], 302)
+        self.assertEqual(results['bulk_grade_assignments']['status'], 200)
+
+        slower = {name: {**result, 'queries': result['queries'] + 1} for name, result in results.items()}
+        self.assertEqual(compare_to_baseline(results, results), [])
+        self.assertEqual(
+            compare_to_baseline(slower, {'api_courses': results['api_courses']}),
+            [f"api_courses: {results['api_courses']['queries']} -> {slower['api_courses']['queries']} queries"],
+        )
+
+    def test_benchmark_fails_when_form_is_rerendered(self):
+        upload = next(scenario for scenario in default_scenarios() if scenario.name == 'upload_assignment')
+        untitled = upload._replace(data={**upload.data, 'title': ''})
+
+        with self.assertRaisesMessage(ValidationError, 'upload_assignment: expected status 302, got 200.'):
+            run_scenario(untitled, iterations=1, warmup=0)
+
+
+# ---------- Request Profiling ----------
+PROFILE_EVERY_REQUEST = {**settings.REQUEST_PROFILING, 'SAMPLE_RATE': 1.0, 'DUPLICATE_QUERY_THRESHOLD': 3}
+
+
+class RequestProfilingTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+        cls.make_assignment(cls.student, cls.course)
+
+    def setUp(self):
+        reset_profile_stats()
+
+    def test_profile_covers_sql_templates_and_storage(self):
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+
+        def view(request):
+            for _ in range(3):
+                Course.objects.get(pk=self.course.pk)
+            get_blob_store().save('notes.txt', BytesIO(b'notes'))
+            return HttpResponse(render_to_string('submissions/partials/assignment_rows.html', {'page': []}))
+
+        with override_settings(SUBMISSION_STORE={
+            'BACKEND': 'submissions.storage.LocalBlobStore', 'OPTIONS': {'location': store_dir.name},
+        }):
+            profile, response = profile_request(view, RequestFactory().get('/'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(profile.queries, 3)
+        self.assertEqual([count for count, _sql in profile.duplicates(3)], [3])
+        self.assertGreater(profile.sql_time, 0)
+        self.assertGreater(profile.template_time, 0)
+        self.assertGreater(profile.storage_time, 0)
+        # Nothing is recorded outside a profiled request.
+        self.assertNotIsInstance(get_blob_store(), ProfiledBlobStore)
+
+    @override_settings(REQUEST_PROFILING=PROFILE_EVERY_REQUEST)
+    def test_sampled_requests_are_logged_and_aggregated(self):
+        self.client.force_login(self.student.user)
+        with self.assertLogs('submissions.profiling', 'INFO') as logs:
+            self.client.get(reverse('student_assignments_rows'))
+            self.client.get(reverse('student_assignments_rows'))
+        self.assertIn('request_profile view=student_assignments_rows method=GET status=200', logs.output[0])
+
+        staff = UserProfile.objects.create_user(
+            'staff', 'secret', email='staff@example.edu', full_name='Staff', is_staff=True
+        )
+        self.client.force_login(staff)
+        with self.assertLogs('submissions.profiling', 'INFO'):
+            stats = self.client.get(reverse('request_profile_status')).json()
+        self.assertEqual(stats['sample_rate'], 1.0)
+        rows = stats['views']['student_assignments_rows']
+        self.assertEqual(rows['requests'], 2)
+        self.assertGreater(rows['avg_queries'], 0)
+        self.assertGreater(rows['avg_template_ms'], 0)
+        self.assertEqual(rows['requests_with_duplicates'], 0)
+
+        with self.assertLogs('submissions.profiling', 'INFO'):
+            self.client.post(reverse('request_profile_status'))
+        self.assertEqual(list(profile_stats()), ['request_profile_status'])
+
+    @override_settings(REQUEST_PROFILING=PROFILE_EVERY_REQUEST)
+    def test_streaming_responses_are_timed_until_closed(self):
+        def rows():
+            for _ in range(2):
+                yield Course.objects.get(pk=self.course.pk).code
+
+        middleware = RequestProfilingMiddleware(lambda request: StreamingHttpResponse(rows()))
+        response = middleware(RequestFactory().get('/'))
+        self.assertEqual(profile_stats(), {})
+
+        with self.assertLogs('submissions.profiling', 'INFO') as logs:
+            self.assertEqual(b''.join(response.streaming_content), b'CSC101CSC101')
+            response.close()
+        self.assertIn('queries=2', logs.output[0])
+        self.assertEqual(profile_stats()['<unresolved>']['avg_queries'], 2)
+
+    def test_disabled_by_default(self):
+        self.client.force_login(self.student.user)
+        self.client.get(reverse('student_assignments_rows'))
+        self.assertEqual(profile_stats(), {})
+
+    def test_old_samples_are_purged(self):
+        sample = {'wall_us': 1000, 'queries': 1, 'sql_us': 10, 'template_us': 0, 'storage_us': 0}
+        old = RequestProfileSample.objects.create(view_name='old', **sample)
+        RequestProfileSample.objects.filter(pk=old.pk).update(recorded_at=timezone.now() - timedelta(days=8))
+        RequestProfileSample.objects.create(view_name='recent', **sample)
+
+        out = StringIO()
+        call_command('purge_profile_samples', stdout=out)
+        self.assertIn('Removed 1 profiling samples.', out.getvalue())
+        self.assertEqual(list(profile_stats()), ['recent'])
+
+
+# ---------- Content-Addressed Storage ----------
+class ContentAddressedStoreTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+
+    def setUp(self):
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        self.legacy = LocalBlobStore(f'{work_dir.name}/legacy')
+        self.store = ContentAddressedBlobStore(f'{work_dir.name}/blobs', fallback=self.legacy)
+        settings_override = override_settings(
+            UPLOAD_SPOOL_DIR=f'{work_dir.name}/spool',
+            SUBMISSION_STORE={
+                'BACKEND': 'submissions.storage.ContentAddressedBlobStore',
+                'OPTIONS': {'location': f'{work_dir.name}/blobs', 'fallback': self.legacy},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_identical_content_is_stored_once(self):
+        first = self.store.save('essay.PDF', BytesIO(b'%PDF same'))
+        second = self.store.save('copy.pdf', BytesIO(b'%PDF same'))
+        other = self.store.save('essay.pdf', BytesIO(b'%PDF different'))
+
+        digest = hashlib.sha256(b'%PDF same').hexdigest()
+        self.assertEqual(first, f'sha256/{digest[:2]}/{digest}.pdf')
+        self.assertEqual(second, first)
+        self.assertNotEqual(other, first)
+        self.assertEqual(self.store.lookup(digest, '.pdf'), first)
+        self.assertEqual(sorted(path.name for path in self.store.location.rglob('*') if path.is_file()),
+                         sorted([Path(first).name, Path(other).name]))
+
+    def test_ranges_and_legacy_names(self):
+        name = self.store.save('essay.pdf', BytesIO(b'0123456789'))
+        self.assertEqual(self.store.size(name), 10)
+        with self.store.open_range(name, 2, 5) as part:
+            self.assertEqual(part.read(), b'2345')
+
+        legacy_name = self.legacy.save('old.pdf', BytesIO(b'legacy bytes'))
+        self.assertEqual(legacy_name, 'raw/upload/old.pdf')
+        with self.store.open(legacy_name) as legacy:
+            self.assertEqual(legacy.read(), b'legacy bytes')
+        with self.store.open_range(legacy_name, 7, 11) as part:
+            self.assertEqual(part.read(), b'bytes')
+
+    def test_resubmitting_stored_content_skips_the_queue(self):
+        stored = self.store.save('essay.pdf', BytesIO(b'%PDF essay'))
+        upload = SimpleUploadedFile('Essay Again.pdf', b'%PDF essay')
+        spooled = spool_file(upload)
+
+        assignment = Assignment(student=self.student, course=self.course, title='Essay')
+        with self.captureOnCommitCallbacks(execute=True), self.assertLogs('submissions.uploads', 'INFO'):
+            self.assertIsNone(enqueue_upload(assignment, spooled, upload.name))
+
+        assignment = Assignment.objects.get(pk=assignment.pk)
+        self.assertEqual((assignment.file, assignment.upload_status), (stored, 'stored'))
+        self.assertIsInstance(assignment.file, StoredFile)
+        self.assertFalse(UploadJob.objects.exists())
+        self.assertFalse(spooled.exists())
+
+    def test_migrating_legacy_files(self):
+        names = [self.legacy.save(f'{index}.pdf', BytesIO(b'shared')) for index in range(2)]
+        rows = [self.make_assignment(self.student, self.course, file=name) for name in names]
+        missing = self.make_assignment(self.student, self.course, file='raw/upload/v1/gone.pdf')
+        self.make_assignment(self.student, self.course)
+
+        out = StringIO()
+        call_command('migrate_submission_files', dry_run=True, stdout=out)
+        self.assertIn('3 files to migrate.', out.getvalue())
+
+        with self.assertLogs('submissions.uploads', 'WARNING'):
+            copied, failed = migrate_submission_files(self.legacy, workers=2)
+        self.assertEqual(copied, 2)
+        self.assertEqual([pk for pk, _error in failed], [missing.pk])
+
+        migrated = {Assignment.objects.get(pk=row.pk).file for row in rows}
+        self.assertEqual(len(migrated), 1)
+        with self.store.open(migrated.pop()) as blob:
+            self.assertEqual(blob.read(), b'shared')
+        self.assertEqual(Assignment.objects.get(pk=missing.pk).file, 'raw/upload/v1/gone.pdf')
+
+
+class DownloadTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.student = cls.make_student('MAT001')
+        cls.other = cls.make_student('MAT002')
+
+    def setUp(self):
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        self.legacy = LocalBlobStore(f'{work_dir.name}/legacy')
+        settings_override = override_settings(
+            SUBMISSION_BLOB_ROOT=f'{work_dir.name}/blobs',
+            SUBMISSION_STORE={
+                'BACKEND': 'submissions.storage.ContentAddressedBlobStore',
+                'OPTIONS': {'fallback': self.legacy},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        name = get_blob_store().save('essay.pdf', BytesIO(b'0123456789'))
+        self.assignment = self.make_assignment(self.student, self.course, title='Essay', file=name)
+        self.url = reverse('download_assignment_file', args=[self.assignment.pk])
+
+    def test_only_the_student_and_course_lecturer_can_download(self):
+        self.client.force_login(self.other.user)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        for user in (self.student.user, self.lecturer.user):
+            self.client.force_login(user)
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+            self.assertEqual(response['Content-Disposition'], 'attachment; filename="MAT001_Essay.pdf"')
+            self.assertEqual(response['ETag'], f'"{hashlib.sha256(b"0123456789").hexdigest()}"')
+
+    def test_conditional_and_range_requests(self):
+        self.client.force_login(self.student.user)
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=-3'})
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=20-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-5', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+    def test_front_end_server_handoff(self):
+        self.client.force_login(self.student.user)
+        with override_settings(SUBMISSION_FILE_SERVER='nginx'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/blobs/{self.assignment.file}')
+        self.assertEqual(response.content, b'')
+
+        with override_settings(SUBMISSION_FILE_SERVER='apache'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], str(get_blob_store().local_path(self.assignment.file)))
+
+    def test_legacy_and_missing_files(self):
+        legacy = self.make_assignment(
+            self.student, self.course, title='Old', file=self.legacy.save('old.pdf', BytesIO(b'legacy'))
+        )
+        missing = self.make_assignment(self.student, self.course, file='sha256/00/gone.pdf')
+        empty = self.make_assignment(self.student, self.course)
+        self.client.force_login(self.student.user)
+
+        response = self.client.get(reverse('download_assignment_file', args=[legacy.pk]))
+        self.assertEqual(b''.join(response.streaming_content), b'legacy')
+        for assignment in (missing, empty):
+            response = self.client.get(reverse('download_assignment_file', args=[assignment.pk]))
+            self.assertEqual(response.status_code, 404)
+
+
+class SimilarityTests(PortalFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = cls.make_course('CSC101')
+        cls.students = [cls.make_student(f'MAT00{index}') for index in range(1, 4)]
+
+    def setUp(self):
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        settings_override = override_settings(
+            SUBMISSION_BLOB_ROOT=f'{work_dir.name}/blobs',
+            SUBMISSION_STORE={'BACKEND': 'submissions.storage.ContentAddressedBlobStore', 'OPTIONS': {}},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @staticmethod
+    def essay(seed, words=300):
+        rng = random.Random(seed)
+        vocabulary = [f'word{index}' for index in range(2000)]
+        return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+    def submit(self, student, text, extension='.txt'):
+        name = get_blob_store().save(f'essay{extension}', BytesIO(text.encode() if isinstance(text, str) else text))
+        return self.make_assignment(student, self.course, file=name)
+
+    def test_text_extraction(self):
+        document = BytesIO()
+        with zipfile.ZipFile(document, 'w') as docx:
+            docx.writestr('word/document.xml', (
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+                '<w:p><w:r><w:t>Hello</w:t></w:r><w:r><w:tab/><w:t>world</w:t></w:r></w:p>'
+                '<w:p><w:r><w:t>Second paragraph</w:t></w:r></w:p></w:body></w:document>'
+            ))
+        self.assertEqual(extract_text(document.getvalue(), '.DOCX'), 'Hello world\nSecond paragraph')
+
+        content = zlib.compress(b'BT /F1 12 Tf 72 712 Td (Copied \\(work\\)) Tj [(sen)20(tence)-300(here)] TJ ET')
+        pdf = b'%PDF-1.4\n1 0 obj\n<< /Filter /FlateDecode >>\nstream\n' + content + b'\nendstream\nendobj\n'
+        self.assertEqual(shingles(extract_text(pdf, '.pdf'), 2), {'copied work', 'work sentence', 'sentence here'})
+        self.assertEqual(extract_text(b'\x89PNG', '.png'), '')
+
+    def test_pdf_text_in_fonts_with_a_tounicode_map(self):
+        # How Word and LibreOffice write text: glyph ids as hex strings in a
+        # subset font, mapped back to Unicode by its ToUnicode CMap.
+        def pdf_object(number, body, stream=None):
+            if stream is not None:
+                body += b'\nstream\n' + stream + b'\nendstream'
+            return f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+
+        cmap = (
+            b'begincmap 1 begincodespacerange <0000> <FFFF> endcodespacerange\n'
+            b'1 beginbfchar <0003> <0020> endbfchar\n1 beginbfrange <0041> <005A> <0061> endbfrange\nendcmap'
+        )
+        content = zlib.compress(
+            b'BT /F2 11 Tf 72 700 Td <0043004F 0050 0049 0045 0044 0003> Tj [<0057004F>-20<0052004B>] TJ ET'
+        )
+        pdf = b'%PDF-1.5\n' + b''.join([
+            pdf_object(1, b'<< /Type /Font /Subtype /Type0 /Encoding /Identity-H /ToUnicode 2 0 R >>'),
+            pdf_object(2, b'<< >>', cmap),
+            pdf_object(3, b'<< /Type /Page /Resources << /Font << /F2 1 0 R >> >> /Contents 4 0 R >>'),
+            pdf_object(4, b'<< /Filter /FlateDecode >>', content),
+        ])
+        self.assertEqual(shingles(extract_text(pdf, '.pdf'), 2), {'copied work'})
+
+    def test_minhash_estimates_jaccard_similarity(self):
+        words = self.essay(1).split()
+        first = shingles(' '.join(words), 5)
+        second = shingles(' '.join(words[:200] + self.essay(2, 100).split()), 5)
+        jaccard = len(first & second) / len(first | second)
+        estimate = estimate_similarity(minhash(first, 128), minhash(second, 128))
+        self.assertAlmostEqual(estimate, jaccard, delta=0.12)
+
+    def test_similar_pairs_from_the_lsh_index(self):
+        original = self.essay(1)
+        copied = original.replace('word1 ', 'word2 ', 3)
+        source = self.submit(self.students[0], original)
+        copy = self.submit(self.students[1], copied)
+        self.submit(self.students[2], self.essay(3))
+        # Matches the copy too, but not its own student's first attempt.
+        revised = self.submit(self.students[0], original + ' revised')
+        self.submit(self.students[2], b'\x89PNG', '.png')
+
+        with self.assertLogs('submissions.similarity', 'INFO'):
+            self.assertEqual(index_fingerprints(pending_fingerprints()), 5)
+        self.assertFalse(pending_fingerprints().exists())
+        with self.assertNumQueries(2):
+            pairs = similar_pairs(self.course)
+        self.assertEqual({(first, second) for _similarity, first, second in pairs}, {
+            (source.pk, copy.pk), (copy.pk, revised.pk),
+        })
+        self.assertGreater(pairs[0][0], 0.8)
+
+        copy.file = get_blob_store().save('essay.txt', BytesIO(self.essay(4).encode()))
+        copy.save(update_fields=['file'])
+        self.assertEqual(list(pending_fingerprints()), [copy])
+        with self.assertLogs('submissions.similarity', 'INFO'):
+            index_fingerprints(pending_fingerprints())
+        self.assertEqual(similar_pairs(self.course), [])
+
+    @override_settings(SIMILARITY={**settings.SIMILARITY, 'MAX_ATTEMPTS': 2})
+    def test_unreadable_files_are_retried_then_reported(self):
+        missing = self.make_assignment(self.students[0], self.course, file='sha256/00/missing.txt')
+
+        with self.assertLogs('submissions.similarity', 'WARNING'):
+            index_fingerprints(pending_fingerprints())
+        fingerprint = SubmissionFingerprint.objects.get(pk=missing.pk)
+        self.assertEqual((bytes(fingerprint.signature), fingerprint.failures), (b'', 1))
+        self.assertIn('FileNotFoundError', fingerprint.last_error)
+        # Waits for its retry, and meanwhile still counts as pending.
+        self.assertFalse(pending_fingerprints().exists())
+        self.assertEqual(fingerprint_counts(self.course), {'indexed': 0, 'unreadable': 0, 'pending': 1})
+
+        SubmissionFingerprint.objects.update(retry_at=timezone.now())
+        self.assertEqual(list(pending_fingerprints()), [missing])
+        with self.assertLogs('submissions.similarity', 'WARNING'):
+            index_fingerprints(pending_fingerprints())
+        SubmissionFingerprint.objects.update(retry_at=timezone.now())
+        self.assertFalse(pending_fingerprints().exists())
+        self.assertEqual(fingerprint_counts(self.course), {'indexed': 0, 'unreadable': 1, 'pending': 0})
+
+    def test_indexer_command_and_lecturer_report(self):
+        original = self.essay(1)
+        source = self.submit(self.students[0], original)
+        copy = self.submit(self.students[1], original)
+
+        out = StringIO()
+        with self.assertLogs('submissions.similarity', 'INFO'):
+            call_command('run_similarity_indexer', once=True, workers=2, stdout=out)
+        self.assertIn('Fingerprinted 2 submissions.', out.getvalue())
+        self.assertEqual(SubmissionFingerprint.objects.count(), 2)
+
+        self.client.force_login(self.lecturer.user)
+        response = self.client.get(reverse('course_similarity', args=[self.course.pk]))
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report['indexed'], report['unreadable'], report['pending']), (2, 0, 0))
+        self.assertEqual(len(report['pairs']), 1)
+        self.assertEqual(report['pairs'][0]['similarity'], 1.0)
+        self.assertEqual([item['id'] for item in report['pairs'][0]['assignments']], [source.pk, copy.pk])
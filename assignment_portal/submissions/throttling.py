@@ -0,0 +1,141 @@
+import ipaddress
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import LoginCounter
+
+
+logger = logging.getLogger('submissions.auth')
+
+OUTCOMES = ('success', 'failed', 'throttled')
+
+
+def _is_trusted_proxy(address):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXIES)
+
+
+def client_ip(request):
+    """
+    The address the request came from. Behind the proxies listed in
+    TRUSTED_PROXIES this is the right-most X-Forwarded-For entry none of
+    them added; the header is ignored when REMOTE_ADDR is not a trusted proxy.
+    """
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+    hops.append(request.META.get('REMOTE_ADDR') or 'unknown')
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0]
+
+
+def _increment(key, ttl, by=1):
+    """
+    Add ``by`` to the counter ``key``, starting a new one that lasts ``ttl``
+    seconds when it is missing or has expired. Each step is a single
+    conditional UPDATE or INSERT, so concurrent workers never lose a count.
+    """
+    now = timezone.now()
+    counters = LoginCounter.objects.filter(key=key)
+    if counters.filter(expires_at__gt=now).update(count=F('count') + by):
+        return
+    # Only one worker gets to restart an expired counter; the others count on it.
+    if counters.filter(expires_at__lte=now).update(count=by, expires_at=now + timedelta(seconds=ttl)):
+        return
+    try:
+        with transaction.atomic():
+            LoginCounter.objects.create(key=key, count=by, expires_at=now + timedelta(seconds=ttl))
+    except IntegrityError:
+        counters.update(count=F('count') + by)
+
+
+def _counts(keys):
+    return dict(
+        LoginCounter.objects.filter(key__in=keys, expires_at__gt=timezone.now()).values_list('key', 'count')
+    )
+
+
+def _failure_keys(request, username):
+    return [
+        f'login-failures:user:{(username or "").strip().lower()[:150]}',
+        f'login-failures:ip:{client_ip(request)}',
+    ]
+
+
+def is_locked_out(request, username):
+    """
+    True when the username or the client IP has used up its failed
+    attempts for the current window. One indexed read, no user lookup or
+    password hashing.
+    """
+    config = settings.LOGIN_THROTTLE
+    user_key, ip_key = _failure_keys(request, username)
+    counts = _counts([user_key, ip_key])
+    return (
+        counts.get(user_key, 0) >= config['USERNAME_LIMIT']
+        or counts.get(ip_key, 0) >= config['IP_LIMIT']
+    )
+
+
+def record_failure(request, username):
+    # Fixed windows: the first failure starts the clock, later ones only count.
+    for key in _failure_keys(request, username):
+        _increment(key, settings.LOGIN_THROTTLE['WINDOW'])
+
+
+def clear_failures(request, username):
+    """Forget the username's failures after a successful login; the IP keeps its count."""
+    LoginCounter.objects.filter(key=_failure_keys(request, username)[0]).delete()
+
+
+def purge_login_counters():
+    """Delete expired counters; returns how many."""
+    return LoginCounter.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+# ---------- Metrics ----------
+def _metric_key(outcome, hour):
+    return f'login-metrics:{outcome}:{hour:%Y%m%d%H}'
+
+
+def record_outcome(request, username, outcome):
+    """
+    Count the attempt in its clock hour. Throttled attempts are only
+    counted for a THROTTLED_SAMPLE_RATE share of them, each sample standing
+    for the rest, so a flood of refused logins costs no writes.
+    """
+    log = logger.warning if outcome == 'throttled' else logger.debug
+    log('login_%s ip=%s username=%r', outcome, client_ip(request), username)
+
+    key = _metric_key(outcome, timezone.now())
+    if outcome != 'throttled':
+        _increment(key, 48 * 60 * 60)
+        return
+    rate = settings.LOGIN_THROTTLE['THROTTLED_SAMPLE_RATE']
+    if rate and random.random() < rate:
+        _increment(key, 48 * 60 * 60, by=round(1 / rate))
+
+
+def login_stats(hours=1):
+    """
+    Login attempts per outcome over the current and previous ``hours - 1``
+    clock hours. Throttled attempts are estimated from their samples.
+    """
+    now = timezone.now()
+    buckets = [now - timedelta(hours=offset) for offset in range(hours)]
+    keys = {(outcome, hour): _metric_key(outcome, hour) for outcome in OUTCOMES for hour in buckets}
+    counts = _counts(list(keys.values()))
+    return {
+        outcome: sum(counts.get(keys[outcome, hour], 0) for hour in buckets)
+        for outcome in OUTCOMES
+    }
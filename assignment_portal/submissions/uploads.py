@@ -0,0 +1,354 @@
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import Assignment, ChunkedUpload, UploadJob
+from .storage import CONTENT_ADDRESSED_PREFIX, file_digest, get_blob_store
+
+
+logger = logging.getLogger('submissions.uploads')
+
+MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+ALLOWED_EXTENSIONS = ['.pdf', '.doc', '.docx', '.ppt', '.pptx', '.zip', '.rar']
+
+
+def spool_dir():
+    path = Path(settings.UPLOAD_SPOOL_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def spool_file(uploaded_file):
+    """
+    Stage an uploaded file in the spool directory and return its path.
+    Large uploads that Django already wrote to a temporary file are moved
+    rather than copied.
+    """
+    target = spool_dir() / f'{uuid.uuid4().hex}{Path(uploaded_file.name).suffix.lower()}'
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        shutil.move(uploaded_file.temporary_file_path(), target)
+    else:
+        with open(target, 'wb') as spooled:
+            for chunk in uploaded_file.chunks():
+                spooled.write(chunk)
+    return target
+
+
+def enqueue_upload(assignment, spool_path, original_name):
+    """
+    Save ``assignment`` in the "uploading" state together with the job that
+    will push ``spool_path`` to the submission store. When a
+    content-addressed store already holds the same bytes, the assignment
+    points at that blob straight away and no job is queued (returns None).
+    """
+    store = get_blob_store()
+    if store.content_addressed:
+        stored = store.lookup(file_digest(spool_path), Path(original_name).suffix)
+        if stored:
+            assignment.file = stored
+            assignment.upload_status = 'stored'
+            assignment.save()
+            transaction.on_commit(lambda: Path(spool_path).unlink(missing_ok=True))
+            logger.info('upload_deduplicated assignment=%s blob=%s', assignment.pk, stored)
+            return None
+
+    assignment.file = None
+    assignment.upload_status = 'uploading'
+    with transaction.atomic():
+        assignment.save()
+        return UploadJob.objects.create(
+            assignment=assignment,
+            spool_path=str(spool_path),
+            original_name=original_name,
+            size=Path(spool_path).stat().st_size,
+            available_at=timezone.now(),
+        )
+
+
+# ---------- Resumable Uploads ----------
+def chunk_path(upload):
+    return spool_dir() / f'{upload.pk}.part'
+
+
+def start_chunked_upload(student, course, title, filename, size, description=''):
+    """Validate the announced file and open a resumable upload for it."""
+    extension = Path(filename).suffix.lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise ValidationError(
+            f"File type not supported. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    if size <= 0 or size > MAX_UPLOAD_SIZE:
+        raise ValidationError("File size must not exceed 20MB.")
+    if not title:
+        raise ValidationError("A title is required.")
+
+    upload = ChunkedUpload.objects.create(
+        student=student,
+        course=course,
+        title=title,
+        description=description,
+        filename=filename,
+        size=size,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+    )
+    chunk_path(upload).touch()
+    return upload
+
+
+def store_chunk(upload, index, data, checksum):
+    """
+    Append chunk ``index`` after checking its SHA-256. Re-sending a chunk
+    that was already acknowledged is a no-op, so clients can retry blindly
+    after a dropped connection.
+    """
+    if upload.assignment_id:
+        raise ValidationError("Upload is already complete.", code='complete')
+    if checksum is None or hashlib.sha256(data).hexdigest() != checksum.lower():
+        raise ValidationError(f"Checksum mismatch for chunk {index}.", code='checksum')
+
+    if index < upload.received_chunks:
+        if upload.chunk_checksums[index] != checksum.lower():
+            raise ValidationError(f"Chunk {index} differs from the one already received.", code='conflict')
+        return upload
+    if index != upload.received_chunks:
+        raise ValidationError(f"Expected chunk {upload.received_chunks}.", code='out_of_order')
+
+    is_last = index == upload.total_chunks - 1
+    expected = upload.size - index * upload.chunk_size if is_last else upload.chunk_size
+    if len(data) != expected:
+        raise ValidationError(f"Chunk {index} must be {expected} bytes.", code='size')
+
+    with open(chunk_path(upload), 'r+b') as partial:
+        partial.seek(index * upload.chunk_size)
+        partial.write(data)
+        partial.truncate()
+
+    upload.received_chunks = index + 1
+    upload.chunk_checksums = upload.chunk_checksums[:index] + [checksum.lower()]
+    upload.save(update_fields=['received_chunks', 'chunk_checksums', 'updated_at'])
+    return upload
+
+
+def complete_chunked_upload(upload, checksum=None):
+    """
+    Turn a fully received upload into an Assignment and queue it for the
+    upload worker. ``checksum`` optionally verifies the assembled file.
+    The chunks stay in place until the assignment is committed, so a
+    failed attempt can simply be retried.
+    """
+    with transaction.atomic():
+        # Serialises concurrent "complete" requests; the later one returns
+        # the assignment the first created.
+        upload.assignment_id = ChunkedUpload.objects.select_for_update().values_list(
+            'assignment_id', flat=True
+        ).get(pk=upload.pk)
+        if upload.assignment_id:
+            return upload.assignment
+        if upload.received_chunks < upload.total_chunks:
+            raise ValidationError(
+                f"Upload is incomplete: {upload.received_chunks} of {upload.total_chunks} chunks received.",
+                code='incomplete',
+            )
+
+        partial = chunk_path(upload)
+        if checksum and file_digest(partial) != checksum.lower():
+            raise ValidationError("Checksum mismatch for the assembled file.", code='checksum')
+
+        # A second link rather than a move: the chunks are only dropped
+        # once the assignment and its job are committed.
+        staged = spool_dir() / f'{uuid.uuid4().hex}{Path(upload.filename).suffix.lower()}'
+        os.link(partial, staged)
+        try:
+            assignment = Assignment(
+                student=upload.student,
+                course=upload.course,
+                title=upload.title,
+                description=upload.description,
+                status='pending',
+            )
+            enqueue_upload(assignment, staged, upload.filename)
+            upload.assignment = assignment
+            upload.save(update_fields=['assignment', 'updated_at'])
+        except BaseException:
+            staged.unlink(missing_ok=True)
+            raise
+        transaction.on_commit(lambda: partial.unlink(missing_ok=True))
+    return assignment
+
+
+def purge_stale_chunked_uploads():
+    """Drop unfinished uploads that have not received a chunk within UPLOAD_SESSION_TTL."""
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    stale = ChunkedUpload.objects.filter(assignment__isnull=True, updated_at__lt=cutoff)
+    for upload in stale:
+        chunk_path(upload).unlink(missing_ok=True)
+    return stale.delete()[0]
+
+
+# ---------- Worker ----------
+def claim_jobs(limit):
+    """
+    Atomically move up to ``limit`` due jobs from queued to running. Safe to
+    call from several worker processes at once: a job is only returned to
+    the worker whose UPDATE changed it.
+    """
+    now = timezone.now()
+    # Jobs left running by a worker that died count as a failed attempt and
+    # are handed out again, unless that was their last one: a file that
+    # crashes or hangs the worker must not be retried forever.
+    stale = UploadJob.objects.filter(
+        state='running', started_at__lt=now - timedelta(seconds=settings.UPLOAD_STALE_AFTER)
+    )
+    lost = 'Worker lost: still running after UPLOAD_STALE_AFTER seconds.'
+    with transaction.atomic():
+        exhausted = stale.filter(attempts__gte=settings.UPLOAD_MAX_ATTEMPTS - 1)
+        assignment_ids = list(exhausted.values_list('assignment_id', flat=True))
+        if assignment_ids:
+            exhausted.update(state='failed', attempts=F('attempts') + 1, last_error=lost, finished_at=now)
+            Assignment.objects.filter(pk__in=assignment_ids).update(upload_status='failed')
+            logger.warning('upload_abandoned assignments=%s error=%r', assignment_ids, lost)
+        stale.update(state='queued', attempts=F('attempts') + 1, last_error=lost, available_at=now)
+
+    candidates = list(UploadJob.objects.filter(
+        state='queued', available_at__lte=now
+    ).order_by('available_at').values_list('id', flat=True)[:limit])
+
+    claimed = []
+    for job_id in candidates:
+        if UploadJob.objects.filter(id=job_id, state='queued').update(state='running', started_at=now):
+            claimed.append(job_id)
+    return list(UploadJob.objects.filter(id__in=claimed).select_related('assignment'))
+
+
+def process_job(job, store=None):
+    """Push one staged file to the store, retrying later with backoff on failure."""
+    store = store or get_blob_store()
+    assignment = job.assignment
+    started = timezone.now()
+    name = f'submissions/{assignment.pk}/{get_valid_filename(job.original_name)}'
+
+    try:
+        with open(job.spool_path, 'rb') as staged:
+            stored = store.save(name, staged)
+    except Exception as exc:
+        job.attempts += 1
+        job.last_error = f'{type(exc).__name__}: {exc}'
+        if job.attempts >= settings.UPLOAD_MAX_ATTEMPTS:
+            job.state = 'failed'
+            job.finished_at = timezone.now()
+            Assignment.objects.filter(pk=assignment.pk).update(upload_status='failed')
+        else:
+            job.state = 'queued'
+            job.available_at = timezone.now() + timedelta(
+                seconds=settings.UPLOAD_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            )
+        job.save(update_fields=['attempts', 'last_error', 'state', 'available_at', 'finished_at'])
+        logger.warning(
+            'upload_failed job=%s assignment=%s attempt=%s state=%s error=%r',
+            job.pk, assignment.pk, job.attempts, job.state, job.last_error,
+        )
+        return False
+
+    finished = timezone.now()
+    with transaction.atomic():
+        assignment.file = stored
+        assignment.upload_status = 'stored'
+        assignment.save(update_fields=['file', 'upload_status'])
+        job.state = 'done'
+        job.attempts += 1
+        job.finished_at = finished
+        job.save(update_fields=['state', 'attempts', 'finished_at'])
+    Path(job.spool_path).unlink(missing_ok=True)
+
+    logger.info(
+        'upload_stored job=%s assignment=%s bytes=%s upload_ms=%d queue_ms=%d',
+        job.pk, assignment.pk, job.size,
+        (finished - started).total_seconds() * 1000,
+        (started - job.queued_at).total_seconds() * 1000,
+    )
+    return True
+
+
+# ---------- Store Migration ----------
+def files_to_migrate():
+    """Assignments whose file is not in the content-addressed store yet."""
+    return Assignment.objects.filter(file__isnull=False).exclude(file='').exclude(
+        file__startswith=CONTENT_ADDRESSED_PREFIX
+    )
+
+
+def _copy_file(source, target, name):
+    try:
+        with source.open(name) as content:
+            return target.save(name, content)
+    except Exception as exc:
+        return exc
+
+
+def migrate_submission_files(source, target=None, batch_size=100, workers=None):
+    """
+    Copy every file ``files_to_migrate`` finds from ``source`` into the
+    content-addressed ``target`` (default: the active store) and repoint the
+    rows. ``workers`` downloads run at once. Rows whose file changed during
+    the copy are left alone; failures are logged, returned as
+    ``(assignment_id, error)`` and retried on the next run.
+    """
+    target = target or get_blob_store()
+    if not target.content_addressed:
+        raise ValueError('The target store must be content-addressed.')
+    workers = workers or settings.SUBMISSION_DOWNLOAD_WORKERS
+    pending = files_to_migrate().order_by('pk')
+    copied, failed, last_pk = 0, [], 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while batch := list(pending.filter(pk__gt=last_pk).values_list('pk', 'file')[:batch_size]):
+            last_pk = batch[-1][0]
+            outcomes = pool.map(lambda row: _copy_file(source, target, row[1]), batch)
+            for (pk, old_name), outcome in zip(batch, outcomes):
+                if isinstance(outcome, Exception):
+                    failed.append((pk, outcome))
+                    logger.warning('file_migration_failed assignment=%s file=%s error=%r', pk, old_name, outcome)
+                    continue
+                copied += Assignment.objects.filter(pk=pk, file=old_name).update(file=outcome)
+    return copied, failed
+
+
+# ---------- Metrics ----------
+def _percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def queue_stats(window=timedelta(hours=1)):
+    """Queue depth per state and end-to-end latency of recently stored uploads."""
+    states = dict(UploadJob.objects.values_list('state').annotate(total=Count('id')).order_by())
+    recent = UploadJob.objects.filter(
+        state='done', finished_at__gte=timezone.now() - window
+    ).values_list('queued_at', 'finished_at')
+    latencies = sorted((finished - queued).total_seconds() for queued, finished in recent)
+
+    return {
+        'queued': states.get('queued', 0),
+        'running': states.get('running', 0),
+        'failed': states.get('failed', 0),
+        'done': states.get('done', 0),
+        'latency_seconds': {
+            'count': len(latencies),
+            'p50': _percentile(latencies, 0.50),
+            'p95': _percentile(latencies, 0.95),
+            'max': latencies[-1] if latencies else None,
+        },
+    }
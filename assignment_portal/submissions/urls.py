@@ -1,30 +1,62 @@
 from django.urls import path, include
 from django.shortcuts import redirect
 from django.contrib.auth import views as auth_views
-from django.utils.functional import SimpleLazyObject
+from rest_framework.routers import DefaultRouter
+
 from . import views
-from .admin import LecturerAdminSite
+from .admin import lecturer_admin_site
+
+api_router = DefaultRouter()
+api_router.register('assignments', views.AssignmentViewSet, basename='api-assignment')
+api_router.register('courses', views.CourseViewSet, basename='api-course')
+api_router.register('students', views.StudentViewSet, basename='api-student')
+api_router.register('lecturers', views.LecturerViewSet, basename='api-lecturer')
 
 urlpatterns = [
     path('', lambda request: redirect('login')),
     path('register/', views.register, name='register'),
     path('login/', views.CustomLoginView.as_view(), name='login'),
     path('logout/', views.logout_view, name='logout'),
+    path('dashboard/', views.dashboard, name='dashboard'),
+    path('profile/', views.profile, name='profile'),
     path('complete_student_profile/', views.complete_student_profile, name='complete_student_profile'),
     path('complete_lecturer_profile/', views.complete_lecturer_profile, name='complete_lecturer_profile'),
     
     # Student URLs
     path('student/dashboard/', views.student_dashboard, name='student_dashboard'),
     path('student/upload/', views.upload_assignment, name='upload_assignment'),
+    path('student/upload/chunked/', views.chunked_upload_start, name='chunked_upload_start'),
+    path('student/upload/chunked/<uuid:upload_id>/', views.chunked_upload_status, name='chunked_upload_status'),
+    path('student/upload/chunked/<uuid:upload_id>/chunks/<int:index>/', views.chunked_upload_chunk, name='chunked_upload_chunk'),
+    path('student/upload/chunked/<uuid:upload_id>/complete/', views.chunked_upload_complete, name='chunked_upload_complete'),
     path('student/assignments/', views.student_assignments, name='student_assignments'),
+    path('student/assignments/rows/', views.student_assignments_rows, name='student_assignments_rows'),
     path('student/profile/', views.student_profile, name='student_profile'),
     
+    # Shared by students and lecturers
+    path('assignments/<int:assignment_id>/file/', views.download_assignment_file, name='download_assignment_file'),
+    
     # Lecturer URLs
     path('lecturer/dashboard/', views.lecturer_dashboard, name='lecturer_dashboard'),
     path('lecturer/assignments/', views.lecturer_assignments, name='lecturer_assignments'),
+    path('lecturer/assignments/rows/', views.lecturer_assignments_rows, name='lecturer_assignments_rows'),
+    path('lecturer/assignments/search/', views.search_assignments_rows, name='search_assignments_rows'),
     path('lecturer/courses/', views.lecturer_courses, name='lecturer_courses'),
+    path('lecturer/courses/<int:course_id>/gradebook/', views.export_gradebook, name='export_gradebook'),
+    path('lecturer/courses/<int:course_id>/submissions.zip', views.download_submissions, name='download_submissions'),
+    path('lecturer/courses/<int:course_id>/similarity/', views.course_similarity, name='course_similarity'),
     path('lecturer/grade/<int:assignment_id>/', views.grade_assignment, name='grade_assignment'),
+    path('lecturer/grade/bulk/', views.bulk_grade_assignments, name='bulk_grade_assignments'),
     path('lecturer/students/', views.lecturer_students, name='lecturer_students'),
+    path('lecturer/admin/', lecturer_admin_site.urls),
+    
+    # Staff monitoring
+    path('staff/uploads/', views.upload_queue_status, name='upload_queue_status'),
+    path('staff/logins/', views.login_attempt_status, name='login_attempt_status'),
+    path('staff/profiling/', views.request_profile_status, name='request_profile_status'),
+    
+    # REST API
+    path('api/v1/', include(api_router.urls)),
 
 
 
@@ -55,31 +87,3 @@ urlpatterns = [
          ), 
          name='password_reset_complete'),
 ]
-
-# Add this at the BOTTOM of your urls.py AFTER successful migrations
-import sys
-
-# Only add lecturer URLs if we're not running migrations
-if 'makemigrations' not in sys.argv and 'migrate' not in sys.argv:
-    try:
-        from .models import LecturerProfile
-        
-        def _get_lecturer_admin_urls():
-            """Inner function that queries the database - only called when needed"""
-            urls = []
-            for lecturer in LecturerProfile.objects.all():
-                lecturer_site = LecturerAdminSite(lecturer, name=f'lecturer_{lecturer.staff_id}')
-                # Register models on the site
-                from .models import Course, Assignment
-                from .admin import CourseAdmin, AssignmentAdmin
-                lecturer_site.register(Course, CourseAdmin)
-                lecturer_site.register(Assignment, AssignmentAdmin)
-                urls.append(path(f'lecturer/{lecturer.staff_id}/admin/', lecturer_site.urls))
-            return urls
-        
-        # Use SimpleLazyObject to delay execution until first access
-        lecturer_urls = SimpleLazyObject(lambda: _get_lecturer_admin_urls())
-        urlpatterns += lecturer_urls
-    except Exception as e:
-        print(f"Warning: Could not create lecturer admin URLs: {e}")
-        # Continue without lecturer admin URLs
\ No newline at end of file
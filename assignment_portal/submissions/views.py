@@ -1,10 +1,18 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.views import LoginView
+from django.conf import settings
 from django.contrib import messages
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods, require_POST, require_safe
 
 from .forms import (
     UserRegistrationForm, StudentProfileForm, 
@@ -12,15 +20,39 @@ from .forms import (
 )
 from .models import (
     UserProfile, StudentProfile, LecturerProfile, 
-    Assignment, Course, Faculty, Department
+    Assignment, ChunkedUpload, Course, Faculty, Department
+)
+from .caching import (
+    COURSES, STUDENTS, fragment_cache_timeout, get_current_courses, get_generation, get_lecturer_courses,
+    get_student_dashboard_stats
+)
+from .downloads import download_filename, serve_stored_file
+from .exports import (
+    GRADEBOOK_HEADER, gradebook_rows, stream_csv, stream_submissions_zip, stream_xlsx
+)
+from .grading import bulk_grade
+from .pagination import paginate_keyset
+from .profiling import profile_stats, reset_profile_stats
+from .roles import is_lecturer, is_student, resolve_role
+from .search import search_assignments
+from .similarity import fingerprint_counts, similar_pairs
+from .stats import lecturer_submission_totals
+from .storage import get_blob_store
+from .throttling import login_stats
+from .uploads import (
+    complete_chunked_upload, enqueue_upload, queue_stats, spool_file, start_chunked_upload,
+    store_chunk
 )
 
 # ---------- Utility Functions ----------
-def is_student(user):
-    return hasattr(user, 'student_profile')
 
-def is_lecturer(user):
-    return hasattr(user, 'lecturer_profile')
+def _next_page_url(request, url_name, page):
+    """URL of the rows fragment for the page after ``page``, keeping current filters."""
+    if not page.has_next:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = page.next_cursor
+    return f"{reverse(url_name)}?{params.urlencode()}"
 
 
 class CustomLoginView(LoginView):
@@ -28,36 +60,36 @@ class CustomLoginView(LoginView):
     redirect_authenticated_user = True
     
     def get_success_url(self):
-        user = self.request.user
-        if hasattr(user, 'student_profile'):
+        role = resolve_role(self.request.user)
+        if role == 'student':
             return '/student/dashboard/'
-        elif hasattr(user, 'lecturer_profile'):
+        elif role == 'lecturer':
             return '/lecturer/dashboard/'
-        elif user.is_superuser:
+        elif role == 'admin':
             return '/admin/'
         return '/'
     
     def form_valid(self, form):
-        # Custom login logic if needed
-        username = form.cleaned_data.get('username')
-        password = form.cleaned_data.get('password')
-        user = authenticate(self.request, username=username, password=password)
+        # The form already authenticated the user while validating; hashing
+        # the password a second time would double the cost of every login.
+        user = form.get_user()
+        login(self.request, user)
         
-        if user is not None:
-            login(self.request, user)
-            
-            # Set session timeout based on remember me
-            if not self.request.POST.get('remember'):
-                self.request.session.set_expiry(0)  # Browser session
-            else:
-                self.request.session.set_expiry(1209600)  # 2 weeks
-            
-            messages.success(self.request, f'Welcome back, {user.full_name}!')
-            return redirect(self.get_success_url())
+        # Set session timeout based on remember me
+        if not self.request.POST.get('remember'):
+            self.request.session.set_expiry(0)  # Browser session
+        else:
+            self.request.session.set_expiry(1209600)  # 2 weeks
         
-        return super().form_invalid(form)
+        messages.success(self.request, f'Welcome back, {user.full_name}!')
+        return redirect(self.get_success_url())
     
     def form_invalid(self, form):
+        if getattr(self.request, 'login_throttled', False):
+            messages.error(self.request, 'Too many failed sign-in attempts. Please wait a few minutes and try again.')
+            response = super().form_invalid(form)
+            response.status_code = 429
+            return response
         messages.error(self.request, 'Invalid username or password. Please try again.')
         return super().form_invalid(form)
 
@@ -65,9 +97,9 @@ class CustomLoginView(LoginView):
 def login_view(request):
     if request.user.is_authenticated:
         # Redirect based on user type
-        if hasattr(request.user, 'student_profile'):
+        if request.user_role == 'student':
             return redirect('student_dashboard')
-        elif hasattr(request.user, 'lecturer_profile'):
+        elif request.user_role == 'lecturer':
             return redirect('lecturer_dashboard')
         return redirect('dashboard')
     
@@ -86,11 +118,12 @@ def login_view(request):
             messages.success(request, f'Welcome back, {user.full_name}!')
             
             # Redirect based on user type
-            if hasattr(user, 'student_profile'):
+            role = resolve_role(user)
+            if role == 'student':
                 return redirect('submissions/student_dashboard')
-            elif hasattr(user, 'lecturer_profile'):
+            elif role == 'lecturer':
                 return redirect('submissions/lecturer_dashboard')
-            elif user.is_superuser:
+            elif role == 'admin':
                 return redirect('/admin/')
             return redirect('dashboard')
         else:
@@ -216,41 +249,19 @@ def student_dashboard(request):
     ).select_related('course', 'course__lecturer__user')
     
     # Get student's current courses
-    current_courses = Course.objects.filter(
-        department=student.department,
-        level=student.level,
-        is_active=True
-    ).select_related('lecturer__user')
+    current_courses = get_current_courses(student.department_id, student.level_id)
     
     # Calculate statistics
-    total_assignments = assignments.count()
-    graded_assignments = assignments.filter(status='graded').count()
-    pending_assignments = assignments.filter(status__in=['pending', 'under_review']).count()
-    total_courses = current_courses.count()
-    
-    # Calculate completion percentage
-    completed_courses = current_courses.filter(
-        assignments__student=student,
-        assignments__status='graded'
-    ).distinct().count()
-    completion_percentage = (completed_courses / total_courses * 100) if total_courses > 0 else 0
-    
-    # Calculate average grade
-    graded_scores = assignments.filter(score__isnull=False).values_list('score', flat=True)
-    average_grade = round(sum(graded_scores) / len(graded_scores), 1) if graded_scores else 'N/A'
-    
-    # Calculate submission rate
-    total_possible_assignments = sum(course.assignments.count() for course in current_courses)
-    submission_rate = (total_assignments / total_possible_assignments * 100) if total_possible_assignments > 0 else 0
+    stats = get_student_dashboard_stats(student)
     
     # Get recent assignments (last 5)
     recent_assignments = assignments.order_by('-date_uploaded')[:5]
     
     # Prepare performance data
     performance_data = {
-        'average_grade': average_grade,
-        'submission_rate': round(submission_rate),
-        'pending_work': pending_assignments,
+        'average_grade': stats['average_grade'],
+        'submission_rate': stats['submission_rate'],
+        'pending_work': stats['pending_assignments'],
     }
     
     context = {
@@ -258,17 +269,19 @@ def student_dashboard(request):
         'assignments': assignments,
         'recent_assignments': recent_assignments,
         'courses': current_courses,
-        'total_assignments': total_assignments,
-        'graded_assignments': graded_assignments,
-        'pending_assignments': pending_assignments,
-        'total_courses': total_courses,
-        'completion_percentage': round(completion_percentage),
+        'total_assignments': stats['total_assignments'],
+        'graded_assignments': stats['graded_assignments'],
+        'pending_assignments': stats['pending_assignments'],
+        'total_courses': stats['total_courses'],
+        'completion_percentage': stats['completion_percentage'],
         'performance_data': performance_data,
-        'average_grade': average_grade,
-        'submission_rate': round(submission_rate),
+        'average_grade': stats['average_grade'],
+        'submission_rate': stats['submission_rate'],
+        'courses_version': get_generation(COURSES),
+        'fragment_cache_timeout': fragment_cache_timeout(),
     }
     
-    return render(request, 'student_dashboard.html', context)
+    return render(request, 'submissions/student_dashboard.html', context)
     
 @login_required
 @user_passes_test(is_student)
@@ -276,11 +289,7 @@ def upload_assignment(request):
     student = request.user.student_profile
     
     # Get student's current courses
-    current_courses = Course.objects.filter(
-        department=student.department,
-        level=student.level,
-        is_active=True
-    ).select_related('lecturer__user')
+    current_courses = get_current_courses(student.department_id, student.level_id)
     
     # Get recent uploads
     recent_uploads = Assignment.objects.filter(
@@ -308,7 +317,12 @@ def upload_assignment(request):
             assignment.status = 'pending'
             assignment.date_uploaded = timezone.now()
             
-            assignment.save()
+            # Stage the file locally; run_upload_worker pushes it to storage
+            uploaded_file = form.cleaned_data.get('file')
+            if uploaded_file:
+                enqueue_upload(assignment, spool_file(uploaded_file), uploaded_file.name)
+            else:
+                assignment.save()
             
             # Create notification for lecturer
             messages.success(
@@ -331,23 +345,126 @@ def upload_assignment(request):
         'courses': current_courses,
         'recent_uploads': recent_uploads,
         'form': form,
+        'courses_version': get_generation(COURSES),
+        'fragment_cache_timeout': fragment_cache_timeout(),
     }
     
-    return render(request, 'upload_assignment.html', context)
+    return render(request, 'submissions/upload_assignment.html', context)
+
+
+# ---------- Resumable Uploads ----------
+def _chunked_upload_state(upload):
+    return {
+        'upload_id': str(upload.pk),
+        'chunk_size': upload.chunk_size,
+        'total_chunks': upload.total_chunks,
+        'next_chunk': upload.received_chunks,
+        'received_bytes': upload.received_bytes,
+        'assignment_id': upload.assignment_id,
+    }
+
+
+@login_required
+@user_passes_test(is_student)
+@require_POST
+def chunked_upload_start(request):
+    """
+    Open a resumable upload. Expects JSON with ``course``, ``title``,
+    ``filename``, ``size`` and optionally ``description``.
+    """
+    student = request.user.student_profile
+    try:
+        data = json.loads(request.body)
+        course = Course.objects.get(id=data.get('course'))
+        upload = start_chunked_upload(
+            student, course,
+            title=str(data.get('title', '')).strip(),
+            filename=str(data.get('filename', '')),
+            size=int(data.get('size', 0)),
+            description=str(data.get('description', '')).strip(),
+        )
+    except (ValueError, TypeError, AttributeError, Course.DoesNotExist):
+        return JsonResponse({'error': 'Expected JSON with a valid course, title, filename and size.'}, status=400)
+    except ValidationError as exc:
+        return JsonResponse({'error': exc.messages[0]}, status=400)
+    
+    return JsonResponse(_chunked_upload_state(upload), status=201)
+
+
+@login_required
+@user_passes_test(is_student)
+def chunked_upload_status(request, upload_id):
+    """Where to resume: the next chunk the server expects."""
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, student=request.user.student_profile)
+    return JsonResponse(_chunked_upload_state(upload))
+
+
+@login_required
+@user_passes_test(is_student)
+@require_http_methods(['PUT'])
+def chunked_upload_chunk(request, upload_id, index):
+    """Receive one chunk as the raw request body, verified against ``X-Chunk-SHA256``."""
+    with transaction.atomic():
+        upload = get_object_or_404(
+            ChunkedUpload.objects.select_for_update(),
+            pk=upload_id, student=request.user.student_profile,
+        )
+        try:
+            store_chunk(upload, index, request.body, request.headers.get('X-Chunk-SHA256'))
+        except ValidationError as exc:
+            status = 409 if exc.code in ('out_of_order', 'conflict', 'complete') else 400
+            return JsonResponse({'error': exc.messages[0], **_chunked_upload_state(upload)}, status=status)
+    
+    return JsonResponse(_chunked_upload_state(upload))
+
+
+@login_required
+@user_passes_test(is_student)
+@require_POST
+def chunked_upload_complete(request, upload_id):
+    """Assemble the upload into an Assignment. Accepts an optional ``X-File-SHA256`` header."""
+    with transaction.atomic():
+        upload = get_object_or_404(
+            ChunkedUpload.objects.select_for_update(),
+            pk=upload_id, student=request.user.student_profile,
+        )
+        try:
+            complete_chunked_upload(upload, request.headers.get('X-File-SHA256'))
+        except ValidationError as exc:
+            return JsonResponse({'error': exc.messages[0], **_chunked_upload_state(upload)}, status=409)
+    
+    return JsonResponse(_chunked_upload_state(upload))
 
 
 @login_required
 @user_passes_test(is_student)
 def student_assignments(request):
     student = request.user.student_profile
-    assignments = Assignment.objects.filter(student=student).order_by('-date_uploaded')
+    assignments = Assignment.objects.filter(student=student).select_related('course')
+    page = paginate_keyset(assignments, request.GET.get('cursor'))
     
     return render(request, 'submissions/student_assignments.html', {
-        'assignments': assignments,
+        'assignments': page.object_list,
+        'page': page,
+        'next_url': _next_page_url(request, 'student_assignments_rows', page),
         'student': student
     })
 
 
+@login_required
+@user_passes_test(is_student)
+def student_assignments_rows(request):
+    """Infinite-scroll fragment: the next page of student_assignments rows."""
+    student = request.user.student_profile
+    assignments = Assignment.objects.filter(student=student).select_related('course')
+    page = paginate_keyset(assignments, request.GET.get('cursor'))
+    
+    return render(request, 'submissions/partials/assignment_rows.html', {
+        'page': page,
+        'next_url': _next_page_url(request, 'student_assignments_rows', page),
+    })
+
+
 @login_required
 @user_passes_test(is_student)
 def student_profile(request):
@@ -369,7 +486,7 @@ def lecturer_dashboard(request):
     lecturer = request.user.lecturer_profile
     
     # Get lecturer's courses
-    courses = Course.objects.filter(lecturer=lecturer).prefetch_related('students')
+    courses = get_lecturer_courses(lecturer)
     
     # Get assignments for lecturer's courses
     assignments = Assignment.objects.filter(
@@ -377,43 +494,47 @@ def lecturer_dashboard(request):
     ).select_related('student__user', 'course', 'graded_by__user')
     
     # Calculate statistics
-    total_assignments = assignments.count()
-    graded_assignments = assignments.filter(status='graded').count()
-    pending_assignments = assignments.filter(status__in=['pending', 'under_review']).count()
-    total_courses = courses.count()
+    totals = lecturer_submission_totals(lecturer)
+    total_courses = len(courses)
     
     # Get recent assignments (last 10)
     recent_assignments = assignments.order_by('-date_uploaded')[:10]
     
     # Get assignments with upcoming deadlines (within next 7 days)
-    from datetime import datetime, timedelta
-    next_week = datetime.now() + timedelta(days=7)
+    from datetime import timedelta
+    now = timezone.now()
+    next_week = now + timedelta(days=7)
     upcoming_deadlines = assignments.filter(
         deadline__isnull=False,
-        deadline__gte=datetime.now(),
+        deadline__gte=now,
         deadline__lte=next_week
     ).order_by('deadline')[:5]
     
-    # Calculate course student counts
-    for course in courses:
-        course.student_count = StudentProfile.objects.filter(
-            department=course.department,
-            level=course.level
-        ).count()
-    
     context = {
         'lecturer': lecturer,
         'courses': courses,
         'assignments': assignments,
         'recent_assignments': recent_assignments,
         'upcoming_deadlines': upcoming_deadlines,
-        'total_assignments': total_assignments,
-        'graded_assignments': graded_assignments,
-        'pending_assignments': pending_assignments,
+        'total_assignments': totals['total_assignments'],
+        'graded_assignments': totals['graded_assignments'],
+        'pending_assignments': totals['pending_assignments'],
         'total_courses': total_courses,
+        'courses_version': get_generation(COURSES),
+        'students_version': get_generation(STUDENTS),
+        'fragment_cache_timeout': fragment_cache_timeout(),
     }
     
-    return render(request, 'lecturer_dashboard.html', context)
+    return render(request, 'submissions/lecturer_dashboard.html', context)
+
+
+def _lecturer_assignments_queryset(lecturer, status_filter):
+    assignments = Assignment.objects.filter(course__lecturer=lecturer)
+    
+    if status_filter != 'all':
+        assignments = assignments.filter(status=status_filter)
+    
+    return assignments.select_related('student__user', 'course')
 
 
 @login_required
@@ -422,20 +543,50 @@ def lecturer_assignments(request):
     lecturer = request.user.lecturer_profile
     status_filter = request.GET.get('status', 'all')
     
-    assignments = Assignment.objects.filter(course__lecturer=lecturer)
-    
-    if status_filter != 'all':
-        assignments = assignments.filter(status=status_filter)
-    
-    assignments = assignments.select_related('student', 'course').order_by('-date_uploaded')
+    assignments = _lecturer_assignments_queryset(lecturer, status_filter)
+    page = paginate_keyset(assignments, request.GET.get('cursor'))
     
     return render(request, 'submissions/lecturer_assignments.html', {
-        'assignments': assignments,
+        'assignments': page.object_list,
+        'page': page,
+        'next_url': _next_page_url(request, 'lecturer_assignments_rows', page),
         'lecturer': lecturer,
         'status_filter': status_filter
     })
 
 
+@login_required
+@user_passes_test(is_lecturer)
+def lecturer_assignments_rows(request):
+    """Infinite-scroll fragment: the next page of lecturer_assignments rows."""
+    lecturer = request.user.lecturer_profile
+    status_filter = request.GET.get('status', 'all')
+    
+    assignments = _lecturer_assignments_queryset(lecturer, status_filter)
+    page = paginate_keyset(assignments, request.GET.get('cursor'))
+    
+    return render(request, 'submissions/partials/assignment_rows.html', {
+        'page': page,
+        'next_url': _next_page_url(request, 'lecturer_assignments_rows', page),
+        'show_student': True,
+    })
+
+
+@login_required
+@user_passes_test(is_lecturer)
+def search_assignments_rows(request):
+    """Ranked search over the lecturer's submissions, rendered as assignment rows."""
+    lecturer = request.user.lecturer_profile
+    
+    results = search_assignments(request.GET.get('q', ''), lecturer=lecturer, limit=50)
+    
+    return render(request, 'submissions/partials/assignment_rows.html', {
+        'page': results,
+        'next_url': None,
+        'show_student': True,
+    })
+
+
 @login_required
 @user_passes_test(is_lecturer)
 def grade_assignment(request, assignment_id):
@@ -491,7 +642,123 @@ def grade_assignment(request, assignment_id):
         'lecturer': lecturer,
     }
     
-    return render(request, 'grade_assignment.html', context)
+    return render(request, 'submissions/grade_assignment.html', context)
+
+
+@login_required
+@user_passes_test(is_lecturer)
+@require_POST
+def bulk_grade_assignments(request):
+    """
+    Grade many assignments in one request.
+
+    Expects a JSON body ``{"grades": [{"assignment_id": ..., "grade": ...,
+    "score": ..., "feedback": ..., "status": ...}, ...]}`` and returns the
+    graded ids plus per-row errors.
+    """
+    lecturer = request.user.lecturer_profile
+    
+    try:
+        rows = json.loads(request.body).get('grades')
+    except (ValueError, AttributeError):
+        rows = None
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return JsonResponse({'error': 'Expected a JSON object with a "grades" list.'}, status=400)
+    
+    graded_ids, errors = bulk_grade(lecturer, rows)
+    
+    return JsonResponse({
+        'graded': graded_ids,
+        'errors': [{'row': index, 'errors': row_errors} for index, row_errors in sorted(errors.items())],
+    })
+
+
+@login_required
+@user_passes_test(is_lecturer)
+def export_gradebook(request, course_id):
+    """Stream the gradebook for one of the lecturer's courses as CSV or XLSX."""
+    lecturer = request.user.lecturer_profile
+    course = get_object_or_404(Course, id=course_id, lecturer=lecturer)
+    export_format = request.GET.get('format', 'csv')
+    
+    rows = gradebook_rows(course)
+    if export_format == 'xlsx':
+        response = StreamingHttpResponse(
+            stream_xlsx(GRADEBOOK_HEADER, rows, sheet_name=course.code),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+    elif export_format == 'csv':
+        response = StreamingHttpResponse(
+            stream_csv(GRADEBOOK_HEADER, rows), content_type='text/csv'
+        )
+    else:
+        return JsonResponse({'error': 'Unsupported export format.'}, status=400)
+    
+    response['Content-Disposition'] = f'attachment; filename="{course.code}_gradebook.{export_format}"'
+    return response
+
+
+@login_required
+@user_passes_test(is_lecturer)
+def download_submissions(request, course_id):
+    """Stream a ZIP of every submitted file for a course, optionally filtered by status."""
+    lecturer = request.user.lecturer_profile
+    course = get_object_or_404(Course, id=course_id, lecturer=lecturer)
+    status_filter = request.GET.get('status', 'all')
+    
+    assignments = Assignment.objects.filter(course=course)
+    if status_filter != 'all':
+        assignments = assignments.filter(status=status_filter)
+    
+    response = StreamingHttpResponse(
+        stream_submissions_zip(
+            assignments, get_blob_store(), workers=settings.SUBMISSION_DOWNLOAD_WORKERS
+        ),
+        content_type='application/zip',
+    )
+    suffix = '' if status_filter == 'all' else f'_{status_filter}'
+    response['Content-Disposition'] = f'attachment; filename="{course.code}_submissions{suffix}.zip"'
+    return response
+
+
+@login_required
+@user_passes_test(is_lecturer)
+def course_similarity(request, course_id):
+    """Pairs of submissions to a course with near-identical text, most similar first."""
+    lecturer = request.user.lecturer_profile
+    course = get_object_or_404(Course, id=course_id, lecturer=lecturer)
+    default = settings.SIMILARITY['THRESHOLD']
+    try:
+        threshold = min(max(float(request.GET.get('threshold', default)), 0.0), 1.0)
+    except ValueError:
+        threshold = default
+    
+    pairs = similar_pairs(course, threshold)
+    assignments = Assignment.objects.select_related('student__user').in_bulk(
+        {pk for _similarity, first, second in pairs for pk in (first, second)}
+    )
+    
+    def describe(assignment):
+        return {
+            'id': assignment.pk,
+            'title': assignment.title,
+            'matric_number': assignment.student.matric_number,
+            'student': assignment.student.user.full_name,
+            'date_uploaded': assignment.date_uploaded,
+            'file_url': reverse('download_assignment_file', args=[assignment.pk]),
+        }
+    
+    return JsonResponse({
+        'course': course.code,
+        'threshold': threshold,
+        # Only indexed submissions are compared: pending ones have not been
+        # read yet, unreadable ones have no text the indexer could extract.
+        **fingerprint_counts(course),
+        'pairs': [
+            {'similarity': round(similarity, 3), 'assignments': [describe(assignments[first]), describe(assignments[second])]}
+            for similarity, first, second in pairs
+        ],
+    })
 
 
 @login_required
@@ -522,52 +789,177 @@ def lecturer_students(request):
     })
 
 
+# ---------- Submission Files ----------
+@login_required
+@require_safe
+def download_assignment_file(request, assignment_id):
+    """The file attached to an assignment, for its student or the course lecturer."""
+    assignment = get_object_or_404(
+        _visible_assignments(request).select_related('student').exclude(file__isnull=True).exclude(file=''),
+        id=assignment_id,
+    )
+    return serve_stored_file(request, assignment.file, download_filename(assignment))
+
+
 # ---------- API Views ----------
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
-from rest_framework.response import Response
 
-# Create separate API apps for students and lecturers
-# students/api/views.py
-class StudentViewSet(viewsets.ModelViewSet):
-    queryset = StudentProfile.objects.all()
+from .pagination import (
+    CodeCursorPagination, MatricNumberCursorPagination, NewestFirstCursorPagination, StaffIdCursorPagination
+)
+from .serializers import AssignmentSerializer, CourseSerializer, LecturerSerializer, StudentSerializer
+
+
+class PortalViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only API base. ``visible_queryset`` scopes rows to the caller's
+    role; list and detail responses honour ``?fields=`` and only join the
+    relations the requested fields need.
+    """
     permission_classes = [permissions.IsAuthenticated]
     
+    def visible_queryset(self):
+        raise NotImplementedError
+    
+    def requested_fields(self, serializer_class=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        return serializer_class.parse_fields(self.request.query_params.get('fields'))
+    
     def get_queryset(self):
-        if hasattr(self.request.user, 'student_profile'):
-            return self.queryset.filter(user=self.request.user)
-        elif hasattr(self.request.user, 'lecturer_profile'):
+        queryset = self.visible_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = self.get_serializer_class().setup_queryset(queryset, self.requested_fields())
+        return queryset
+    
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
+    
+    def paginated_response(self, queryset, serializer_class, pagination_class):
+        """A cursor-paginated, sparse-fieldset response for a nested collection."""
+        fields = self.requested_fields(serializer_class)
+        queryset = serializer_class.setup_queryset(queryset, fields)
+        paginator = pagination_class()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        serializer = serializer_class(page, many=True, fields=fields, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+
+def _visible_assignments(request):
+    if request.user_role == 'student':
+        return Assignment.objects.filter(student__user=request.user)
+    elif request.user_role == 'lecturer':
+        return Assignment.objects.filter(course__lecturer=request.user.lecturer_profile)
+    return Assignment.objects.none()
+
+
+def _visible_courses(request):
+    if request.user_role == 'student':
+        student = request.user.student_profile
+        return Course.objects.filter(department_id=student.department_id, level_id=student.level_id, is_active=True)
+    elif request.user_role == 'lecturer':
+        return Course.objects.filter(lecturer=request.user.lecturer_profile)
+    return Course.objects.none()
+
+
+class AssignmentViewSet(PortalViewSet):
+    serializer_class = AssignmentSerializer
+    pagination_class = NewestFirstCursorPagination
+    
+    def visible_queryset(self):
+        return _visible_assignments(self.request)
+
+
+class CourseViewSet(PortalViewSet):
+    serializer_class = CourseSerializer
+    pagination_class = CodeCursorPagination
+    
+    def visible_queryset(self):
+        return _visible_courses(self.request)
+
+
+class StudentViewSet(PortalViewSet):
+    serializer_class = StudentSerializer
+    pagination_class = MatricNumberCursorPagination
+    
+    def visible_queryset(self):
+        if self.request.user_role == 'student':
+            return StudentProfile.objects.filter(user=self.request.user)
+        elif self.request.user_role == 'lecturer':
             # Lecturers can see their department's students
-            return self.queryset.filter(department=self.request.user.lecturer_profile.department)
-        return self.queryset.none()
+            return StudentProfile.objects.filter(department_id=self.request.user.lecturer_profile.department_id)
+        return StudentProfile.objects.none()
     
     @action(detail=True, methods=['get'])
     def assignments(self, request, pk=None):
         student = self.get_object()
-        assignments = Assignment.objects.filter(student=student)
-        # Return serialized assignments
-        return Response([])
+        # Lecturers only see the work handed in to their own courses.
+        assignments = _visible_assignments(request).filter(student=student)
+        return self.paginated_response(assignments, AssignmentSerializer, NewestFirstCursorPagination)
 
 
-# lecturers/api/views.py
-class LecturerViewSet(viewsets.ModelViewSet):
-    queryset = LecturerProfile.objects.all()
-    permission_classes = [permissions.IsAuthenticated]
+class LecturerViewSet(PortalViewSet):
+    serializer_class = LecturerSerializer
+    pagination_class = StaffIdCursorPagination
     
-    def get_queryset(self):
-        if hasattr(self.request.user, 'lecturer_profile'):
-            return self.queryset.filter(user=self.request.user)
-        return self.queryset.none()
+    def visible_queryset(self):
+        if self.request.user_role == 'lecturer':
+            return LecturerProfile.objects.filter(user=self.request.user)
+        return LecturerProfile.objects.none()
     
     @action(detail=True, methods=['get'])
     def courses(self, request, pk=None):
         lecturer = self.get_object()
         courses = Course.objects.filter(lecturer=lecturer)
-        # Return serialized courses
-        return Response([])
+        return self.paginated_response(courses, CourseSerializer, CodeCursorPagination)
+
+
+@staff_member_required
+def upload_queue_status(request):
+    """Upload queue depth and recent upload latency, for monitoring."""
+    return JsonResponse(queue_stats())
+
+
+@staff_member_required
+def login_attempt_status(request):
+    """Login attempts by outcome (success, failed, throttled) over the last ``hours`` hours."""
+    try:
+        hours = min(max(int(request.GET.get('hours', 1)), 1), 48)
+    except ValueError:
+        hours = 1
+    return JsonResponse({'hours': hours, **login_stats(hours)})
 
 
 @login_required
 def logout_view(request):
     logout(request)
     return redirect('login')
+
+
+DASHBOARDS = {'student': 'student_dashboard', 'lecturer': 'lecturer_dashboard', 'admin': 'admin:index'}
+
+
+@login_required
+def dashboard(request):
+    """The dashboard for the user's role; the shared navigation links here."""
+    return redirect(DASHBOARDS.get(request.user_role, 'login'))
+
+
+@login_required
+def profile(request):
+    """Students edit their profile in the portal; lecturer profiles are kept by the admin."""
+    if request.user_role == 'student':
+        return redirect('student_profile')
+    return dashboard(request)
+
+
+@staff_member_required
+def request_profile_status(request):
+    """Per-view averages of the requests sampled by RequestProfilingMiddleware; POST resets them."""
+    if request.method == 'POST':
+        reset_profile_stats()
+    return JsonResponse({
+        'sample_rate': settings.REQUEST_PROFILING['SAMPLE_RATE'],
+        'views': profile_stats(),
+    })